@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+通用AI助手池基准测试
+对比每个请求新建 UniversalAIAssistant（原 run_universal_assistant 的做法）与从预热的
+AssistantPool 借用助手的单次准备耗时，并检查重复创建助手后日志处理器是否重复
+
+不发送模型请求；需要能找到ADB（或设置 ADB_PATH）
+
+用法: python benchmarks/bench_assistant_pool.py [--requests 20] [--concurrency 4]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只创建客户端，不会发出请求
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from unimind.universal_ai_assistant import AssistantPool, UniversalAIAssistant
+
+CONFIG = os.path.join(ROOT, "config_unicom_android.yaml")
+
+
+def bench_construct(requests):
+    """返回每个请求新建助手的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        UniversalAIAssistant(CONFIG)
+    return (time.perf_counter() - start) / requests * 1e3
+
+
+async def bench_pool(pool, requests, concurrency):
+    """返回从助手池借用并归还助手的平均耗时（毫秒）"""
+    async def one():
+        assistant = await pool.acquire()
+        await asyncio.sleep(0)
+        pool.release(assistant)
+
+    start = time.perf_counter()
+    for offset in range(0, requests, concurrency):
+        await asyncio.gather(*(one() for _ in range(min(concurrency, requests - offset))))
+    return (time.perf_counter() - start) / requests * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    construct = bench_construct(args.requests)
+    handlers = len(logging.getLogger("UniversalAIAssistant").handlers)
+
+    pool = AssistantPool(CONFIG, size=args.concurrency, max_size=args.concurrency)
+    start = time.perf_counter()
+    pool.warm()
+    warm = (time.perf_counter() - start) * 1e3
+    leased = asyncio.run(bench_pool(pool, args.requests, args.concurrency))
+
+    print(f"new assistant per request: {construct:9.3f} ms/request")
+    print(f"pooled assistant:          {leased:9.3f} ms/request  ({construct / leased:.0f}x)")
+    print(f"pool warm-up ({args.concurrency} assistants): {warm:.1f} ms")
+    print(f"log handlers after {args.requests} assistants: {handlers}")
+    print(f"pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Context.add_history 基准测试
+对比插入时立即转换（原实现：递归 convert_data + 格式化时间）与延迟到导出时序列化的
+单次插入耗时，数据为一轮Agent处理结果（含find_elements返回的UI元素）
+
+用法: python benchmarks/bench_context_history.py [--rounds 5000]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from unimind.context import Context
+from unimind.context.context import convert_data
+from unimind.tool.ui_dump import parse_ui_elements
+
+DUMP_FILE = os.path.join(ROOT, "data", "ui_dumps", "unicom_balance.xml")
+
+
+def agent_result():
+    """构造一轮Agent处理结果，结构与 Agent.process 的返回值一致"""
+    with open(DUMP_FILE, "r", encoding="utf-8") as f:
+        elements = parse_ui_elements(f.read())
+    tool_call = {
+        "tool": "find_elements",
+        "args": {"text": None},
+        "result": {"success": True, "message": "元素查找完成", "elements": elements},
+    }
+    return {
+        "input": "查询话费余额",
+        "output": "当前话费余额为66.60元",
+        "usage": {"prompt_tokens": 1800, "completion_tokens": 120, "total_tokens": 1920},
+        "reason": "work_done",
+        "handoff": None,
+        "rounds": [
+            {"round": index, "tool_calls": [tool_call], "agent": object()}
+            for index in range(3)
+        ],
+    }
+
+
+def eager_add_history(history, step, data):
+    """原实现：插入时递归转换并格式化时间"""
+    history.append(
+        {
+            "step": step,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "data": convert_data(data),
+        }
+    )
+
+
+def bench(add, rounds):
+    """返回单次插入的平均耗时（微秒）"""
+    result = agent_result()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        add("ui_navigator", result.copy())
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+
+    eager_history = []
+    eager = bench(lambda step, data: eager_add_history(eager_history, step, data), args.rounds)
+
+    # 容量足够时不溢出到磁盘，只测量插入本身
+    context = Context("benchmark", history_capacity=args.rounds)
+    lazy = bench(context.add_history, args.rounds)
+
+    start = time.perf_counter()
+    entries = sum(1 for _ in context.history)
+    export = (time.perf_counter() - start) * 1e3
+    context.close()
+
+    print(f"eager add_history: {eager:8.2f} us/call")
+    print(f"lazy  add_history: {lazy:8.2f} us/call  ({eager / lazy:.0f}x)")
+    print(f"serialize {entries} entries on dump: {export:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
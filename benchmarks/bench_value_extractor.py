@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+话费/流量提取引擎基准测试
+基于 data/ui_dumps 下录制的UI dump，测量单次提取耗时并校验提取结果
+
+用法: python benchmarks/bench_value_extractor.py [--rounds 2000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from unimind.tool.ui_dump import parse_ui_elements
+from unimind.tool.value_extractor import (
+    ValueExtractor,
+    BALANCE_PROFILE,
+    DATA_USAGE_PROFILE,
+)
+
+DUMP_DIR = os.path.join(ROOT, "data", "ui_dumps")
+
+# (dump文件, 提取配置, 期望结果)
+CASES = [
+    ("unicom_balance.xml", BALANCE_PROFILE, "66.60元"),
+    ("unicom_data_usage.xml", DATA_USAGE_PROFILE, "12.35GB"),
+]
+
+
+def load_elements(filename):
+    """加载并解析录制的UI dump"""
+    with open(os.path.join(DUMP_DIR, filename), "r", encoding="utf-8") as f:
+        return parse_ui_elements(f.read())
+
+
+def bench(extractor, elements, rounds):
+    """返回单次提取的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        extractor.extract(elements)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    failed = False
+    for filename, profile, expected in CASES:
+        elements = load_elements(filename)
+        extractor = ValueExtractor(profile)
+        result = extractor.extract(elements)
+        amount = result["amount"] if result else None
+        status = "OK" if amount == expected else "MISMATCH"
+        failed |= amount != expected
+
+        # 长列表：模拟滚动后累积的多屏元素
+        long_elements = elements * 20
+
+        print(f"{filename} [{profile.name}] -> {amount} (expected {expected}) {status}")
+        print(f"  {len(elements):>5} elements: {bench(extractor, elements, args.rounds):8.1f} us/call")
+        print(f"  {len(long_elements):>5} elements: {bench(extractor, long_elements, args.rounds // 10):8.1f} us/call")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
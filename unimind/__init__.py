@@ -1,5 +1,18 @@
 from .main import entry as develop
-from .universal_ai_assistant import universal_ai_assistant, run_universal_assistant, UniversalAIAssistant
+from .universal_ai_assistant import (
+    universal_ai_assistant,
+    run_universal_assistant,
+    UniversalAIAssistant,
+    AssistantPool,
+    get_assistant_pool,
+)
 
 __version__ = "v0.1.0"
-__all__ = ["develop", "universal_ai_assistant", "run_universal_assistant", "UniversalAIAssistant"]
+__all__ = [
+    "develop",
+    "universal_ai_assistant",
+    "run_universal_assistant",
+    "UniversalAIAssistant",
+    "AssistantPool",
+    "get_assistant_pool",
+]
@@ -1,3 +1,5 @@
 from .context import Context
+from .ledger import UsageLedger
+from .message_bus import MessageBus, MessageBusFull
 
-__all__ = ["Context"]
+__all__ = ["Context", "UsageLedger", "MessageBus", "MessageBusFull"]
@@ -2,11 +2,61 @@
 Context module for managing state and data flow throughout the pipeline execution.
 """
 
+import json
+import time
+import uuid
 from .cost import Cost
 from datetime import datetime
+from .ledger import UsageLedger
 from .token_usage import TokenUsage
 from .message_queue import MessageQueue
-from typing import Any, Dict, List, Optional
+from .message_bus import PRIORITY_NORMAL
+from typing import IO, Any, Dict, Iterator, List, Optional
+from .storage import (
+    DEFAULT_DOCUMENTS_CAPACITY,
+    DEFAULT_HISTORY_CAPACITY,
+    DEFAULT_TOOLS_CAPACITY,
+    BoundedDocuments,
+    BoundedLog,
+)
+
+# Offset from the monotonic clock to wall-clock time, for history timestamps
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+
+def convert_data(data: Any) -> Any:
+    """Convert the unserializable data to a string recursively."""
+    if isinstance(data, dict):
+        return {k: convert_data(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [convert_data(item) for item in data]
+    elif isinstance(data, (int, float, str, bool)):
+        return data
+    else:
+        return str(data)
+
+
+class HistoryRecord:
+    """
+    A history entry holding references to its data and a monotonic timestamp.
+    Conversion to the serializable form is deferred to `to_dict`.
+    """
+
+    __slots__ = ("step", "data", "timestamp")
+
+    def __init__(self, step: str, data: Dict[str, Any], timestamp: float):
+        self.step = step
+        self.data = data
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step": self.step,
+            "time": datetime.fromtimestamp(self.timestamp + _WALL_CLOCK_OFFSET).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+            "data": convert_data(self.data),
+        }
 
 
 class Context:
@@ -16,29 +66,52 @@ class Context:
 
     root_dir: str
     raw_demand: str
-    document: Dict[str, str] = {}
-    history: List[Dict[str, Any]] = []
+    document: BoundedDocuments
+    history: BoundedLog
     started_at: str
     finished_at: str
     token_usage: TokenUsage
     cost: Cost
-    used_tools: List[Dict] = []
+    ledger: UsageLedger
+    used_tools: BoundedLog
     message_queue: MessageQueue
 
-    def __init__(self, raw_demand: str, root_dir: Optional[str] = None):
+    def __init__(
+        self,
+        raw_demand: str,
+        root_dir: Optional[str] = None,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        tools_capacity: int = DEFAULT_TOOLS_CAPACITY,
+        documents_capacity: int = DEFAULT_DOCUMENTS_CAPACITY,
+    ):
         """
         Initialize the context with the root directory and raw demand.
 
+        History, used tools and documents are kept per context in bounded
+        buffers; older entries are spilled to a temporary JSONL file.
+
         Args:
             raw_demand: User demand for the software
             root_dir: Root directory path to save the software
+            history_capacity: History entries kept in memory
+            tools_capacity: Used tool records kept in memory
+            documents_capacity: Documents kept in memory
         """
         self.root_dir = root_dir
         self.raw_demand = raw_demand
+        self.document = BoundedDocuments("documents", documents_capacity)
+        self.history = BoundedLog("history", history_capacity, serialize=HistoryRecord.to_dict)
+        self.used_tools = BoundedLog("tools", tools_capacity)
         self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.token_usage = TokenUsage()
         self.cost = Cost()
+        # One row per completion call, for rollups and export across sessions
+        self.ledger = UsageLedger(session=uuid.uuid4().hex[:12])
         self.message_queue = MessageQueue()
+        # Incremental UI observations of the session, created on first use
+        self.observation_tracker = None
+        # Arbitrates device tools between concurrently running agents, if set
+        self.device_arbiter = None
 
     def is_root_dir_set(self) -> bool:
         """Check if the root directory is set in the context."""
@@ -75,30 +148,14 @@ class Context:
 
         Args:
             step: Step name
-            data: Data associated with the step
+            data: Data associated with the step; kept by reference and
+                serialized only when the history is dumped or spilled
 
         Returns:
             None
         """
 
-        # Convert the unserializable data to a string recursively
-        def convert_data(data):
-            if isinstance(data, dict):
-                return {k: convert_data(v) for k, v in data.items()}
-            elif isinstance(data, list):
-                return [convert_data(item) for item in data]
-            elif isinstance(data, (int, float, str, bool)):
-                return data
-            else:
-                return str(data)
-
-        self.history.append(
-            {
-                "step": step,
-                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "data": convert_data(data),
-            }
-        )
+        self.history.append(HistoryRecord(step, data, time.monotonic()))
 
     def add_used_tool(
         self, tool_name: str, params: Dict[str, Any], result: Dict[str, Any]
@@ -130,6 +187,7 @@ class Context:
         agent_name: str,
         round_number: int,
         model: str = None,
+        compacted_tokens: int = 0,
     ) -> None:
         """
         Update the token usage in the context with fine-grained tracking.
@@ -140,6 +198,7 @@ class Context:
             agent_name: Name of the agent making the call
             round_number: Round number within the agent's processing
             model: Optional model name used for the API call
+            compacted_tokens: Prompt tokens saved by memory compaction in this round
         """
         self.token_usage.update(
             prompt_tokens=prompt_tokens,
@@ -147,6 +206,49 @@ class Context:
             agent_name=agent_name,
             round_number=round_number,
             model=model,
+            compacted_tokens=compacted_tokens,
+        )
+        self.ledger.record(
+            agent_name,
+            round_number,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            model=model,
+            compacted_tokens=compacted_tokens,
+        )
+
+    def record_cache_hit(
+        self,
+        agent_name: str,
+        round_number: int,
+        saved_tokens: int = 0,
+        model: str = None,
+        compacted_tokens: int = 0,
+    ) -> None:
+        """
+        Record a response served from the response cache (zero tokens, zero cost).
+
+        Args:
+            agent_name: Name of the agent making the call
+            round_number: Round number within the agent's processing
+            saved_tokens: Tokens the original API call consumed
+            model: Optional model name used for the API call
+            compacted_tokens: Prompt tokens saved by memory compaction in this round
+        """
+        self.token_usage.record_cache_hit(
+            agent_name=agent_name,
+            round_number=round_number,
+            saved_tokens=saved_tokens,
+            model=model,
+            compacted_tokens=compacted_tokens,
+        )
+        self.ledger.record(
+            agent_name,
+            round_number,
+            model=model,
+            cached=True,
+            saved_tokens=saved_tokens,
+            compacted_tokens=compacted_tokens,
         )
 
     def update_cost(
@@ -174,9 +276,16 @@ class Context:
             round_number=round_number,
             model=model,
         )
+        self.ledger.add_cost(agent_name, round_number, prompt_cost, completion_cost, model)
 
     def enqueue_message(
-        self, target_agent: str, message: Dict[str, Any], sender: Optional[str] = None
+        self,
+        target_agent: str,
+        message: Dict[str, Any],
+        sender: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
+        timeout: Optional[float] = 0.0,
     ) -> None:
         """
         Add a message to a specific agent's queue.
@@ -185,8 +294,16 @@ class Context:
             target_agent: Name of the agent to receive the message
             message: The message content to enqueue
             sender: Optional name of the sending agent
+            priority: Lower values are delivered first
+            ttl: Optional seconds until the message expires
+            timeout: Seconds to wait for room if the queue is full
+
+        Raises:
+            MessageBusFull: The queue stayed full for `timeout` seconds
         """
-        self.message_queue.enqueue(target_agent, message, sender)
+        self.message_queue.send(
+            target_agent, message, sender, priority=priority, ttl=ttl, timeout=timeout
+        )
 
     def get_messages(self, agent: str) -> List[Dict[str, Any]]:
         """
@@ -200,17 +317,35 @@ class Context:
         """
         return self.message_queue.get_messages(agent)
 
-    def dequeue_messages(self, agent: str) -> List[Dict[str, Any]]:
+    def dequeue_messages(
+        self, agent: str, timeout: Optional[float] = 0.0
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve and remove all messages for a specific agent.
 
         Args:
             agent: Name of the agent to dequeue messages for
+            timeout: Seconds to wait for a message if none is queued
 
         Returns:
             List of messages for the agent
         """
-        return self.message_queue.dequeue_all(agent)
+        return self.message_queue.receive(agent, timeout=timeout)
+
+    async def areceive_messages(
+        self, agent: str, timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Await messages for a specific agent.
+
+        Args:
+            agent: Name of the agent to receive messages for
+            timeout: Seconds to wait (None waits until a message arrives)
+
+        Returns:
+            List of messages for the agent (empty on timeout)
+        """
+        return await self.message_queue.areceive(agent, timeout=timeout)
 
     def has_messages(self, agent: str) -> bool:
         """
@@ -224,23 +359,79 @@ class Context:
         """
         return self.message_queue.has_messages(agent)
 
-    def dump(self) -> Dict[str, Any]:
-        """
-        Dump the context data into a dictionary.
+    def close(self) -> None:
+        """Release the in-memory buffers and delete the spill files."""
+        self.document.close()
+        self.history.close()
+        self.used_tools.close()
 
-        Returns:
-            Dictionary containing the context data
-        """
+    def _summary(self) -> Dict[str, Any]:
         self.finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
         return {
             "started_at": self.started_at,
             "finished_at": self.finished_at,
             "root_dir": self.root_dir,
             "raw_demand": self.raw_demand,
-            "document": self.document,
-            "history": self.history,
-            "used_tools": self.used_tools,
+        }
+
+    def _totals(self) -> Dict[str, Any]:
+        return {
             "token_usage": self.token_usage.to_dict(),
             "cost": self.cost.to_dict(),
+            "observations": (
+                self.observation_tracker.stats() if self.observation_tracker else None
+            ),
+        }
+
+    def iter_dump(self) -> Iterator[str]:
+        """
+        Serialize the context as JSON text, one chunk at a time.
+
+        Entries are read from memory and the spill files as they are written,
+        so the whole dump is never held in memory.
+
+        Yields:
+            Consecutive pieces of the JSON document
+        """
+
+        def encode(value: Any) -> str:
+            return json.dumps(value, ensure_ascii=False, default=str)
+
+        yield "{"
+        for key, value in self._summary().items():
+            yield f"{encode(key)}: {encode(value)}, "
+        yield '"document": {'
+        for index, (key, value) in enumerate(self.document.items()):
+            yield f"{', ' if index else ''}{encode(key)}: {encode(value)}"
+        yield "}"
+        for name, log in (("history", self.history), ("used_tools", self.used_tools)):
+            yield f', "{name}": ['
+            for index, entry in enumerate(log):
+                yield f"{', ' if index else ''}{encode(entry)}"
+            yield "]"
+        for key, value in self._totals().items():
+            yield f", {encode(key)}: {encode(value)}"
+        yield "}"
+
+    def dump(self, fp: Optional[IO[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Dump the context data.
+
+        Args:
+            fp: Optional text file to stream the context to as JSON
+
+        Returns:
+            Dictionary containing the context data, or None when written to `fp`
+        """
+        if fp is not None:
+            for chunk in self.iter_dump():
+                fp.write(chunk)
+            return None
+
+        return {
+            **self._summary(),
+            "document": dict(self.document.items()),
+            "history": list(self.history),
+            "used_tools": list(self.used_tools),
+            **self._totals(),
         }
@@ -0,0 +1,413 @@
+"""
+Columnar ledger of token usage and cost.
+
+`TokenUsage` and `Cost` keep one Python object per call, which is fine for a
+single request but not for analytics over millions of calls. The UsageLedger
+stores one row per call in growable NumPy columns. Agent, model and session
+names are dictionary-encoded as integer ids. It provides:
+
+- group-by rollups per agent, model, session or round with `np.bincount`;
+- CSV and JSONL export in chunks, and Parquet export when pyarrow is installed;
+- merging of ledgers from many sessions (`UsageLedger.merge`).
+"""
+
+import csv
+import json
+import time
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import pandas as pd
+
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+# Column name -> dtype
+COLUMNS = {
+    "session": np.int32,
+    "agent": np.int32,
+    "model": np.int32,
+    "round": np.int32,
+    "timestamp": np.float64,
+    "prompt_tokens": np.int64,
+    "completion_tokens": np.int64,
+    "cached": np.bool_,
+    "saved_tokens": np.int64,
+    "compacted_tokens": np.int64,
+    "prompt_cost": np.float64,
+    "completion_cost": np.float64,
+}
+# Dictionary-encoded columns
+KEY_COLUMNS = ("session", "agent", "model")
+# Columns summed by `rollup`
+METRICS = (
+    "prompt_tokens",
+    "completion_tokens",
+    "saved_tokens",
+    "compacted_tokens",
+    "prompt_cost",
+    "completion_cost",
+)
+EXPORT_CHUNK_ROWS = 65536
+INITIAL_CAPACITY = 64
+
+
+def _categorical(names: List[Optional[str]], codes: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """Drop None from a dictionary; rows with a None name get code -1."""
+    categories = [name for name in names if name is not None]
+    mapping = np.full(len(names), -1, np.int32)
+    position = 0
+    for index, name in enumerate(names):
+        if name is not None:
+            mapping[index] = position
+            position += 1
+    return categories, mapping[codes] if len(names) else codes
+
+
+class UsageLedger:
+    """
+    Append-only, array-backed ledger with one row per completion call.
+    """
+
+    def __init__(self, session: str = "default", capacity: int = INITIAL_CAPACITY):
+        """
+        Initialize an empty ledger.
+
+        Args:
+            session: Session name recorded on rows that do not specify one
+            capacity: Initial number of rows allocated
+        """
+        self.session = session
+        self._size = 0
+        self._columns = {name: np.zeros(max(1, capacity), dtype) for name, dtype in COLUMNS.items()}
+        # Dictionaries of the key columns: name list and name -> id
+        self._names: Dict[str, List[Optional[str]]] = {key: [] for key in KEY_COLUMNS}
+        self._ids: Dict[str, Dict[Optional[str], int]] = {key: {} for key in KEY_COLUMNS}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _encode(self, key: str, name: Optional[str]) -> int:
+        ids = self._ids[key]
+        code = ids.get(name)
+        if code is None:
+            code = ids[name] = len(self._names[key])
+            self._names[key].append(name)
+        return code
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._columns["round"])
+        if self._size + rows <= capacity:
+            return
+        capacity = max(capacity * 2, self._size + rows)
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    def record(
+        self,
+        agent: str,
+        round_number: int,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        model: Optional[str] = None,
+        prompt_cost: float = 0.0,
+        completion_cost: float = 0.0,
+        cached: bool = False,
+        saved_tokens: int = 0,
+        compacted_tokens: int = 0,
+        session: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        """
+        Append one row.
+
+        Returns:
+            int: Index of the row
+        """
+        with self._lock:
+            self._reserve(1)
+            row = self._size
+            columns = self._columns
+            columns["session"][row] = self._encode("session", session or self.session)
+            columns["agent"][row] = self._encode("agent", agent)
+            columns["model"][row] = self._encode("model", model)
+            columns["round"][row] = round_number
+            columns["timestamp"][row] = time.time() if timestamp is None else timestamp
+            columns["prompt_tokens"][row] = prompt_tokens
+            columns["completion_tokens"][row] = completion_tokens
+            columns["cached"][row] = cached
+            columns["saved_tokens"][row] = saved_tokens
+            columns["compacted_tokens"][row] = compacted_tokens
+            columns["prompt_cost"][row] = prompt_cost
+            columns["completion_cost"][row] = completion_cost
+            self._size += 1
+            return row
+
+    def add_cost(
+        self,
+        agent: str,
+        round_number: int,
+        prompt_cost: float,
+        completion_cost: float,
+        model: Optional[str] = None,
+    ) -> int:
+        """
+        Attach the cost of a call to its token row (the latest row of the same
+        agent, round and model), or append a cost-only row if there is none.
+
+        Returns:
+            int: Index of the row
+        """
+        with self._lock:
+            agent_id = self._ids["agent"].get(agent)
+            model_id = self._ids["model"].get(model)
+            row = self._size - 1
+            columns = self._columns
+            if (
+                row >= 0
+                and agent_id is not None
+                and model_id is not None
+                and columns["agent"][row] == agent_id
+                and columns["model"][row] == model_id
+                and columns["round"][row] == round_number
+                and columns["prompt_cost"][row] == 0
+                and columns["completion_cost"][row] == 0
+            ):
+                columns["prompt_cost"][row] = prompt_cost
+                columns["completion_cost"][row] = completion_cost
+                return row
+        return self.record(
+            agent, round_number, model=model, prompt_cost=prompt_cost, completion_cost=completion_cost
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return a column as a NumPy array (a copy; key columns hold integer ids).
+
+        `total_tokens` and `total_cost` are derived columns.
+        """
+        with self._lock:
+            if name == "total_tokens":
+                return (
+                    self._columns["prompt_tokens"][: self._size]
+                    + self._columns["completion_tokens"][: self._size]
+                )
+            if name == "total_cost":
+                return (
+                    self._columns["prompt_cost"][: self._size]
+                    + self._columns["completion_cost"][: self._size]
+                )
+            return self._columns[name][: self._size].copy()
+
+    def names(self, key: str) -> List[Optional[str]]:
+        """Dictionary of a key column: the name of each id."""
+        with self._lock:
+            return list(self._names[key])
+
+    def decoded(self, key: str) -> np.ndarray:
+        """A key column decoded to its names (object array)."""
+        with self._lock:
+            return np.array(self._names[key], dtype=object)[self._columns[key][: self._size]]
+
+    def _snapshot(self) -> Tuple[int, Dict[str, np.ndarray], Dict[str, List[Optional[str]]]]:
+        with self._lock:
+            size = self._size
+            columns = {name: column[:size].copy() for name, column in self._columns.items()}
+            names = {key: list(values) for key, values in self._names.items()}
+        return size, columns, names
+
+    def totals(self) -> Dict[str, Any]:
+        """Sums of the metric columns over all rows."""
+        size, columns, _ = self._snapshot()
+        totals = {"calls": size, "cache_hits": int(columns["cached"].sum())}
+        for metric in METRICS:
+            value = columns[metric].sum()
+            totals[metric] = float(value) if columns[metric].dtype.kind == "f" else int(value)
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        totals["total_cost"] = totals["prompt_cost"] + totals["completion_cost"]
+        return totals
+
+    def rollup(self, by: Union[str, Sequence[str]] = "agent") -> Dict[Any, Dict[str, Any]]:
+        """
+        Sum the metrics per group.
+
+        Args:
+            by: "agent", "model", "session", "round", or a sequence of them
+
+        Returns:
+            Dict mapping the group key (a name, or a tuple for several columns)
+            to its calls, cache hits and metric sums
+        """
+        keys = (by,) if isinstance(by, str) else tuple(by)
+        for key in keys:
+            if key not in KEY_COLUMNS and key != "round":
+                raise ValueError(f"Cannot group by {key}")
+        size, columns, names = self._snapshot()
+        if size == 0:
+            return {}
+
+        # Combine the key columns into one integer group code per row
+        combined = np.zeros(size, np.int64)
+        bases = []
+        for key in keys:
+            values = columns[key].astype(np.int64)
+            low = int(values.min())
+            span = int(values.max()) - low + 1
+            combined = combined * span + (values - low)
+            bases.append((low, span))
+        codes, inverse = np.unique(combined, return_inverse=True)
+        count = len(codes)
+        groups = np.zeros((count, len(keys)), np.int64)
+        remainder = codes.copy()
+        for position in range(len(keys) - 1, -1, -1):
+            low, span = bases[position]
+            groups[:, position] = remainder % span + low
+            remainder //= span
+
+        sums = {
+            metric: np.bincount(inverse, weights=columns[metric], minlength=count)
+            for metric in METRICS
+        }
+        calls = np.bincount(inverse, minlength=count)
+        hits = np.bincount(inverse, weights=columns["cached"], minlength=count)
+
+        result = {}
+        for index, group in enumerate(groups):
+            label = tuple(
+                int(value) if key == "round" else names[key][value]
+                for key, value in zip(keys, group)
+            )
+            row = {"calls": int(calls[index]), "cache_hits": int(hits[index])}
+            for metric in METRICS:
+                value = sums[metric][index]
+                row[metric] = float(value) if "cost" in metric else int(round(value))
+            row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+            row["total_cost"] = row["prompt_cost"] + row["completion_cost"]
+            result[label[0] if len(keys) == 1 else label] = row
+        return result
+
+    def extend(self, other: "UsageLedger") -> None:
+        """Append all rows of another ledger, re-encoding its names."""
+        size, columns, names = other._snapshot()
+        if size == 0:
+            return
+        with self._lock:
+            remapped = {
+                key: np.array([self._encode(key, name) for name in names[key]], np.int32)[columns[key]]
+                for key in KEY_COLUMNS
+            }
+            self._reserve(size)
+            start, end = self._size, self._size + size
+            for name, column in self._columns.items():
+                column[start:end] = remapped[name] if name in remapped else columns[name]
+            self._size = end
+
+    @classmethod
+    def merge(cls, ledgers: Iterable["UsageLedger"]) -> "UsageLedger":
+        """Combine the ledgers of many sessions into a new ledger."""
+        merged = cls(session="merged")
+        for ledger in ledgers:
+            merged.extend(ledger)
+        return merged
+
+    def iter_rows(self, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+        """Yield the rows as dicts with decoded names, converting one chunk at a time."""
+        size, columns, names = self._snapshot()
+        lookup = {key: np.array(names[key], dtype=object) for key in KEY_COLUMNS}
+        fields = list(COLUMNS)
+        for start in range(0, size, chunk_rows):
+            stop = min(start + chunk_rows, size)
+            values = [
+                lookup[name][columns[name][start:stop]].tolist()
+                if name in lookup
+                else columns[name][start:stop].tolist()
+                for name in fields
+            ]
+            for row in zip(*values):
+                yield dict(zip(fields, row))
+
+    def to_csv(self, path: str) -> int:
+        """
+        Write the ledger as CSV.
+
+        Returns:
+            int: Number of rows written
+        """
+        written = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            for row in self.iter_rows():
+                writer.writerow(row)
+                written += 1
+        return written
+
+    def to_jsonl(self, path: str) -> int:
+        """
+        Write the ledger as JSON lines.
+
+        Returns:
+            int: Number of rows written
+        """
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for row in self.iter_rows():
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+        return written
+
+    def to_arrow(self) -> "pa.Table":
+        """Convert to a pyarrow Table with dictionary-encoded key columns."""
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required for Arrow/Parquet export: pip install pyarrow")
+        _, columns, names = self._snapshot()
+        arrays = {}
+        for name, column in columns.items():
+            if name in KEY_COLUMNS:
+                categories, codes = _categorical(names[name], column)
+                arrays[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(codes, pa.int32(), mask=codes < 0), pa.array(categories, pa.string())
+                )
+            else:
+                arrays[name] = pa.array(column)
+        return pa.table(arrays)
+
+    def to_parquet(self, path: str) -> int:
+        """
+        Write the ledger as Parquet (requires pyarrow).
+
+        Returns:
+            int: Number of rows written
+        """
+        table = self.to_arrow()
+        pq.write_table(table, path)
+        return table.num_rows
+
+    def to_pandas(self) -> "pd.DataFrame":
+        """Convert to a pandas DataFrame with categorical key columns (requires pandas)."""
+        if not HAS_PANDAS:
+            raise ImportError("pandas is required for DataFrame export: pip install pandas")
+        _, columns, names = self._snapshot()
+        data = {}
+        for name, column in columns.items():
+            if name in KEY_COLUMNS:
+                categories, codes = _categorical(names[name], column)
+                data[name] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                data[name] = column
+        return pd.DataFrame(data)
@@ -0,0 +1,348 @@
+"""
+Thread-safe priority message bus for agent communication.
+
+Each agent has a mailbox of per-priority deques. Messages may carry a TTL
+after which they are dropped unread, and each mailbox holds at most
+`capacity` messages: senders wait for room (backpressure) or get a
+MessageBusFull error. Receivers can poll, block on a thread, or `await` new
+messages from an event loop; sends from any thread wake both kinds of waiter.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+DEFAULT_CAPACITY = int(os.getenv("AM_BUS_CAPACITY", 256))
+
+
+class MessageBusFull(Exception):
+    """Raised when a mailbox stays full for the whole send timeout."""
+
+    def __init__(self, agent: str, capacity: int):
+        self.agent = agent
+        self.capacity = capacity
+        super().__init__(f"Mailbox of {agent} is full ({capacity} messages)")
+
+
+@dataclass
+class Envelope:
+    """A queued message with its delivery metadata."""
+
+    message: Dict[str, Any]
+    priority: int
+    enqueued: float
+    expires: Optional[float] = None
+
+    def expired(self, now: float) -> bool:
+        return self.expires is not None and now >= self.expires
+
+
+@dataclass
+class _Mailbox:
+    # Priority -> messages in arrival order
+    queues: Dict[int, Deque[Envelope]] = field(default_factory=dict)
+    size: int = 0
+    max_size: int = 0
+    # Event loop waiters of `areceive`
+    waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(default_factory=list)
+
+    def push(self, envelope: Envelope) -> None:
+        self.queues.setdefault(envelope.priority, deque()).append(envelope)
+        self.size += 1
+        self.max_size = max(self.max_size, self.size)
+
+    def pop_all(self, limit: Optional[int]) -> List[Envelope]:
+        """Remove up to `limit` messages, most urgent priority first."""
+        taken = []
+        for priority in sorted(self.queues):
+            queue = self.queues[priority]
+            while queue and (limit is None or len(taken) < limit):
+                taken.append(queue.popleft())
+            if not queue:
+                del self.queues[priority]
+            if limit is not None and len(taken) >= limit:
+                break
+        self.size -= len(taken)
+        return taken
+
+    def purge(self, now: float) -> int:
+        """Drop expired messages; returns how many were dropped."""
+        dropped = 0
+        for priority in list(self.queues):
+            queue = self.queues[priority]
+            kept = deque(envelope for envelope in queue if not envelope.expired(now))
+            dropped += len(queue) - len(kept)
+            if kept:
+                self.queues[priority] = kept
+            else:
+                del self.queues[priority]
+        self.size -= dropped
+        return dropped
+
+    def messages(self) -> List[Envelope]:
+        return [envelope for priority in sorted(self.queues) for envelope in self.queues[priority]]
+
+
+class MessageBus:
+    """
+    Per-agent priority mailboxes with TTLs, bounded capacity and blocking or
+    awaitable receive.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, default_ttl: Optional[float] = None):
+        """
+        Initialize the bus.
+
+        Args:
+            capacity: Maximum queued messages per agent (0 for unbounded)
+            default_ttl: Seconds a message stays deliverable unless the sender sets a TTL
+        """
+        self.capacity = capacity
+        self.default_ttl = default_ttl
+        self._mailboxes: Dict[str, _Mailbox] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._listeners: List[Callable[[str], None]] = []
+        self.sent = 0
+        self.delivered = 0
+        self.expired = 0
+        self.rejected = 0
+        self.blocked_sends = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def _mailbox(self, agent: str) -> _Mailbox:
+        mailbox = self._mailboxes.get(agent)
+        if mailbox is None:
+            mailbox = self._mailboxes[agent] = _Mailbox()
+        return mailbox
+
+    def _full(self, mailbox: _Mailbox) -> bool:
+        return self.capacity > 0 and mailbox.size >= self.capacity
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """Call `listener(target_agent)` after every send (outside the bus lock)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str], None]) -> None:
+        """Remove a listener added with `subscribe`."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def send(
+        self,
+        target_agent: str,
+        message: Dict[str, Any],
+        sender: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
+        timeout: Optional[float] = 0.0,
+    ) -> None:
+        """
+        Queue a message for an agent.
+
+        Args:
+            target_agent: Name of the agent to receive the message
+            message: The message content
+            sender: Optional name of the sending agent
+            priority: Lower values are delivered first
+            ttl: Seconds until the message expires, defaults to `default_ttl`
+            timeout: Seconds to wait for room in a full mailbox (None waits forever)
+
+        Raises:
+            MessageBusFull: The mailbox stayed full for `timeout` seconds
+        """
+        if sender:
+            message = {**message, "sender": sender}
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._changed:
+            mailbox = self._mailbox(target_agent)
+            now = time.monotonic()
+            if self._full(mailbox):
+                self.expired += mailbox.purge(now)
+            if self._full(mailbox):
+                self.blocked_sends += 1
+                deadline = None if timeout is None else now + timeout
+                while self._full(mailbox):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.rejected += 1
+                        raise MessageBusFull(target_agent, self.capacity)
+                    self._changed.wait(remaining)
+                    self.expired += mailbox.purge(time.monotonic())
+                now = time.monotonic()
+            mailbox.push(
+                Envelope(
+                    message=message,
+                    priority=priority,
+                    enqueued=now,
+                    expires=None if ttl is None else now + ttl,
+                )
+            )
+            self.sent += 1
+            waiters, mailbox.waiters = mailbox.waiters, []
+            listeners = list(self._listeners)
+            self._changed.notify_all()
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+        for listener in listeners:
+            listener(target_agent)
+
+    async def asend(
+        self,
+        target_agent: str,
+        message: Dict[str, Any],
+        sender: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Async `send`: waits for room in a full mailbox without blocking the event loop."""
+        await asyncio.to_thread(self.send, target_agent, message, sender, priority, ttl, timeout)
+
+    def _take(self, agent: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+        """Pop deliverable messages (lock held)."""
+        mailbox = self._mailboxes.get(agent)
+        if mailbox is None or mailbox.size == 0:
+            return []
+        now = time.monotonic()
+        self.expired += mailbox.purge(now)
+        envelopes = mailbox.pop_all(limit)
+        for envelope in envelopes:
+            latency = now - envelope.enqueued
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        self.delivered += len(envelopes)
+        if envelopes:
+            # Wake senders waiting for room
+            self._changed.notify_all()
+        return [envelope.message for envelope in envelopes]
+
+    def receive(
+        self, agent: str, max_messages: Optional[int] = None, timeout: Optional[float] = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Remove and return the messages of an agent, most urgent first.
+
+        Args:
+            agent: Name of the receiving agent
+            max_messages: Maximum number of messages to return (all by default)
+            timeout: Seconds to wait for a message if none is queued (None waits forever)
+
+        Returns:
+            List of messages (empty if none arrived in time)
+        """
+        with self._changed:
+            messages = self._take(agent, max_messages)
+            if messages or timeout == 0:
+                return messages
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not messages:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+                messages = self._take(agent, max_messages)
+            return messages
+
+    async def areceive(
+        self, agent: str, max_messages: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Await messages for an agent.
+
+        Args:
+            agent: Name of the receiving agent
+            max_messages: Maximum number of messages to return (all by default)
+            timeout: Seconds to wait (None waits until a message arrives)
+
+        Returns:
+            List of messages (empty on timeout)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                messages = self._take(agent, max_messages)
+                if messages:
+                    return messages
+                future = loop.create_future()
+                self._mailbox(agent).waiters.append((loop, future))
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                self._forget(agent, future)
+                return []
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                self._forget(agent, future)
+                with self._lock:
+                    return self._take(agent, max_messages)
+            except asyncio.CancelledError:
+                self._forget(agent, future)
+                raise
+
+    def _forget(self, agent: str, future: asyncio.Future) -> None:
+        with self._lock:
+            mailbox = self._mailboxes.get(agent)
+            if mailbox is not None:
+                mailbox.waiters = [waiter for waiter in mailbox.waiters if waiter[1] is not future]
+
+    def peek(self, agent: str) -> List[Dict[str, Any]]:
+        """Return copies of the deliverable messages of an agent without removing them."""
+        with self._lock:
+            mailbox = self._mailboxes.get(agent)
+            if mailbox is None:
+                return []
+            self.expired += mailbox.purge(time.monotonic())
+            return [dict(envelope.message) for envelope in mailbox.messages()]
+
+    def has_messages(self, agent: str) -> bool:
+        """Check if an agent has deliverable messages."""
+        with self._lock:
+            mailbox = self._mailboxes.get(agent)
+            if mailbox is None or mailbox.size == 0:
+                return False
+            self.expired += mailbox.purge(time.monotonic())
+            return mailbox.size > 0
+
+    def pending(self) -> Dict[str, int]:
+        """Number of queued messages per agent (agents with messages only)."""
+        with self._lock:
+            return {agent: box.size for agent, box in self._mailboxes.items() if box.size}
+
+    def clear(self, agent: Optional[str] = None) -> None:
+        """Drop the messages of one agent, or of all agents."""
+        with self._changed:
+            for name, mailbox in self._mailboxes.items():
+                if agent is None or name == agent:
+                    mailbox.queues.clear()
+                    mailbox.size = 0
+            self._changed.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and latency metrics of the bus."""
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "sent": self.sent,
+                "delivered": self.delivered,
+                "expired": self.expired,
+                "rejected": self.rejected,
+                "blocked_sends": self.blocked_sends,
+                "queued": {agent: box.size for agent, box in self._mailboxes.items() if box.size},
+                "max_queued": {agent: box.max_size for agent, box in self._mailboxes.items()},
+                "avg_latency": round(self.total_latency / self.delivered, 6) if self.delivered else 0.0,
+                "max_latency": round(self.max_latency, 6),
+            }
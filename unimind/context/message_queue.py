@@ -4,22 +4,30 @@ Message queue module for agent communication.
 
 from typing import Dict, List, Optional, Any
 
+from .message_bus import DEFAULT_CAPACITY, PRIORITY_NORMAL, MessageBus
 
-class MessageQueue:
+
+class MessageQueue(MessageBus):
     """
     A message queue for inter-agent communication.
 
     Allows agents to send messages to each other asynchronously using
     'inform_' tools, and retrieve queued messages when ready to process them.
+    It is a MessageBus (thread-safe, prioritized, bounded) with the original
+    queue method names.
     """
 
-    def __init__(self):
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, default_ttl: Optional[float] = None):
         """Initialize an empty message queue."""
-        # Dictionary mapping agent names to list of messages
-        self.queues: Dict[str, List[Dict[str, Any]]] = {}
+        super().__init__(capacity=capacity, default_ttl=default_ttl)
 
     def enqueue(
-        self, target_agent: str, message: Dict[str, Any], sender: Optional[str] = None
+        self,
+        target_agent: str,
+        message: Dict[str, Any],
+        sender: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
     ) -> None:
         """
         Add a message to a specific agent's queue.
@@ -28,17 +36,13 @@ class MessageQueue:
             target_agent: Name of the agent to receive the message
             message: The message content to enqueue
             sender: Optional name of the sending agent
-        """
-        if target_agent not in self.queues:
-            self.queues[target_agent] = []
+            priority: Lower values are delivered first
+            ttl: Optional seconds until the message expires
 
-        # Add sender to message if provided
-        if sender:
-            message_with_sender = message.copy()
-            message_with_sender["sender"] = sender
-            self.queues[target_agent].append(message_with_sender)
-        else:
-            self.queues[target_agent].append(message)
+        Raises:
+            MessageBusFull: The agent's queue is full
+        """
+        self.send(target_agent, message, sender, priority=priority, ttl=ttl)
 
     def get_messages(self, agent: str) -> List[Dict[str, Any]]:
         """
@@ -50,7 +54,7 @@ class MessageQueue:
         Returns:
             List of messages for the agent
         """
-        return self.queues.get(agent, [])
+        return self.peek(agent)
 
     def dequeue_all(self, agent: str) -> List[Dict[str, Any]]:
         """
@@ -62,31 +66,4 @@ class MessageQueue:
         Returns:
             List of messages for the agent
         """
-        messages = self.queues.get(agent, [])
-        if agent in self.queues:
-            self.queues[agent] = []
-        return messages
-
-    def has_messages(self, agent: str) -> bool:
-        """
-        Check if a specific agent has any messages in the queue.
-
-        Args:
-            agent: Name of the agent to check
-
-        Returns:
-            True if agent has messages, False otherwise
-        """
-        return agent in self.queues and len(self.queues[agent]) > 0
-
-    def clear(self, agent: Optional[str] = None) -> None:
-        """
-        Clear messages for a specific agent or all agents.
-
-        Args:
-            agent: Name of the agent to clear messages for, or None to clear all
-        """
-        if agent:
-            self.queues[agent] = []
-        else:
-            self.queues = {}
+        return self.receive(agent)
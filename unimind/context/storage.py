@@ -0,0 +1,246 @@
+"""
+Bounded in-memory storage for Context data with spill to disk.
+
+A Context lives as long as its request, but the assistant and the web apps
+run for days. History entries and tool results (including full UI dumps) are
+therefore kept in fixed-size ring buffers; entries pushed out of a buffer are
+appended to a JSONL spill file and read back lazily when the Context is
+iterated or dumped. The spill file is removed when its owner is closed or
+garbage collected.
+
+Capacities come from ``AM_CONTEXT_HISTORY``, ``AM_CONTEXT_TOOLS`` and
+``AM_CONTEXT_DOCUMENTS``; spill files go to ``AM_CONTEXT_SPILL_DIR`` (the
+system temporary directory by default).
+"""
+
+import os
+import json
+import uuid
+import weakref
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_HISTORY_CAPACITY = int(os.getenv("AM_CONTEXT_HISTORY", 200))
+DEFAULT_TOOLS_CAPACITY = int(os.getenv("AM_CONTEXT_TOOLS", 100))
+DEFAULT_DOCUMENTS_CAPACITY = int(os.getenv("AM_CONTEXT_DOCUMENTS", 50))
+
+
+def spill_dir() -> str:
+    """Directory of the spill files."""
+    return os.getenv("AM_CONTEXT_SPILL_DIR") or os.path.join(
+        tempfile.gettempdir(), "unimind-context"
+    )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillFile:
+    """
+    Append-only JSONL file, created on the first write.
+    """
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.path = os.path.join(
+            directory or spill_dir(), f"{name}-{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl"
+        )
+        self.count = 0
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+
+    def append(self, entry: Any) -> int:
+        """
+        Append one entry.
+
+        Returns:
+            int: Line number of the entry
+        """
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            if self.count == 0:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.count += 1
+            return self.count - 1
+
+    def __iter__(self) -> Iterator[Any]:
+        """Read the entries back one at a time."""
+        with self._lock:
+            count = self.count
+        if count == 0:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                if index >= count:
+                    break
+                yield json.loads(line)
+
+    def close(self) -> None:
+        """Delete the file."""
+        with self._lock:
+            self.count = 0
+            self._finalizer()
+            self._finalizer = weakref.finalize(self, _remove, self.path)
+
+
+class BoundedLog:
+    """
+    Append-only log keeping the newest `capacity` entries in memory and
+    spilling older ones to disk. Iteration is lazy and in insertion order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        serialize: Optional[Callable[[Any], Any]] = None,
+        directory: Optional[str] = None,
+    ):
+        """
+        Initialize the log.
+
+        Args:
+            name: Prefix of the spill file
+            capacity: Entries kept in memory (at least 1)
+            serialize: Converts an entry to JSON-compatible data before it is spilled
+            directory: Directory of the spill file, defaults to `spill_dir()`
+        """
+        self.capacity = max(1, capacity)
+        self.serialize = serialize
+        self._recent: deque = deque()
+        self._spill = SpillFile(name, directory)
+        self._lock = threading.Lock()
+
+    def append(self, entry: Any) -> None:
+        with self._lock:
+            self._recent.append(entry)
+            if len(self._recent) > self.capacity:
+                oldest = self._recent.popleft()
+                self._spill.append(self.serialize(oldest) if self.serialize else oldest)
+
+    @property
+    def spilled(self) -> int:
+        """Number of entries on disk."""
+        return self._spill.count
+
+    def __len__(self) -> int:
+        return self._spill.count + len(self._recent)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def recent(self, count: Optional[int] = None) -> list:
+        """The newest in-memory entries as stored (all of them by default)."""
+        with self._lock:
+            entries = list(self._recent)
+        return entries if count is None else entries[-count:] if count > 0 else []
+
+    def __getitem__(self, index: int) -> Any:
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("log index out of range")
+        spilled = self._spill.count
+        if index >= spilled:
+            entry = self._recent[index - spilled]
+            return self.serialize(entry) if self.serialize else entry
+        for position, entry in enumerate(self._spill):
+            if position == index:
+                return entry
+        raise IndexError("log index out of range")
+
+    def __iter__(self) -> Iterator[Any]:
+        """Spilled entries followed by the in-memory ones, all in serialized form."""
+        with self._lock:
+            recent = list(self._recent)
+        yield from self._spill
+        if self.serialize:
+            recent = map(self.serialize, recent)
+        yield from recent
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._spill.close()
+
+    close = clear
+
+
+class BoundedDocuments:
+    """
+    Key-value store keeping the most recently written `capacity` documents in
+    memory. Evicted documents are spilled to disk and still readable.
+    """
+
+    def __init__(self, name: str, capacity: int, directory: Optional[str] = None):
+        self.capacity = max(1, capacity)
+        self._recent: "OrderedDict[str, Any]" = OrderedDict()
+        # Key -> line of its latest spilled version
+        self._spilled: Dict[str, int] = {}
+        self._spill = SpillFile(name, directory)
+        self._lock = threading.Lock()
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._recent.pop(key, None)
+            self._spilled.pop(key, None)
+            self._recent[key] = value
+            if len(self._recent) > self.capacity:
+                old_key, old_value = self._recent.popitem(last=False)
+                self._spilled[old_key] = self._spill.append({"key": old_key, "value": old_value})
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._recent:
+                return self._recent[key]
+            line = self._spilled.get(key)
+        if line is None:
+            raise KeyError(key)
+        for index, entry in enumerate(self._spill):
+            if index == line:
+                return entry["value"]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._recent or key in self._spilled
+
+    def __len__(self) -> int:
+        return len(self._recent) + len(self._spilled)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Lazily yield the latest version of every document, spilled ones first."""
+        with self._lock:
+            recent = list(self._recent.items())
+            latest = {line for line in self._spilled.values()}
+        for index, entry in enumerate(self._spill):
+            if index in latest:
+                yield entry["key"], entry["value"]
+        yield from recent
+
+    def keys(self) -> Iterator[str]:
+        return (key for key, _ in self.items())
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._spilled.clear()
+            self._spill.close()
+
+    close = clear
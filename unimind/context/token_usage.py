@@ -46,6 +46,9 @@ class TokenDetail:
         prompt_tokens: int,
         completion_tokens: int,
         model: Optional[str] = None,
+        cached: bool = False,
+        saved_tokens: int = 0,
+        compacted_tokens: int = 0,
     ):
         """Initialize token detail record."""
         self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -55,6 +58,9 @@ class TokenDetail:
         self.prompt_tokens = prompt_tokens
         self.completion_tokens = completion_tokens
         self.total_tokens = prompt_tokens + completion_tokens
+        self.cached = cached
+        self.saved_tokens = saved_tokens
+        self.compacted_tokens = compacted_tokens
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation."""
@@ -66,6 +72,9 @@ class TokenDetail:
             "prompt_tokens": self.prompt_tokens,
             "completion_tokens": self.completion_tokens,
             "total_tokens": self.total_tokens,
+            "cached": self.cached,
+            "saved_tokens": self.saved_tokens,
+            "compacted_tokens": self.compacted_tokens,
         }
 
 
@@ -111,6 +120,9 @@ class TokenUsage:
         self.total = TokenCount()
         self.agent = AgentTokenUsage()
         self.detailed: List[TokenDetail] = []
+        self.cache_hits = 0
+        self.saved_tokens = 0
+        self.compacted_tokens = 0
 
     def update(
         self,
@@ -119,6 +131,7 @@ class TokenUsage:
         agent_name: str,
         round_number: int,
         model: Optional[str] = None,
+        compacted_tokens: int = 0,
     ) -> None:
         """
         Update all token usage statistics.
@@ -129,12 +142,14 @@ class TokenUsage:
             agent_name: Name of the agent making the call
             round_number: Round number within the agent's processing
             model: Optional model name used for the API call
+            compacted_tokens: Prompt tokens saved by memory compaction in this round
         """
         # Update total counts
         self.total.update(prompt_tokens, completion_tokens)
 
         # Update per-agent counts
         self.agent.update(agent_name, prompt_tokens, completion_tokens)
+        self.compacted_tokens += compacted_tokens
 
         # Add detailed record
         detail = TokenDetail(
@@ -143,13 +158,56 @@ class TokenUsage:
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             model=model,
+            compacted_tokens=compacted_tokens,
         )
         self.detailed.append(detail)
 
+    def record_cache_hit(
+        self,
+        agent_name: str,
+        round_number: int,
+        saved_tokens: int = 0,
+        model: Optional[str] = None,
+        compacted_tokens: int = 0,
+    ) -> None:
+        """
+        Record a response served from the response cache as a zero-cost call.
+
+        Args:
+            agent_name: Name of the agent making the call
+            round_number: Round number within the agent's processing
+            saved_tokens: Tokens the original API call consumed
+            model: Optional model name used for the API call
+            compacted_tokens: Prompt tokens saved by memory compaction in this round
+        """
+        self.cache_hits += 1
+        self.saved_tokens += saved_tokens
+        self.compacted_tokens += compacted_tokens
+        self.agent.update(agent_name, 0, 0)
+        self.detailed.append(
+            TokenDetail(
+                agent_name=agent_name,
+                round_number=round_number,
+                prompt_tokens=0,
+                completion_tokens=0,
+                model=model,
+                cached=True,
+                saved_tokens=saved_tokens,
+                compacted_tokens=compacted_tokens,
+            )
+        )
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation."""
         return {
             "total": self.total.to_dict(),
             "by_agent": self.agent.to_dict(),
+            "cache": {
+                "hits": self.cache_hits,
+                "saved_tokens": self.saved_tokens,
+            },
+            "memory": {
+                "compacted_tokens": self.compacted_tokens,
+            },
             "detailed": [detail.to_dict() for detail in self.detailed],
         }
@@ -1,6 +1,12 @@
-from .agent import Agent
+from .agent import Agent, DeltaRelay, DELTA_RESET
 from .runner import Runner
 from .config import GenerationParams
+from .client_registry import ClientRegistry, client_registry, get_pool_stats
+from .response_cache import ResponseCache, CacheMissError
+from .memory import MemoryManager
+from .model_router import ModelRouter, StagePolicy
+from .rate_limiter import RateLimiter, RateLimit, get_rate_limiter
+from .orchestrator import Orchestrator, AgentTask
 
 
 creative_generation = GenerationParams(
@@ -17,8 +23,23 @@ neutral_generation = GenerationParams(
 
 __all__ = [
     "Agent",
+    "DeltaRelay",
+    "DELTA_RESET",
     "Runner",
     "GenerationParams",
+    "ClientRegistry",
+    "client_registry",
+    "get_pool_stats",
+    "ResponseCache",
+    "CacheMissError",
+    "MemoryManager",
+    "ModelRouter",
+    "StagePolicy",
+    "RateLimiter",
+    "RateLimit",
+    "get_rate_limiter",
+    "Orchestrator",
+    "AgentTask",
     "creative_generation",
     "deterministic_generation",
     "neutral_generation",
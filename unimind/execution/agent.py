@@ -6,14 +6,104 @@ import os
 import json
 import openai
 import base64
+import asyncio
+import inspect
 from rich.align import Align
 from rich.panel import Panel
 from rich import print as rprint
 from .config import GenerationParams
-from unimind.context import Context
-from unimind.tool import execute_tool
-from typing import List, Optional, Dict, Union
-from unimind.utils import retry, calculate_cost, clean_json_string, get_model_info
+from .client_registry import get_openai_client, get_async_openai_client
+from .memory import MemoryManager
+from .rate_limiter import DEFAULT_COMPLETION_ESTIMATE, get_rate_limiter, session_of
+from .response_cache import (
+    ResponseCache,
+    completion_to_dict,
+    fingerprint,
+    resolve_cache,
+)
+from openai.types.chat.chat_completion import ChatCompletion
+from unimind.context import Context, MessageBusFull
+from unimind.tool import execute_tool, is_read_only_tool
+from unimind.tool.observation import (
+    ObservationEncoder,
+    encode_tool_message,
+    get_observation_tracker,
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Dict, Tuple, Union
+from unimind.utils.resilience import resilient, retry_after_seconds
+from unimind.utils import (
+    calculate_cost,
+    clean_json_string,
+    get_model_info,
+    get_token_estimator,
+)
+
+# Upper bound of tool calls executed in parallel within one response
+MAX_CONCURRENT_TOOLS = 8
+
+# Tokens kept free for the completion when generation params set no max_tokens
+DEFAULT_COMPLETION_RESERVE = 4096
+
+RETRYABLE_EXCEPTIONS = [
+    openai.APIError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+    json.JSONDecodeError,
+]
+
+# Errors counted against the health of the endpoint by its circuit breaker;
+# rate limits back off through Retry-After and invalid JSON is a model issue
+ENDPOINT_FAILURES = [
+    openai.APIConnectionError,
+    openai.InternalServerError,
+]
+
+
+# Passed to on_delta when the text streamed so far is discarded because the
+# attempt that produced it is being replayed (a retry or a model escalation)
+DELTA_RESET = "\x00reset"
+
+
+class DeltaRelay:
+    """
+    Forwards content deltas to an on_delta callback across replayed attempts.
+
+    Call `reset()` before each attempt: if the previous attempt already streamed
+    text, the callback receives `DELTA_RESET` and should clear what it has shown.
+    """
+
+    def __init__(self, callback: Callable[[str], Any]):
+        self.callback = callback
+        self.emitted = False
+
+    async def __call__(self, delta: str) -> None:
+        self.emitted = True
+        result = self.callback(delta)
+        if inspect.isawaitable(result):
+            await result
+
+    async def reset(self) -> None:
+        if not self.emitted:
+            return
+        self.emitted = False
+        result = self.callback(DELTA_RESET)
+        if inspect.isawaitable(result):
+            await result
+
+    @classmethod
+    def wrap(cls, callback: Optional[Callable[[str], Any]]) -> Optional["DeltaRelay"]:
+        """Wrap a callback unless it is already a relay (or None)."""
+        if callback is None or isinstance(callback, cls):
+            return callback
+        return cls(callback)
+
+
+def _llm_endpoint(agent: "Agent", *args, **kwargs) -> str:
+    """Circuit breaker key of an agent's calls: base URL and model."""
+    return f"llm:{agent.llm_base_url or os.getenv('OPENAI_API_BASE_URL') or 'openai'}:{agent.model}"
 
 
 class Agent:
@@ -39,6 +129,10 @@ class Agent:
         llm_base_url: Optional[str] = None,
         llm_api_key: Optional[str] = None,
         multi_turn: bool = False,
+        independent_tools: Optional[List[str]] = None,
+        cache: Optional[Union[bool, ResponseCache]] = None,
+        memory_manager: Optional[MemoryManager] = None,
+        observation_encoder: Optional[ObservationEncoder] = None,
     ):
         """
         Initialize an Agent instance.
@@ -57,6 +151,14 @@ class Agent:
             llm_base_url: Optional base URL for the OpenAI API
             llm_api_key: Optional API key for the OpenAI API
             multi_turn: If True, agent can process multiple rounds; if False, agent processes only one round
+            independent_tools: Optional names of tools that may run concurrently with each other
+                within one response, in addition to tools marked read_only
+            cache: Response cache setting: True/False to opt in/out, a ResponseCache
+                instance, or None to cache only when the temperature is 0
+            memory_manager: Optional MemoryManager keeping the prompt within a token
+                budget; by default one is derived from the model's context length
+            observation_encoder: Optional encoder rendering UI element lists in tool
+                results as compact tables; defaults to the shared encoder
         """
         self.name = name
         self.description = description
@@ -70,6 +172,7 @@ class Agent:
         self.rounds = []
         self.generation_params = generation_params
         self.multi_turn = multi_turn
+        self.independent_tools = set(independent_tools or [])
         self.memory = []
         self.llm_base_url = llm_base_url
         self.llm_api_key = llm_api_key
@@ -80,6 +183,18 @@ class Agent:
         if isinstance(generation_params, dict):
             self.generation_params = GenerationParams(**generation_params)
 
+        self._cache_setting = cache
+        self.observation_encoder = observation_encoder
+        self.token_estimator = get_token_estimator(model)
+        self._custom_memory_manager = memory_manager is not None
+        self.memory_manager = memory_manager or MemoryManager(
+            get_model_info(model).context_length, estimator=self.token_estimator
+        )
+        self.cache = resolve_cache(
+            cache,
+            self.generation_params.temperature if self.generation_params else None,
+        )
+
         api_key = llm_api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             rprint(
@@ -96,39 +211,17 @@ class Agent:
             )
             exit(1)
 
-        # 配置代理设置
-        import httpx
-        
-        # 获取代理配置
-        http_proxy = os.getenv("HTTP_PROXY") or os.getenv("http_proxy")
-        https_proxy = os.getenv("HTTPS_PROXY") or os.getenv("https_proxy")
-        
-        # 创建HTTP客户端（支持代理）
-        http_client = None
-        if http_proxy or https_proxy:
-            # 优先使用http代理，避免SSL协议问题
-            proxy_url = http_proxy or https_proxy
-            
-            # 确保代理URL使用http协议
-            if proxy_url and proxy_url.startswith('https://'):
-                proxy_url = proxy_url.replace('https://', 'http://')
-            
-            try:
-                http_client = httpx.Client(
-                    proxy=proxy_url,
-                    timeout=60.0,
-                    follow_redirects=True,
-                    verify=False  # 跳过SSL验证以避免代理SSL问题
-                )
-            except Exception as e:
-                # 如果代理失败，使用直连
-                self.logger.warning(f"代理设置失败，使用直连: {e}")
-                http_client = None
-        
-        self.client = openai.OpenAI(
-            api_key=api_key,
-            base_url=llm_base_url or os.getenv("OPENAI_API_BASE_URL"),
-            http_client=http_client
+        self._api_key = api_key
+        # Clients are shared process-wide per (base_url, api_key, proxy)
+        self.client = get_openai_client(
+            api_key, llm_base_url or os.getenv("OPENAI_API_BASE_URL")
+        )
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """The shared AsyncOpenAI client used by `aprocess` on the running event loop."""
+        return get_async_openai_client(
+            self._api_key, self.llm_base_url or os.getenv("OPENAI_API_BASE_URL")
         )
 
     def __repr__(self) -> str:
@@ -159,6 +252,11 @@ class Agent:
             model (str): The model to use
         """
         self.model = model
+        self.token_estimator = get_token_estimator(model)
+        if not self._custom_memory_manager:
+            self.memory_manager = MemoryManager(
+                get_model_info(model).context_length, estimator=self.token_estimator
+            )
 
     def save_response(self, response_content: str) -> None:
         """
@@ -203,6 +301,10 @@ class Agent:
             llm_base_url=self.llm_base_url,
             llm_api_key=self.llm_api_key,
             multi_turn=self.multi_turn,
+            independent_tools=list(self.independent_tools),
+            cache=self._cache_setting,
+            memory_manager=self.memory_manager if self._custom_memory_manager else None,
+            observation_encoder=self.observation_encoder,
         )
 
         # Ensure the cloned agent has independent memory and rounds
@@ -240,6 +342,76 @@ class Agent:
                 - reason: Reason for ending the conversation
                 - handoff: Dict with agent object and instructions if handoff occurred
         """
+        input_text, file = self._prepare_input(context, input_text, check_messages, file)
+        result = self._process_with_retry(
+            context,
+            input_text,
+            max_iterations,
+            clear_memory,
+            file,
+        )
+        context.add_history(self.name, result.copy())
+        return result
+
+    async def aprocess(
+        self,
+        context: Context,
+        input_text: str,
+        max_iterations: int = None,
+        clear_memory: bool = True,
+        check_messages: bool = True,
+        file: Optional[str] = None,
+        on_delta: Optional[Callable[[str], Any]] = None,
+    ) -> Dict:
+        """
+        Async variant of `process` built on AsyncOpenAI with streaming.
+
+        Tool calls are parsed from the stream incrementally; a read-only tool starts
+        executing (in a worker thread) as soon as its arguments are complete, while
+        the model is still generating the rest of the response. Tools with side
+        effects run only once the whole response has arrived, so a retried attempt
+        never repeats them, and tools issued after them keep the model's order.
+        They run in a worker thread as well, so waiting for the device or for a
+        write never blocks the event loop.
+
+        Args:
+            context: The context object
+            input_text: The text input to process
+            max_iterations: Maximum number of interaction rounds (None means no limit)
+            clear_memory: If True, clears the memory before processing; if False, appends to existing memory
+            check_messages: If True, checks and includes messages from queue in the input
+            file: Optional path to a file to include as multimodal input (if model supports it)
+            on_delta: Optional callback (sync or async) receiving content token deltas as they
+                stream in; it receives `DELTA_RESET` before a retried attempt replays them
+
+        Returns:
+            Dict: same structure as `process`
+        """
+        input_text, file = self._prepare_input(context, input_text, check_messages, file)
+        result = await self._aprocess_with_retry(
+            context,
+            input_text,
+            max_iterations,
+            clear_memory,
+            file,
+            DeltaRelay.wrap(on_delta),
+        )
+        context.add_history(self.name, result.copy())
+        return result
+
+    def _prepare_input(
+        self,
+        context: Context,
+        input_text: str,
+        check_messages: bool,
+        file: Optional[str],
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Append queued messages to the input and validate the optional file.
+
+        Returns:
+            Tuple of the final input text and the file to attach (None if not usable)
+        """
         # Check if there are any messages for this agent
         if check_messages and context.has_messages(self.name):
             messages = context.dequeue_messages(self.name)
@@ -271,79 +443,10 @@ class Agent:
                     f"Model {self.model} does not support multimodal inputs, but a file was provided."
                 )
 
-        result = self._process_with_retry(
-            context,
-            input_text,
-            max_iterations,
-            clear_memory,
-            file if has_file_input else None,
-        )
-        context.add_history(self.name, result.copy())
-        return result
-
-    @retry(
-        exceptions=[
-            openai.APIError,
-            openai.APIConnectionError,
-            openai.RateLimitError,
-            openai.APITimeoutError,
-            openai.InternalServerError,
-            json.JSONDecodeError,
-        ],
-    )
-    def _process_with_retry(
-        self,
-        context: Context,
-        input_text: str,
-        max_iterations: int = None,
-        clear_memory: bool = True,
-        file: Optional[str] = None,
-    ) -> Dict:
-        """
-        Internal method to process input with retry capabilities.
-        This method is decorated with retry to handle transient failures.
-
-        Args:
-            context: The context object
-            input_text: The text input to process
-            max_iterations: Maximum number of interaction rounds (None means no limit)
-            clear_memory: If True, clears the memory before processing; if False, appends to existing memory
-            file: Optional path to a file to include as multimodal input
-
-        Returns:
-            Dict: containing:
-                - input: Initial input text
-                - output: Model response message of final round
-                - usage: Dict with token usage and cost information
-                - reason: Reason for ending the conversation
-                - handoff: Dict with agent object and instructions if handoff occurred
-        """
-        messages = self._prepare_messages(input_text, clear_memory, file)
-
-        # Initialize rounds tracking for internal use
-        self.rounds = []
-        current_round = {
-            "input": input_text,
-            "output": None,
-            "tool_calls": None,
-            "handoff": None,
-            "token_usage": None,
-            "cost": None,
-            "reason": None,
-        }
-
-        # Initialize tracking for the final result
-        total_token_usage = {
-            "prompt_tokens": 0,
-            "completion_tokens": 0,
-            "total_tokens": 0,
-        }
-        total_cost = {"prompt_cost": 0, "completion_cost": 0, "total_cost": 0}
-        final_output = None
-        final_reason = None
-        handoff_target = None
-        handoff_instructions = None
+        return input_text, file if has_file_input else None
 
+    def _build_tools(self) -> List[Dict]:
+        """Return the agent's tools plus the handoff_to_* and inform_* tools."""
         # Add handoff agents as tools
         tools_with_handoffs = self.tools.copy()
 
@@ -390,280 +493,479 @@ class Agent:
                 }
             )
 
-        round_number = 0
+        return tools_with_handoffs
 
-        # Continue conversation until no more tool calls or a handoff is requested
-        # or until max_iterations is reached (if specified)
-        while max_iterations is None or round_number < max_iterations:
-            round_number += 1
+    @staticmethod
+    def _new_round(input_text: str) -> Dict:
+        """Create an empty round record."""
+        return {
+            "input": input_text,
+            "output": None,
+            "tool_calls": None,
+            "handoff": None,
+            "token_usage": None,
+            "compacted_tokens": 0,
+            "predicted_prompt_tokens": None,
+            "queue_wait": 0.0,
+            "cost": None,
+            "reason": None,
+        }
 
-            try:
-                print(f"Debug: {self.name} processing round {round_number}...")
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    tools=tools_with_handoffs if tools_with_handoffs else None,
-                    **(
-                        self.generation_params.to_dict()
-                        if self.generation_params
-                        else {}
-                    ),
-                )
-                print("Debug: Response received.")
-            except Exception as e:
-                print(f"Error: {e}")
-                raise
+    def _record_usage(
+        self,
+        context: Context,
+        usage,
+        round_number: int,
+        current_round: Dict,
+        total_token_usage: Dict,
+        total_cost: Dict,
+    ) -> None:
+        """
+        Record the token usage and cost of one completion.
 
-            response_message = response.choices[0].message
-            final_output = response_message.content
+        Args:
+            context: The context object
+            usage: The `usage` object of the completion
+            round_number: Current round number
+            current_round: Round record to update
+            total_token_usage: Running token totals to update
+            total_cost: Running cost totals to update
+        """
+        prompt_tokens = usage.prompt_tokens
+        completion_tokens = usage.completion_tokens
+
+        # Compare the pre-flight estimate with the actual prompt size for calibration
+        predicted = current_round.get("predicted_prompt_tokens")
+        if predicted:
+            error = self.token_estimator.record(predicted, prompt_tokens)
+            print(
+                f"Debug: {self.name} prompt tokens predicted {predicted}, "
+                f"actual {prompt_tokens} ({error:+.1%})"
+            )
 
-            # Update current round with output
-            current_round["output"] = response_message.content
+        # Update total token usage
+        total_token_usage["prompt_tokens"] += prompt_tokens
+        total_token_usage["completion_tokens"] += completion_tokens
+        total_token_usage["total_tokens"] += usage.total_tokens
+
+        # Record token usage for current round
+        current_round["token_usage"] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "compacted_tokens": current_round.get("compacted_tokens", 0),
+            "predicted_prompt_tokens": predicted,
+            "queue_wait": round(current_round.get("queue_wait", 0.0), 4),
+        }
 
-            # Record token usage with enhanced details
-            if hasattr(response, "usage") and response.usage:
-                prompt_tokens = response.usage.prompt_tokens
-                completion_tokens = response.usage.completion_tokens
-
-                # Update total token usage
-                total_token_usage["prompt_tokens"] += prompt_tokens
-                total_token_usage["completion_tokens"] += completion_tokens
-                total_token_usage["total_tokens"] += response.usage.total_tokens
-
-                # Record token usage for current round
-                current_round["token_usage"] = {
-                    "prompt_tokens": prompt_tokens,
-                    "completion_tokens": completion_tokens,
-                    "total_tokens": response.usage.total_tokens,
-                }
+        # Calculate cost using the model_pricing utility
+        cost_info = calculate_cost(
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
 
-                # Calculate cost using the model_pricing utility
-                cost_info = calculate_cost(
-                    model=self.model,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                )
+        # Update total cost
+        total_cost["prompt_cost"] += cost_info["prompt_cost"]
+        total_cost["completion_cost"] += cost_info["completion_cost"]
+        total_cost["total_cost"] += cost_info["total_cost"]
 
-                # Update total cost
-                total_cost["prompt_cost"] += cost_info["prompt_cost"]
-                total_cost["completion_cost"] += cost_info["completion_cost"]
-                total_cost["total_cost"] += cost_info["total_cost"]
-
-                # Record cost information for current round
-                current_round["cost"] = cost_info
-
-                # Update token usage in context with detailed information
-                context.update_token_usage(
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    agent_name=self.name,
-                    round_number=round_number,
-                    model=self.model,
-                )
+        # Record cost information for current round
+        current_round["cost"] = cost_info
+
+        # Update token usage in context with detailed information
+        context.update_token_usage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            agent_name=self.name,
+            round_number=round_number,
+            model=self.model,
+            compacted_tokens=current_round.get("compacted_tokens", 0),
+        )
+
+        # Update cost information in context
+        context.update_cost(
+            prompt_cost=cost_info["prompt_cost"],
+            completion_cost=cost_info["completion_cost"],
+            agent_name=self.name,
+            round_number=round_number,
+            model=self.model,
+        )
+
+    def _cache_key(self, messages: List[Dict], tools: List[Dict]) -> str:
+        """Fingerprint of a completion request for the response cache."""
+        return fingerprint(
+            self.model,
+            messages,
+            tools or None,
+            self.generation_params.to_dict() if self.generation_params else {},
+        )
+
+    def _cache_lookup(self, messages: List[Dict], tools: List[Dict]) -> Optional[Dict]:
+        """Return the cached ChatCompletion dict for the request, if any."""
+        if self.cache is None:
+            return None
+        return self.cache.lookup(self._cache_key(messages, tools))
+
+    def _cache_store(self, messages: List[Dict], tools: List[Dict], response: Dict) -> None:
+        """Store a ChatCompletion dict for the request."""
+        if self.cache is not None:
+            self.cache.store(self._cache_key(messages, tools), self.model, response)
+
+    def _request_tokens(self, current_round: Dict) -> int:
+        """Estimated tokens of a request for the TPM limit: prompt plus expected completion."""
+        completion = (
+            self.generation_params.max_tokens
+            if self.generation_params and self.generation_params.max_tokens
+            else DEFAULT_COMPLETION_ESTIMATE
+        )
+        return (current_round.get("predicted_prompt_tokens") or 0) + completion
 
-                # Update cost information in context
-                context.update_cost(
-                    prompt_cost=cost_info["prompt_cost"],
-                    completion_cost=cost_info["completion_cost"],
-                    agent_name=self.name,
-                    round_number=round_number,
-                    model=self.model,
+    def _on_rate_limited(self, error: Exception) -> None:
+        """Pause the rate limiter of this agent's key and model after a 429."""
+        get_rate_limiter().penalize(
+            self._api_key, self.model, retry_after_seconds(error) or 1.0
+        )
+
+    def _create_completion(
+        self,
+        messages: List[Dict],
+        tools: List[Dict],
+        context: Optional[Context] = None,
+        current_round: Optional[Dict] = None,
+    ) -> Tuple[ChatCompletion, bool]:
+        """
+        Create a chat completion, answering from the response cache when possible.
+
+        Requests sent to the API first wait for the rate limiter of the agent's
+        API key and model; the wait is recorded in `current_round["queue_wait"]`.
+
+        Returns:
+            Tuple of the completion and whether it came from the cache
+        """
+        cached = self._cache_lookup(messages, tools)
+        if cached is not None:
+            return ChatCompletion.model_validate(cached), True
+
+        current_round = current_round if current_round is not None else {}
+        ticket = get_rate_limiter().acquire(
+            self._api_key,
+            self.model,
+            self._request_tokens(current_round),
+            session_of(context),
+        )
+        current_round["queue_wait"] = ticket.wait_seconds
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools if tools else None,
+                **(self.generation_params.to_dict() if self.generation_params else {}),
+            )
+        except openai.RateLimitError as e:
+            self._on_rate_limited(e)
+            raise
+        ticket.settle(response.usage.total_tokens if response.usage else None)
+        self._cache_store(messages, tools, response.model_dump(mode="json"))
+        return response, False
+
+    def _record_cache_hit(
+        self, context: Context, usage, round_number: int, current_round: Dict
+    ) -> None:
+        """Record a cached response as a zero-cost round."""
+        current_round["token_usage"] = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "compacted_tokens": current_round.get("compacted_tokens", 0),
+            "cached": True,
+        }
+        current_round["cost"] = {"prompt_cost": 0, "completion_cost": 0, "total_cost": 0}
+        context.record_cache_hit(
+            agent_name=self.name,
+            round_number=round_number,
+            saved_tokens=usage.total_tokens if usage else 0,
+            model=self.model,
+            compacted_tokens=current_round.get("compacted_tokens", 0),
+        )
+
+    def _save_output(self, content: Optional[str]) -> None:
+        """Save the response if a save path is specified."""
+        if self.save_path and content:
+            if self.save_path.endswith(".json"):
+                self.save_response(clean_json_string(content))
+            else:
+                self.save_response(content)
+
+    def _can_run_concurrently(self, tool_name: str) -> bool:
+        """Whether a tool call may overlap with other concurrent-safe calls of the same response."""
+        return tool_name in self.independent_tools or is_read_only_tool(tool_name)
+
+    def _execute_tool_calls(
+        self, context: Context, tool_calls: List[Dict]
+    ) -> Dict[str, Any]:
+        """
+        Execute regular tool calls, running consecutive concurrent-safe calls in parallel.
+
+        Calls that are neither read-only nor declared independent act as barriers:
+        they run alone, after everything issued before them and before anything
+        issued after them.
+
+        Args:
+            context: The context object
+            tool_calls: Tool calls as dicts with `id`, `name` and `arguments`
+
+        Returns:
+            Dict mapping tool call id to its result
+        """
+        results = {}
+        batch: List[Dict] = []
+
+        def run(tool_call: Dict) -> Any:
+            return execute_tool(context, tool_call["name"], json.loads(tool_call["arguments"]))
+
+        def flush():
+            if len(batch) == 1:
+                results[batch[0]["id"]] = run(batch[0])
+            elif batch:
+                with ThreadPoolExecutor(
+                    max_workers=min(len(batch), MAX_CONCURRENT_TOOLS)
+                ) as pool:
+                    for tool_call, result in zip(batch, pool.map(run, batch)):
+                        results[tool_call["id"]] = result
+            batch.clear()
+
+        for tool_call in tool_calls:
+            if self._can_run_concurrently(tool_call["name"]):
+                batch.append(tool_call)
+            else:
+                flush()
+                results[tool_call["id"]] = run(tool_call)
+        flush()
+
+        return results
+
+    def _apply_tool_calls(
+        self,
+        context: Context,
+        content: Optional[str],
+        tool_calls: List[Dict],
+        messages: List[Dict],
+        current_round: Dict,
+        tool_results: Optional[Dict[str, Any]] = None,
+    ) -> Dict:
+        """
+        Handle the tool calls of one response: handoffs, inform_* messages,
+        work_done and regular tools.
+
+        Regular tools not yet executed are run via `_execute_tool_calls`. All calls
+        that produced a result are then appended, in the original order, as one
+        assistant message followed by one tool message per call.
+
+        Args:
+            context: The context object
+            content: Text content of the response message
+            tool_calls: Tool calls as dicts with `id`, `name` and `arguments`
+            messages: Conversation messages, extended with the calls and their results
+            current_round: Round record to update
+            tool_results: Results of regular tools that were already executed, keyed
+                by tool call id; tools missing here are executed now
+
+        Returns:
+            Dict with `tool_calls`, `handoff_target`, `handoff_instructions`,
+            `handoff_requested`, `work_done` and the `last_result` of this round
+        """
+        outcome = {
+            "tool_calls": [],
+            "handoff_target": None,
+            "handoff_instructions": None,
+            "handoff_requested": False,
+            "work_done": False,
+            "last_result": None,
+        }
+        results = dict(tool_results or {})
+
+        # Calls after a valid handoff are not processed
+        answered: List[Dict] = []
+        for tool_call in tool_calls:
+            tool_name = tool_call["name"]
+
+            # Check if this is a handoff
+            if tool_name.startswith("handoff_to_"):
+                target_agent_name = tool_name[len("handoff_to_") :]
+                args = json.loads(tool_call["arguments"])
+                outcome["handoff_instructions"] = args.get("instructions", "")
+
+                for agent in self.handoffs:
+                    if agent.name == target_agent_name:
+                        current_round["handoff"] = agent.name
+                        current_round["reason"] = "handoff"
+                        outcome["handoff_target"] = agent
+                        outcome["handoff_requested"] = True
+                        break
+                if outcome["handoff_requested"]:
+                    break
+            elif tool_name == "work_done":
+                # Mark that work_done was called
+                outcome["work_done"] = True
+                current_round["reason"] = "work_done"
+            else:
+                answered.append(tool_call)
+
+        pending = [
+            tool_call
+            for tool_call in answered
+            if not tool_call["name"].startswith("inform_") and tool_call["id"] not in results
+        ]
+        if pending:
+            results.update(self._execute_tool_calls(context, pending))
+
+        for tool_call in answered:
+            tool_name = tool_call["name"]
+            args = json.loads(tool_call["arguments"])
+
+            # Check if this is an inform_xxx tool
+            if tool_name.startswith("inform_"):
+                target_agent_name = tool_name[len("inform_") :]
+                message_content = args.get("content", "")
+
+                # Validate target agent is in the inform list
+                valid_target = any(
+                    agent.name == target_agent_name for agent in self.inform
                 )
 
-            # Save the response if a save path is specified
-            if self.save_path and response_message.content:
-                if self.save_path.endswith(".json"):
-                    self.save_response(clean_json_string(response_message.content))
+                if valid_target:
+                    # Queue the message for the target agent
+                    try:
+                        context.enqueue_message(
+                            target_agent=target_agent_name,
+                            message={"content": message_content},
+                            sender=self.name,
+                        )
+                        tool_result = {
+                            "status": "Message queued for delivery to " + target_agent_name
+                        }
+                    except MessageBusFull as e:
+                        tool_result = {"status": f"Error: {e}, retry later"}
                 else:
-                    self.save_response(response_message.content)
+                    # If not a valid target, return an error
+                    tool_result = {
+                        "status": "Error: Agent "
+                        + target_agent_name
+                        + " is not in the inform list"
+                    }
+                results[tool_call["id"]] = tool_result
+            else:
+                tool_result = results[tool_call["id"]]
 
-            # Check for handoff or tool calls
-            handoff_requested = False
-            current_round_tool_calls = []
-            work_done_called = False
-
-            if hasattr(response_message, "tool_calls") and response_message.tool_calls:
-                for tool_call in response_message.tool_calls:
-                    tool_name = tool_call.function.name
-
-                    # Check if this is a handoff
-                    if tool_name.startswith("handoff_to_"):
-                        target_agent_name = tool_name[len("handoff_to_") :]
-                        args = json.loads(tool_call.function.arguments)
-                        handoff_instructions = args.get("instructions", "")
-
-                        for agent in self.handoffs:
-                            if agent.name == target_agent_name:
-                                current_round["handoff"] = agent.name
-                                current_round["reason"] = "handoff"
-                                handoff_target = agent
-                                final_reason = "handoff"
-                                handoff_requested = True
-                                break
-                        if handoff_requested:
-                            break
-                    # Check if this is an inform_xxx tool
-                    elif tool_name.startswith("inform_"):
-                        target_agent_name = tool_name[len("inform_") :]
-                        args = json.loads(tool_call.function.arguments)
-                        message_content = args.get("content", "")
-
-                        # Validate target agent is in the inform list
-                        valid_target = False
-                        for agent in self.inform:
-                            if agent.name == target_agent_name:
-                                valid_target = True
-                                break
-
-                        if valid_target:
-                            # Queue the message for the target agent
-                            context.enqueue_message(
-                                target_agent=target_agent_name,
-                                message={"content": message_content},
-                                sender=self.name,
-                            )
-                            tool_result = {
-                                "status": "Message queued for delivery to "
-                                + target_agent_name
-                            }
-                        else:
-                            # If not a valid target, return an error
-                            tool_result = {
-                                "status": "Error: Agent "
-                                + target_agent_name
-                                + " is not in the inform list"
-                            }
-
-                        # Add the tool call and result to messages for the next turn
-                        messages.append(
-                            {
-                                "role": "assistant",
-                                "content": None,
-                                "tool_calls": [
-                                    {
-                                        "id": tool_call.id,
-                                        "type": "function",
-                                        "function": {
-                                            "name": tool_name,
-                                            "arguments": tool_call.function.arguments,
-                                        },
-                                    }
-                                ],
-                            }
-                        )
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "content": json.dumps(tool_result),
-                            }
-                        )
+            outcome["tool_calls"].append(
+                {"tool": tool_name, "args": args, "result": tool_result}
+            )
+            outcome["last_result"] = tool_result
+
+        if not answered:
+            return outcome
+
+        # Add the tool calls and results to messages for the next turn
+        new_messages = [
+            {
+                "role": "assistant",
+                "content": content,
+                "tool_calls": [
+                    {
+                        "id": tool_call["id"],
+                        "type": "function",
+                        "function": {
+                            "name": tool_call["name"],
+                            "arguments": tool_call["arguments"],
+                        },
+                    }
+                    for tool_call in answered
+                ],
+            }
+        ]
+        tracker = get_observation_tracker(context, self.observation_encoder)
+        if tracker is not None:
+            # Diffs need their baseline in this prompt; memory clears and retries
+            # drop it (compaction leaves it alone), so those streams restart with
+            # a full snapshot
+            tracker.sync(messages, f"{self.name}:")
+        new_messages.extend(
+            encode_tool_message(
+                tool_call["id"],
+                results[tool_call["id"]],
+                self.observation_encoder,
+                tracker=tracker,
+                stream=f"{self.name}:{tool_call['name']}",
+            )
+            for tool_call in answered
+        )
+        messages.extend(new_messages)
 
-                        # Update memory with the new messages
-                        if messages[-2] not in self.memory:  # Avoid duplicates
-                            self.memory.append(messages[-2])
-                        if messages[-1] not in self.memory:  # Avoid duplicates
-                            self.memory.append(messages[-1])
-
-                        # Record tool usage
-                        current_tool_call = {
-                            "tool": tool_name,
-                            "args": args,
-                            "result": tool_result,
-                        }
-                        current_round_tool_calls.append(current_tool_call)
-                    elif tool_name == "work_done":
-                        # Mark that work_done was called
-                        work_done_called = True
-                        current_round["reason"] = "work_done"
-                        final_reason = "work_done"
-                    else:
-                        # Execute the tool
-                        args = json.loads(tool_call.function.arguments)
-                        tool_result = execute_tool(context, tool_name, args)
-                        current_tool_call = {
-                            "tool": tool_name,
-                            "args": args,
-                            "result": tool_result,
-                        }
-                        current_round_tool_calls.append(current_tool_call)
-
-                        # Add the tool call and result to messages for the next turn
-                        messages.append(
-                            {
-                                "role": "assistant",
-                                "content": response_message.content,
-                                "tool_calls": [
-                                    {
-                                        "id": tool_call.id,
-                                        "type": "function",
-                                        "function": {
-                                            "name": tool_name,
-                                            "arguments": tool_call.function.arguments,
-                                        },
-                                    }
-                                ],
-                            }
-                        )
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "content": json.dumps(tool_result),
-                            }
-                        )
+        # Update memory with the new messages
+        for message in new_messages:
+            if message not in self.memory:  # Avoid duplicates
+                self.memory.append(message)
 
-                        # Update memory with the new messages
-                        if messages[-2] not in self.memory:  # Avoid duplicates
-                            self.memory.append(messages[-2])
-                        if messages[-1] not in self.memory:  # Avoid duplicates
-                            self.memory.append(messages[-1])
-
-            # Update current round with tool calls if any
-            if current_round_tool_calls:
-                current_round["tool_calls"] = current_round_tool_calls
-
-            # Add the current round to rounds list
-            self.rounds.append(current_round.copy())
-
-            # Check if max iterations will be reached in the next round
-            if max_iterations is not None and round_number >= max_iterations:
-                # If this was the last round due to max_iterations, set the reason
-                if not current_round["reason"]:
-                    current_round["reason"] = "round_limit"
-                    final_reason = "round_limit"
-                    # Update the last entry in rounds list
-                    self.rounds[-1]["reason"] = "round_limit"
-
-            # Break the loop if no tool calls or handoff is requested
-            # or if we've reached the maximum number of iterations
-            # or if multi_turn is False (meaning we only want one round)
-            if (
-                not current_round_tool_calls
-                or handoff_requested
-                or work_done_called
-                or (max_iterations is not None and round_number >= max_iterations)
-                or not self.multi_turn  # Break after one round if multi_turn is False
-            ):
-                # If we're breaking without a specific reason, mark it as completed
-                if not current_round["reason"]:
-                    current_round["reason"] = "completed"
-                    final_reason = "completed"
-                    # Update the last entry in rounds list
-                    self.rounds[-1]["reason"] = "completed"
-                break
+        return outcome
 
-            # Prepare for next round - tool results become the new input
-            next_input = f"Tool results: {json.dumps(tool_result)}"
-            current_round = {
-                "input": next_input,
-                "output": None,
-                "tool_calls": None,
-                "handoff": None,
-                "token_usage": None,
-                "cost": None,
-                "reason": None,
-            }
+    def _finish_round(
+        self,
+        current_round: Dict,
+        outcome: Dict,
+        round_number: int,
+        max_iterations: Optional[int],
+    ) -> bool:
+        """
+        Store the round and decide whether the conversation ends here.
+
+        Returns:
+            bool: True if no further round should be run
+        """
+        # Update current round with tool calls if any
+        if outcome["tool_calls"]:
+            current_round["tool_calls"] = outcome["tool_calls"]
+
+        # Add the current round to rounds list
+        self.rounds.append(current_round.copy())
+
+        # Check if max iterations will be reached in the next round
+        if max_iterations is not None and round_number >= max_iterations:
+            # If this was the last round due to max_iterations, set the reason
+            if not current_round["reason"]:
+                current_round["reason"] = "round_limit"
+                # Update the last entry in rounds list
+                self.rounds[-1]["reason"] = "round_limit"
+
+        # Break the loop if no tool calls or handoff is requested
+        # or if we've reached the maximum number of iterations
+        # or if multi_turn is False (meaning we only want one round)
+        if (
+            not outcome["tool_calls"]
+            or outcome["handoff_requested"]
+            or outcome["work_done"]
+            or (max_iterations is not None and round_number >= max_iterations)
+            or not self.multi_turn  # Break after one round if multi_turn is False
+        ):
+            # If we're breaking without a specific reason, mark it as completed
+            if not current_round["reason"]:
+                current_round["reason"] = "completed"
+                # Update the last entry in rounds list
+                self.rounds[-1]["reason"] = "completed"
+            return True
+        return False
+
+    def _build_result(
+        self,
+        input_text: str,
+        final_output: Optional[str],
+        total_token_usage: Dict,
+        total_cost: Dict,
+        handoff_target: Optional["Agent"],
+        handoff_instructions: Optional[str],
+    ) -> Dict:
+        """Apply a forced handoff via next_agent and construct the result dictionary."""
+        final_reason = self.rounds[-1]["reason"] if self.rounds else None
 
         # Check if there's a forced handoff via next_agent, which takes precedence over
         # any handoff the agent might have selected
@@ -676,12 +978,15 @@ class Agent:
                 final_reason = "handoff"
 
         # Construct the result dictionary
-        result = {
+        return {
             "input": input_text,
             "output": final_output,
             "usage": {
                 "token": total_token_usage,
                 "cost": total_cost,
+                "queue_wait": round(
+                    sum(round_.get("queue_wait", 0.0) for round_ in self.rounds), 4
+                ),
             },
             "reason": final_reason,
             "handoff": (
@@ -694,10 +999,485 @@ class Agent:
             ),
         }
 
-        return result
+    @resilient(
+        name="agent.process",
+        exceptions=RETRYABLE_EXCEPTIONS,
+        endpoint=_llm_endpoint,
+        trip_on=ENDPOINT_FAILURES,
+    )
+    def _process_with_retry(
+        self,
+        context: Context,
+        input_text: str,
+        max_iterations: int = None,
+        clear_memory: bool = True,
+        file: Optional[str] = None,
+    ) -> Dict:
+        """
+        Internal method to process input with retry capabilities.
+        Transient failures are retried with jittered backoff (honouring Retry-After),
+        behind the circuit breaker of the agent's endpoint.
+
+        Args:
+            context: The context object
+            input_text: The text input to process
+            max_iterations: Maximum number of interaction rounds (None means no limit)
+            clear_memory: If True, clears the memory before processing; if False, appends to existing memory
+            file: Optional path to a file to include as multimodal input
+
+        Returns:
+            Dict: containing:
+                - input: Initial input text
+                - output: Model response message of final round
+                - usage: Dict with token usage and cost information
+                - reason: Reason for ending the conversation
+                - handoff: Dict with agent object and instructions if handoff occurred
+        """
+        tools_with_handoffs = self._build_tools()
+        messages = self._prepare_messages(
+            input_text, clear_memory, file, tools_with_handoffs
+        )
+
+        # Initialize rounds tracking for internal use
+        self.rounds = []
+        current_round = self._new_round(input_text)
+
+        # Initialize tracking for the final result
+        total_token_usage = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        }
+        total_cost = {"prompt_cost": 0, "completion_cost": 0, "total_cost": 0}
+        final_output = None
+        handoff_target = None
+        handoff_instructions = None
+
+        round_number = 0
+
+        # Continue conversation until no more tool calls or a handoff is requested
+        # or until max_iterations is reached (if specified)
+        while max_iterations is None or round_number < max_iterations:
+            round_number += 1
+
+            # Keep the prompt within the token budget before every call; the
+            # baselines of incremental observations must stay as sent
+            carriers = self._observation_carriers(context)
+            current_round["compacted_tokens"] = self.memory_manager.compact(
+                messages, self.memory, carriers
+            )
+            current_round["predicted_prompt_tokens"] = self._preflight(
+                messages, tools_with_handoffs, carriers
+            )
+
+            try:
+                print(f"Debug: {self.name} processing round {round_number}...")
+                response, cached = self._create_completion(
+                    messages, tools_with_handoffs, context, current_round
+                )
+                print("Debug: Response received.")
+            except Exception as e:
+                print(f"Error: {e}")
+                raise
+
+            response_message = response.choices[0].message
+            final_output = response_message.content
+
+            # Update current round with output
+            current_round["output"] = response_message.content
+
+            # Record token usage with enhanced details
+            if cached:
+                self._record_cache_hit(context, response.usage, round_number, current_round)
+            elif hasattr(response, "usage") and response.usage:
+                self._record_usage(
+                    context,
+                    response.usage,
+                    round_number,
+                    current_round,
+                    total_token_usage,
+                    total_cost,
+                )
+
+            self._save_output(response_message.content)
+
+            # Check for handoff or tool calls
+            tool_calls = [
+                {
+                    "id": tool_call.id,
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments,
+                }
+                for tool_call in (getattr(response_message, "tool_calls", None) or [])
+            ]
+            outcome = self._apply_tool_calls(
+                context, response_message.content, tool_calls, messages, current_round
+            )
+            if outcome["handoff_requested"]:
+                handoff_target = outcome["handoff_target"]
+            if outcome["handoff_instructions"] is not None:
+                handoff_instructions = outcome["handoff_instructions"]
+
+            if self._finish_round(current_round, outcome, round_number, max_iterations):
+                break
+
+            # Prepare for next round - tool results become the new input
+            current_round = self._new_round(
+                f"Tool results: {json.dumps(outcome['last_result'])}"
+            )
+
+        return self._build_result(
+            input_text,
+            final_output,
+            total_token_usage,
+            total_cost,
+            handoff_target,
+            handoff_instructions,
+        )
+
+    @resilient(
+        name="agent.aprocess",
+        exceptions=RETRYABLE_EXCEPTIONS,
+        endpoint=_llm_endpoint,
+        trip_on=ENDPOINT_FAILURES,
+    )
+    async def _aprocess_with_retry(
+        self,
+        context: Context,
+        input_text: str,
+        max_iterations: int = None,
+        clear_memory: bool = True,
+        file: Optional[str] = None,
+        on_delta: Optional[Callable[[str], Any]] = None,
+    ) -> Dict:
+        """
+        Async counterpart of `_process_with_retry` using streamed completions.
+
+        Args:
+            context: The context object
+            input_text: The text input to process
+            max_iterations: Maximum number of interaction rounds (None means no limit)
+            clear_memory: If True, clears the memory before processing; if False, appends to existing memory
+            file: Optional path to a file to include as multimodal input
+            on_delta: Optional callback receiving content token deltas
+
+        Returns:
+            Dict: same structure as `_process_with_retry`
+        """
+        # A retry replays the whole attempt: let the consumer drop the text it already got
+        on_delta = DeltaRelay.wrap(on_delta)
+        if on_delta is not None:
+            await on_delta.reset()
+        tools_with_handoffs = self._build_tools()
+        messages = self._prepare_messages(
+            input_text, clear_memory, file, tools_with_handoffs
+        )
+
+        self.rounds = []
+        current_round = self._new_round(input_text)
+
+        total_token_usage = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        }
+        total_cost = {"prompt_cost": 0, "completion_cost": 0, "total_cost": 0}
+        final_output = None
+        handoff_target = None
+        handoff_instructions = None
+
+        round_number = 0
+
+        while max_iterations is None or round_number < max_iterations:
+            round_number += 1
+
+            # Keep the prompt within the token budget before every call; the
+            # baselines of incremental observations must stay as sent
+            carriers = self._observation_carriers(context)
+            current_round["compacted_tokens"] = self.memory_manager.compact(
+                messages, self.memory, carriers
+            )
+            current_round["predicted_prompt_tokens"] = self._preflight(
+                messages, tools_with_handoffs, carriers
+            )
+
+            cached = self._cache_lookup(messages, tools_with_handoffs)
+            if cached is not None:
+                message = cached["choices"][0]["message"]
+                content = message.get("content")
+                tool_calls = [
+                    {
+                        "id": tool_call["id"],
+                        "name": tool_call["function"]["name"],
+                        "arguments": tool_call["function"]["arguments"],
+                    }
+                    for tool_call in message.get("tool_calls") or []
+                ]
+                tool_results, usage = {}, None
+                if content and on_delta is not None:
+                    emitted = on_delta(content)
+                    if inspect.isawaitable(emitted):
+                        await emitted
+            else:
+                content, tool_calls, tool_results, usage = await self._astream_completion(
+                    context, messages, tools_with_handoffs, on_delta, current_round
+                )
+                self._cache_store(
+                    messages,
+                    tools_with_handoffs,
+                    completion_to_dict(self.model, content, tool_calls, usage),
+                )
+            final_output = content
+            current_round["output"] = content
+
+            if cached is not None:
+                self._record_cache_hit(
+                    context,
+                    ChatCompletion.model_validate(cached).usage,
+                    round_number,
+                    current_round,
+                )
+            elif usage:
+                self._record_usage(
+                    context,
+                    usage,
+                    round_number,
+                    current_round,
+                    total_token_usage,
+                    total_cost,
+                )
+
+            self._save_output(content)
+
+            # Tools with side effects and device arbitration block: keep them
+            # off the event loop so concurrent agents keep running
+            apply = asyncio.ensure_future(
+                asyncio.to_thread(
+                    self._apply_tool_calls,
+                    context,
+                    content,
+                    tool_calls,
+                    messages,
+                    current_round,
+                    tool_results,
+                )
+            )
+            try:
+                outcome = await asyncio.shield(apply)
+            except asyncio.CancelledError:
+                # The thread cannot be cancelled; let its tools end before a
+                # retry or the caller touches the device again
+                await asyncio.gather(apply, return_exceptions=True)
+                raise
+            if outcome["handoff_requested"]:
+                handoff_target = outcome["handoff_target"]
+            if outcome["handoff_instructions"] is not None:
+                handoff_instructions = outcome["handoff_instructions"]
+
+            if self._finish_round(current_round, outcome, round_number, max_iterations):
+                break
+
+            current_round = self._new_round(
+                f"Tool results: {json.dumps(outcome['last_result'])}"
+            )
+
+        return self._build_result(
+            input_text,
+            final_output,
+            total_token_usage,
+            total_cost,
+            handoff_target,
+            handoff_instructions,
+        )
+
+    @staticmethod
+    def _is_regular_tool(tool_name: str) -> bool:
+        """Whether the tool is executed via `execute_tool` (not a handoff/inform/work_done)."""
+        return not (
+            tool_name.startswith("handoff_to_")
+            or tool_name.startswith("inform_")
+            or tool_name == "work_done"
+        )
+
+    async def _astream_completion(
+        self,
+        context: Context,
+        messages: List[Dict],
+        tools: List[Dict],
+        on_delta: Optional[Callable[[str], Any]] = None,
+        current_round: Optional[Dict] = None,
+    ) -> Tuple[Optional[str], List[Dict], Dict[str, Any], Any]:
+        """
+        Stream one completion, starting read-only tools as soon as their arguments are complete.
+
+        A tool call's arguments are complete once the stream moves on to the next
+        tool call index, or when the stream ends. A stream error or invalid JSON
+        retries the whole attempt, so only read-only tools are started early:
+        replaying them is harmless. Nothing is started after the first call with
+        side effects or a handoff; `_apply_tool_calls` runs the remaining calls
+        once the response is complete.
+
+        Returns:
+            Tuple of (content, tool calls, results of the started tools keyed by
+            tool call id, usage or None)
+        """
+        current_round = current_round if current_round is not None else {}
+        ticket = await get_rate_limiter().aacquire(
+            self._api_key,
+            self.model,
+            self._request_tokens(current_round),
+            session_of(context),
+        )
+        current_round["queue_wait"] = ticket.wait_seconds
+
+        print(f"Debug: {self.name} streaming response...")
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools if tools else None,
+                stream=True,
+                stream_options={"include_usage": True},
+                **(self.generation_params.to_dict() if self.generation_params else {}),
+            )
+        except openai.RateLimitError as e:
+            self._on_rate_limited(e)
+            raise
+
+        content_parts: List[str] = []
+        calls: Dict[int, Dict] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = set()
+        blocked = False
+        usage = None
+
+        async def run_tool(tool_call: Dict):
+            args = json.loads(tool_call["arguments"])
+            return await asyncio.to_thread(execute_tool, context, tool_call["name"], args)
+
+        def start_ready(upto: Optional[int]):
+            nonlocal blocked
+            for index in sorted(calls):
+                if upto is not None and index >= upto:
+                    break
+                if index in started:
+                    continue
+                started.add(index)
+                tool_call = calls[index]
+                if tool_call["name"].startswith("handoff_to_"):
+                    blocked = True
+                if blocked or not self._is_regular_tool(tool_call["name"]):
+                    continue
+                if not is_read_only_tool(tool_call["name"]):
+                    # Later calls may depend on its effects
+                    blocked = True
+                    continue
+                # Invalid JSON raises here and triggers a retry of the whole attempt
+                json.loads(tool_call["arguments"])
+                tasks[tool_call["id"]] = asyncio.create_task(run_tool(tool_call))
+
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                if delta.content:
+                    content_parts.append(delta.content)
+                    if on_delta is not None:
+                        emitted = on_delta(delta.content)
+                        if inspect.isawaitable(emitted):
+                            await emitted
+
+                for tool_delta in delta.tool_calls or []:
+                    entry = calls.setdefault(
+                        tool_delta.index, {"id": None, "name": "", "arguments": ""}
+                    )
+                    if tool_delta.id:
+                        entry["id"] = tool_delta.id
+                    if tool_delta.function:
+                        entry["name"] += tool_delta.function.name or ""
+                        entry["arguments"] += tool_delta.function.arguments or ""
+                    # Earlier tool calls are complete once a later index appears
+                    start_ready(tool_delta.index)
+
+            start_ready(None)
+            tool_results = {}
+            for tool_id, task in tasks.items():
+                tool_results[tool_id] = await task
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Tools already in a worker thread cannot be cancelled; let them end
+            # before a retry touches the device again
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        print("Debug: Response received.")
+
+        content = "".join(content_parts) if content_parts else None
+        tool_calls = [calls[index] for index in sorted(calls)]
+        ticket.settle(usage.total_tokens if usage else None)
+        return content, tool_calls, tool_results, usage
+
+    def _observation_carriers(self, context: Context) -> List[Dict]:
+        """Tool messages holding the baselines of this agent's incremental observations."""
+        tracker = get_observation_tracker(context, self.observation_encoder)
+        return tracker.carriers(f"{self.name}:") if tracker is not None else []
+
+    def _preflight(
+        self,
+        messages: List[Dict],
+        tools: Optional[List[Dict]] = None,
+        keep: Optional[List[Dict]] = None,
+    ) -> int:
+        """
+        Predict the prompt tokens of a request and shrink it to fit the context length.
+
+        Over the limit, memory is compacted first; if the request still does not
+        fit, the text of the latest user message is truncated.
+
+        Args:
+            messages: Request messages, modified in place
+            tools: Tool definitions sent with the request
+            keep: Messages compaction must leave unchanged
+
+        Returns:
+            int: Predicted prompt tokens of the request as sent
+        """
+        reserve = (
+            self.generation_params.max_tokens
+            if self.generation_params and self.generation_params.max_tokens
+            else DEFAULT_COMPLETION_RESERVE
+        )
+        limit = self.memory_manager.context_length - reserve
+        predicted = self.token_estimator.count_messages(messages, tools)
+        if predicted <= limit:
+            return predicted
+
+        self.memory_manager.compact(messages, self.memory, keep or ())
+        predicted = self.token_estimator.count_messages(messages, tools)
+
+        last = messages[-1]
+        if predicted > limit and last.get("role") == "user" and isinstance(last.get("content"), str):
+            text_tokens = self.token_estimator.count(last["content"])
+            last["content"] = self.token_estimator.truncate(
+                last["content"], max(0, text_tokens - (predicted - limit))
+            )
+            predicted = self.token_estimator.count_messages(messages, tools)
+            print(
+                f"Warning: {self.name} input truncated to fit the context length "
+                f"of {self.model} ({limit} tokens)"
+            )
+        return predicted
 
     def _prepare_messages(
-        self, input_text: str, clear_memory: bool = True, file: Optional[str] = None
+        self,
+        input_text: str,
+        clear_memory: bool = True,
+        file: Optional[str] = None,
+        tools: Optional[List[Dict]] = None,
     ) -> List[Dict]:
         """
         Prepare the message for the API call.
@@ -707,6 +1487,7 @@ class Agent:
             clear_memory: If True, clears the memory before preparing messages;
                           if False, includes memory in the conversation
             file: Optional path to a file to include as multimodal input
+            tools: Tool definitions sent with the request, used to pre-flight its size
         """
         # Clear memory if requested
         if clear_memory:
@@ -755,6 +1536,9 @@ class Agent:
             if user_message not in self.memory:
                 self.memory.append(user_message)
 
+        # Pre-flight the request against the model's context length
+        self._preflight(messages, tools)
+
         return messages
 
     def _get_mime_type(self, file_path: str) -> str:
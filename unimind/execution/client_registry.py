@@ -0,0 +1,300 @@
+"""
+Process-wide registry of OpenAI clients sharing tuned HTTP connection pools.
+
+Clients are keyed by (base_url, api_key, proxy), so every Agent, Executor and
+cloned agent talking to the same endpoint reuses one httpx connection pool
+(keep-alive connections, TLS sessions and, when the `h2` package is installed,
+HTTP/2 multiplexing) instead of opening its own.
+"""
+
+import os
+import asyncio
+import threading
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+
+# HTTP/2 requires the optional `h2` package
+HAS_HTTP2 = importlib.util.find_spec("h2") is not None
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=90.0,
+)
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+ClientKey = Tuple[Optional[str], str, Optional[str]]
+
+
+def resolve_proxy_url() -> Optional[str]:
+    """Return the proxy URL from the environment, if any."""
+    # 获取代理配置
+    http_proxy = os.getenv("HTTP_PROXY") or os.getenv("http_proxy")
+    https_proxy = os.getenv("HTTPS_PROXY") or os.getenv("https_proxy")
+
+    # 优先使用http代理，避免SSL协议问题
+    proxy_url = http_proxy or https_proxy
+
+    # 确保代理URL使用http协议
+    if proxy_url and proxy_url.startswith("https://"):
+        proxy_url = proxy_url.replace("https://", "http://")
+    return proxy_url
+
+
+@dataclass
+class _PoolEntry:
+    """Clients and counters for one (base_url, api_key, proxy) key."""
+
+    key: ClientKey
+    client: Optional[openai.OpenAI] = None
+    http_client: Optional[httpx.Client] = None
+    # AsyncClient connections are bound to the event loop that opened them; a
+    # client holds its loop, so entries are dropped explicitly when the loop ends
+    async_clients: Dict[asyncio.AbstractEventLoop, openai.AsyncOpenAI] = field(
+        default_factory=dict
+    )
+    async_closers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = field(
+        default_factory=dict
+    )
+    lookups: int = 0
+    requests: int = 0
+    async_requests: int = 0
+
+
+class ClientRegistry:
+    """
+    Registry handing out shared OpenAI / AsyncOpenAI clients.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        http2: bool = HAS_HTTP2,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            limits: Connection pool limits applied to every HTTP client
+            timeout: Request timeout applied to every HTTP client
+            http2: Whether to negotiate HTTP/2 (requires the `h2` package)
+        """
+        self.limits = limits
+        self.timeout = timeout
+        self.http2 = http2 and HAS_HTTP2
+        self._entries: Dict[ClientKey, _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(
+        self, api_key: str, base_url: Optional[str], proxy: Optional[str]
+    ) -> _PoolEntry:
+        key = (base_url, api_key, proxy)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries.setdefault(key, _PoolEntry(key))
+        entry.lookups += 1
+        return entry
+
+    def _http_kwargs(self, proxy: Optional[str]) -> Dict[str, Any]:
+        kwargs = {
+            "limits": self.limits,
+            "timeout": self.timeout,
+            "http2": self.http2,
+            "follow_redirects": True,
+        }
+        if proxy:
+            kwargs["proxy"] = proxy
+            kwargs["verify"] = False  # 跳过SSL验证以避免代理SSL问题
+        return kwargs
+
+    def get_client(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        proxy: Optional[str] = None,
+    ) -> openai.OpenAI:
+        """
+        Get the shared synchronous OpenAI client for an endpoint.
+
+        Args:
+            api_key: API key
+            base_url: Optional base URL of the OpenAI-compatible API
+            proxy: Optional proxy URL
+
+        Returns:
+            openai.OpenAI: Client backed by the shared connection pool
+        """
+        with self._lock:
+            entry = self._entry(api_key, base_url, proxy)
+            if entry.client is None:
+
+                def count(request):
+                    entry.requests += 1
+
+                try:
+                    entry.http_client = httpx.Client(
+                        event_hooks={"request": [count]}, **self._http_kwargs(proxy)
+                    )
+                except Exception as e:
+                    # 如果代理失败，使用直连
+                    print(f"Warning: 代理设置失败，使用直连: {e}")
+                    entry.http_client = httpx.Client(
+                        event_hooks={"request": [count]}, **self._http_kwargs(None)
+                    )
+                entry.client = openai.OpenAI(
+                    api_key=api_key, base_url=base_url, http_client=entry.http_client
+                )
+            return entry.client
+
+    def get_async_client(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        proxy: Optional[str] = None,
+    ) -> openai.AsyncOpenAI:
+        """
+        Get the shared AsyncOpenAI client for an endpoint and the running event loop.
+
+        Args:
+            api_key: API key
+            base_url: Optional base URL of the OpenAI-compatible API
+            proxy: Optional proxy URL
+
+        Returns:
+            openai.AsyncOpenAI: Client backed by a connection pool shared on this loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._evict_closed_loops()
+            entry = self._entry(api_key, base_url, proxy)
+            client = entry.async_clients.get(loop)
+            if client is None:
+
+                async def count(request):
+                    entry.async_requests += 1
+
+                try:
+                    http_client = httpx.AsyncClient(
+                        event_hooks={"request": [count]}, **self._http_kwargs(proxy)
+                    )
+                except Exception as e:
+                    print(f"Warning: 代理设置失败，使用直连: {e}")
+                    http_client = httpx.AsyncClient(
+                        event_hooks={"request": [count]}, **self._http_kwargs(None)
+                    )
+                client = openai.AsyncOpenAI(
+                    api_key=api_key, base_url=base_url, http_client=http_client
+                )
+                entry.async_clients[loop] = client
+                entry.async_closers[loop] = loop.create_task(
+                    self._close_on_shutdown(entry, loop, client)
+                )
+            return client
+
+    async def _close_on_shutdown(
+        self,
+        entry: _PoolEntry,
+        loop: asyncio.AbstractEventLoop,
+        client: openai.AsyncOpenAI,
+    ) -> None:
+        """
+        Park until the loop shuts down, then close and forget its client.
+
+        `asyncio.run` cancels the tasks still pending before closing the loop,
+        which lets the client close its connections on the loop that owns them.
+        """
+        # A loop closed without cancelling its tasks only has its entry evicted
+        asyncio.current_task()._log_destroy_pending = False
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            with self._lock:
+                if entry.async_clients.get(loop) is client:
+                    del entry.async_clients[loop]
+                    entry.async_closers.pop(loop, None)
+            await client.close()
+            raise
+
+    def _evict_closed_loops(self) -> None:
+        """Forget clients of loops closed without shutting their tasks down (lock held)."""
+        for entry in self._entries.values():
+            for loop in [loop for loop in entry.async_clients if loop.is_closed()]:
+                del entry.async_clients[loop]
+                entry.async_closers.pop(loop, None)
+
+    @staticmethod
+    def _open_connections(http_client) -> Optional[int]:
+        """Best-effort count of pooled connections (httpcore internals)."""
+        try:
+            return len(http_client._transport._pool.connections)
+        except Exception:
+            return None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get pool statistics for every registered endpoint.
+
+        Returns:
+            List of dicts with the endpoint, lookup/request counters and open connections
+        """
+        with self._lock:
+            self._evict_closed_loops()
+            entries = list(self._entries.values())
+
+        stats = []
+        for entry in entries:
+            base_url, api_key, proxy = entry.key
+            stats.append(
+                {
+                    "base_url": base_url,
+                    "api_key": f"...{api_key[-4:]}" if api_key else None,
+                    "proxy": proxy,
+                    "http2": self.http2,
+                    "lookups": entry.lookups,
+                    "requests": entry.requests,
+                    "async_requests": entry.async_requests,
+                    "open_connections": (
+                        self._open_connections(entry.http_client)
+                        if entry.http_client
+                        else 0
+                    ),
+                    "event_loops": len(entry.async_clients),
+                    "max_connections": self.limits.max_connections,
+                    "max_keepalive_connections": self.limits.max_keepalive_connections,
+                }
+            )
+        return stats
+
+    def close(self) -> None:
+        """Close the synchronous HTTP clients and forget all entries."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.http_client is not None:
+                entry.http_client.close()
+
+
+client_registry = ClientRegistry()
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None) -> openai.OpenAI:
+    """Get the shared OpenAI client for an endpoint, using the proxy from the environment."""
+    return client_registry.get_client(api_key, base_url, resolve_proxy_url())
+
+
+def get_async_openai_client(
+    api_key: str, base_url: Optional[str] = None
+) -> openai.AsyncOpenAI:
+    """Get the shared AsyncOpenAI client for an endpoint, using the proxy from the environment."""
+    return client_registry.get_async_client(api_key, base_url, resolve_proxy_url())
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Get connection pool statistics of the shared clients."""
+    return client_registry.stats()
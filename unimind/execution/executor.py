@@ -4,11 +4,17 @@ It provides methods to interact with the OpenAI chat API and handle query execut
 """
 
 import json
+import openai
 from openai import OpenAI
-from typing import Optional
+from typing import Optional, Union
 from unimind.task import Task
 from dataclasses import dataclass
 from .config import ExecutorConfig
+from .client_registry import get_openai_client
+from .response_cache import ResponseCache, fingerprint, resolve_cache
+from .rate_limiter import DEFAULT_COMPLETION_ESTIMATE, get_rate_limiter, session_of
+from unimind.utils import get_token_estimator
+from unimind.utils.resilience import retry_after_seconds
 from unimind.context import Context
 from unimind.prompt import DEFAULT_SYSTEM_MESSAGE
 from unimind.tool import get_all_tools, execute_tool
@@ -23,6 +29,8 @@ class ExecutionUsage:
 
     prompt: int
     completion: int
+    # Seconds the request waited for the client-side rate limiter
+    queue_wait: float = 0.0
 
 
 class Executor:
@@ -33,7 +41,11 @@ class Executor:
     config: ExecutorConfig
     client: OpenAI
 
-    def __init__(self, config: Optional[ExecutorConfig] = None):
+    def __init__(
+        self,
+        config: Optional[ExecutorConfig] = None,
+        cache: Optional[Union[bool, ResponseCache]] = None,
+    ):
         """
         Initialize the Executor class with a prompt and configuration.
 
@@ -41,6 +53,8 @@ class Executor:
             prompt (str): The initial prompt for the executor.
             config (ExecutorConfig, optional): Configuration for the executor.
             model (str, optional): The model to use. If provided, overrides the model from config.
+            cache (bool | ResponseCache, optional): Response cache setting. None caches only
+                requests with temperature 0.
 
         Raises:
             ValueError: If the API key is not provided or the model is not specified.
@@ -50,42 +64,9 @@ class Executor:
         if not self.config.api_key:
             raise ValueError("API key is required")
 
-        # 配置代理设置
-        import httpx
-        import os
-        
-        # 获取代理配置
-        http_proxy = os.getenv("HTTP_PROXY") or os.getenv("http_proxy")
-        https_proxy = os.getenv("HTTPS_PROXY") or os.getenv("https_proxy")
-        
-        # 创建HTTP客户端（支持代理）
-        http_client = None
-        if http_proxy or https_proxy:
-            # 优先使用http代理，避免SSL协议问题
-            proxy_url = http_proxy or https_proxy
-            
-            # 确保代理URL使用http协议
-            if proxy_url and proxy_url.startswith('https://'):
-                proxy_url = proxy_url.replace('https://', 'http://')
-            
-            try:
-                http_client = httpx.Client(
-                    proxy=proxy_url,
-                    timeout=60.0,
-                    follow_redirects=True,
-                    verify=False  # 跳过SSL验证以避免代理SSL问题
-                )
-            except Exception as e:
-                # 如果代理失败，使用直连
-                print(f"代理设置失败，使用直连: {e}")
-                http_client = None
-        
-        # Initialize OpenAI client
-        self.client = OpenAI(
-            api_key=self.config.api_key, 
-            base_url=self.config.base_url,
-            http_client=http_client
-        )
+        # Shared client per (base_url, api_key, proxy), see client_registry
+        self.client = get_openai_client(self.config.api_key, self.config.base_url)
+        self._cache_setting = cache
 
     @classmethod
     def from_env(cls) -> "Executor":
@@ -114,18 +95,42 @@ class Executor:
         # Merge default generation params from config with override params
         merged_params = self.config.generation_params.to_dict()
         merged_params.update(task.agent.config or {})
-        if task.agent.use_tool:
-            merged_params["tools"] = get_all_tools()
+        tools = get_all_tools() if task.agent.use_tool else None
+
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": query},
+        ]
+        cache = resolve_cache(self._cache_setting, merged_params.get("temperature"))
+        cache_key = fingerprint(model, messages, tools, merged_params)
+        if tools:
+            merged_params["tools"] = tools
 
         try:
-            response: ChatCompletion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": query},
-                ],
-                model=model,
-                **merged_params,
-            )
+            cached = cache.lookup(cache_key) if cache else None
+            if cached is not None:
+                response = ChatCompletion.model_validate(cached)
+            else:
+                limiter = get_rate_limiter()
+                ticket = limiter.acquire(
+                    self.config.api_key,
+                    model,
+                    get_token_estimator(model).count_messages(messages, tools)
+                    + (merged_params.get("max_tokens") or DEFAULT_COMPLETION_ESTIMATE),
+                    session_of(context),
+                )
+                try:
+                    response: ChatCompletion = self.client.chat.completions.create(
+                        messages=messages,
+                        model=model,
+                        **merged_params,
+                    )
+                except openai.RateLimitError as e:
+                    limiter.penalize(self.config.api_key, model, retry_after_seconds(e) or 1.0)
+                    raise
+                ticket.settle(response.usage.total_tokens if response.usage else None)
+                if cache:
+                    cache.store(cache_key, model, response.model_dump(mode="json"))
             message: ChatCompletionMessage = response.choices[0].message
 
             if (
@@ -146,10 +151,16 @@ class Executor:
             # Assemble the result from the response
             result = {
                 "response": response.choices[0].message.content,
-                "usage": ExecutionUsage(
-                    prompt=response.usage.prompt_tokens,
-                    completion=response.usage.completion_tokens,
+                "usage": (
+                    ExecutionUsage(prompt=0, completion=0)
+                    if cached is not None
+                    else ExecutionUsage(
+                        prompt=response.usage.prompt_tokens,
+                        completion=response.usage.completion_tokens,
+                        queue_wait=ticket.wait_seconds,
+                    )
                 ),
+                "cached": cached is not None,
             }
 
             task.set_result(result)
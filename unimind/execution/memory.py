@@ -0,0 +1,189 @@
+"""
+Token-budgeted conversation memory.
+
+Every tool result is appended to the conversation, so in multi-round runs the
+prompt grows by a full UI element list or file listing per round. The
+MemoryManager keeps the prompt within a budget derived from the model's
+context length. A prompt within the budget is left untouched; otherwise:
+
+1. Old tool results larger than `max_tool_result_tokens` are summarized
+   (structure kept, long strings and lists shortened), oldest first. The
+   latest observation is always kept in full.
+2. If the prompt still exceeds the budget, old tool results are replaced by
+   a one-line stub, oldest first.
+3. As a last resort, the oldest assistant/tool exchanges are dropped as a
+   whole so every tool message still follows its assistant tool call.
+
+Messages passed as `keep` (e.g. the baselines of incremental observations)
+are never summarized, stubbed or dropped.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from unimind.utils.token_estimator import TokenEstimator, get_token_estimator
+
+DEFAULT_BUDGET_RATIO = 0.6
+DEFAULT_MAX_TOOL_RESULT_TOKENS = 400
+SUMMARY_LIST_ITEMS = 3
+SUMMARY_STRING_CHARS = 200
+OMITTED_RESULT = "[earlier tool result omitted to save tokens]"
+
+
+def summarize_value(value: Any, depth: int = 0) -> Any:
+    """Shorten a JSON value: keep scalars, truncate strings and lists, cap nesting."""
+    if isinstance(value, str):
+        if len(value) > SUMMARY_STRING_CHARS:
+            return value[:SUMMARY_STRING_CHARS] + f"...(+{len(value) - SUMMARY_STRING_CHARS} chars)"
+        return value
+    if isinstance(value, list):
+        if depth >= 2:
+            return f"[{len(value)} items]"
+        items = [summarize_value(item, depth + 1) for item in value[:SUMMARY_LIST_ITEMS]]
+        if len(value) > SUMMARY_LIST_ITEMS:
+            items.append(f"...(+{len(value) - SUMMARY_LIST_ITEMS} items)")
+        return items
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"{{{len(value)} keys}}"
+        return {key: summarize_value(item, depth + 1) for key, item in value.items()}
+    return value
+
+
+def summarize_tool_result(content: str) -> str:
+    """Summarize a JSON-encoded tool result, falling back to truncating plain text."""
+    try:
+        value = json.loads(content)
+    except (TypeError, ValueError):
+        return summarize_value(content)
+    return json.dumps(summarize_value(value), ensure_ascii=False)
+
+
+class MemoryManager:
+    """
+    Keeps conversation messages within a token budget.
+    """
+
+    def __init__(
+        self,
+        context_length: int,
+        budget_ratio: float = DEFAULT_BUDGET_RATIO,
+        max_tool_result_tokens: int = DEFAULT_MAX_TOOL_RESULT_TOKENS,
+        summarizer: Optional[Callable[[str], str]] = None,
+        estimator: Optional[TokenEstimator] = None,
+    ):
+        """
+        Initialize the memory manager.
+
+        Args:
+            context_length: Context length of the model in tokens
+            budget_ratio: Share of the context length the prompt may use; the
+                rest is left for tools and the completion
+            max_tool_result_tokens: Old tool results above this size are summarized
+            summarizer: Optional function summarizing a tool result (e.g. an LLM call),
+                defaults to structural summarization of the JSON
+            estimator: Token estimator of the model, defaults to the generic one
+        """
+        self.context_length = context_length
+        self.budget = int(context_length * budget_ratio)
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.summarizer = summarizer or summarize_tool_result
+        self.estimator = estimator or get_token_estimator()
+
+    def count(self, messages: List[Dict[str, Any]]) -> int:
+        """Estimate the tokens of a list of messages."""
+        return sum(self.estimator.count_message(message) for message in messages)
+
+    @staticmethod
+    def _latest_exchange(messages: List[Dict[str, Any]]) -> int:
+        """Index of the last assistant message with tool calls (start of the latest observation)."""
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].get("role") == "assistant" and messages[index].get("tool_calls"):
+                return index
+        return len(messages)
+
+    def _replace(self, message: Dict[str, Any], content: str) -> int:
+        """Replace the content of a message in place and return the tokens saved."""
+        before = self.estimator.count_message(message)
+        message["content"] = content
+        return max(0, before - self.estimator.count_message(message))
+
+    def compact(
+        self,
+        messages: List[Dict[str, Any]],
+        memory: Optional[List[Dict[str, Any]]] = None,
+        keep: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        """
+        Compact messages in place to fit the token budget.
+
+        Args:
+            messages: Conversation messages; the first (system) message and the
+                latest observation are never touched
+            memory: Optional agent memory sharing message objects with `messages`;
+                dropped exchanges are removed from it as well
+            keep: Messages that must stay unchanged; exchanges containing them
+                are not dropped
+
+        Returns:
+            int: Estimated prompt tokens saved
+        """
+        kept = {id(message) for message in keep}
+        latest = self._latest_exchange(messages)
+        old_results = [
+            message
+            for message in messages[1:latest]
+            if message.get("role") == "tool"
+            and message.get("content") != OMITTED_RESULT
+            and id(message) not in kept
+        ]
+
+        saved = 0
+        total = self.count(messages)
+        if total <= self.budget:
+            return saved
+
+        # 1. Summarize large old tool results, oldest first
+        for message in old_results:
+            if total <= self.budget:
+                return saved
+            if self.estimator.count_message(message) > self.max_tool_result_tokens:
+                summary = self.summarizer(message["content"])
+                if self.estimator.count(summary) < self.estimator.count(message["content"]):
+                    reduced = self._replace(message, summary)
+                    saved += reduced
+                    total -= reduced
+
+        # 2. Replace old tool results with stubs, oldest first
+        for message in old_results:
+            if total <= self.budget:
+                return saved
+            if message.get("content") != OMITTED_RESULT:
+                reduced = self._replace(message, OMITTED_RESULT)
+                saved += reduced
+                total -= reduced
+
+        # 3. Drop the oldest exchanges as a whole
+        index = 1
+        while total > self.budget and index < self._latest_exchange(messages):
+            message = messages[index]
+            if message.get("role") != "assistant":
+                index += 1
+                continue
+            end = index + 1
+            while end < len(messages) and messages[end].get("role") == "tool":
+                end += 1
+            if end > self._latest_exchange(messages):
+                break
+            dropped = messages[index:end]
+            if any(id(message) in kept for message in dropped):
+                index = end
+                continue
+            reduced = self.count(dropped)
+            del messages[index:end]
+            if memory is not None:
+                memory[:] = [item for item in memory if all(item is not drop for drop in dropped)]
+            saved += reduced
+            total -= reduced
+
+        return saved
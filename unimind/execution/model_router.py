@@ -0,0 +1,429 @@
+"""
+Latency- and cost-aware model routing per agent stage.
+
+Agents are configured with one fixed model, whatever the difficulty of the
+stage or the observed behaviour of the endpoint. The ModelRouter picks the
+model for each call from the models of `ModelLibrary` that are enabled:
+
+- a model is eligible for a stage if its quality score reaches the stage's
+  quality floor (and it is multimodal when the stage needs it);
+- the first model tried is never of higher quality than the model the agent
+  is configured with; stronger models are only reached by escalation;
+- eligible models are ranked by the expected cost of the call
+  (`calculate_cost` on the estimated prompt and completion tokens), their
+  EWMA latency and their EWMA error rate;
+- on an exception, an invalid JSON output or a low reported confidence the
+  call escalates to the next, higher quality model.
+
+Validation and response generation have low floors, so the cheap models are
+tried first and the expensive ones are used only on escalation.
+
+The enabled models are read from ``AM_ROUTER_MODELS`` (comma separated) when
+not passed explicitly.
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from unimind.utils.json_cleaner import extract_json
+from unimind.utils.model_info import ModelLibrary, calculate_cost, get_model_info
+
+# Relative output quality of the ModelLibrary models (0-1)
+DEFAULT_QUALITY: Dict[str, float] = {
+    ModelLibrary.GPT_4O_MINI.value.name: 0.6,
+    ModelLibrary.GPT_4O.value.name: 0.85,
+    ModelLibrary.CLAUDE_3_7_SONNET_20250219.value.name: 0.9,
+    ModelLibrary.CLAUDE_3_5_SONNET_20241022.value.name: 0.88,
+    ModelLibrary.CLAUDE_3_5_HAIKU_20241022.value.name: 0.7,
+    ModelLibrary.DEEPSEEK_V3.value.name: 0.75,
+    ModelLibrary.DEEPSEEK_R1.value.name: 0.85,
+}
+
+
+@dataclass(frozen=True)
+class StagePolicy:
+    """Routing requirements of one stage."""
+
+    # Minimum quality score of a model for the stage
+    quality_floor: float = 0.6
+    # Whether the output must contain a JSON object
+    expects_json: bool = True
+    # Whether the model must accept images
+    multimodal: bool = False
+    # Estimated completion tokens of one call, used for the cost estimate
+    completion_tokens: int = 400
+
+
+DEFAULT_STAGE_POLICIES: Dict[str, StagePolicy] = {
+    "intent_analyzer": StagePolicy(quality_floor=0.6),
+    "app_selector": StagePolicy(quality_floor=0.6),
+    "ui_navigator": StagePolicy(quality_floor=0.7, completion_tokens=600),
+    "action_executor": StagePolicy(quality_floor=0.7, completion_tokens=600),
+    "result_validator": StagePolicy(quality_floor=0.5),
+    "conversation_manager": StagePolicy(quality_floor=0.5, expects_json=False, completion_tokens=200),
+    "multimodal_processor": StagePolicy(quality_floor=0.6, multimodal=True),
+}
+DEFAULT_POLICY = StagePolicy()
+
+EWMA_ALPHA = 0.3
+# Outputs reporting a confidence below this value are escalated
+LOW_CONFIDENCE = 0.5
+# Models whose error rate exceeds this value are skipped while others remain
+MAX_ERROR_RATE = 0.5
+# Cost equivalent (USD) of one second of latency and of a 100% error rate
+LATENCY_WEIGHT = 0.001
+ERROR_WEIGHT = 0.01
+# Latency assumed for a model without observations
+DEFAULT_LATENCY = 2.0
+CONFIDENCE_KEYS = ("confidence", "confidence_score")
+
+
+@dataclass
+class ModelStats:
+    """Live EWMA statistics of one model."""
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    escalations: int = 0
+
+    def update(self, latency: float, success: bool, alpha: float = EWMA_ALPHA) -> None:
+        self.calls += 1
+        if not success:
+            self.errors += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += alpha * (latency - self.latency)
+        self.error_rate += alpha * ((0.0 if success else 1.0) - self.error_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": None if self.latency is None else round(self.latency, 3),
+            "error_rate": round(self.error_rate, 4),
+            "calls": self.calls,
+            "errors": self.errors,
+            "escalations": self.escalations,
+        }
+
+
+@dataclass
+class RouteAttempt:
+    """One model call made by `ModelRouter.arun`."""
+
+    model: str
+    latency: float
+    outcome: str
+    reason: str = ""
+
+
+@dataclass
+class RouteResult:
+    """Result of a routed call and the attempts it took."""
+
+    stage: str
+    result: Any = None
+    model: Optional[str] = None
+    attempts: List[RouteAttempt] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "model": self.model,
+            "attempts": [
+                {
+                    "model": attempt.model,
+                    "latency": round(attempt.latency, 3),
+                    "outcome": attempt.outcome,
+                    "reason": attempt.reason,
+                }
+                for attempt in self.attempts
+            ],
+        }
+
+
+def _parse_confidence(value: Any) -> Optional[float]:
+    """Read a confidence given as a number, a numeric string or a percentage."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        text = value.strip().rstrip("%")
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+        if value.strip().endswith("%"):
+            number /= 100
+    elif isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        return None
+    return number / 100 if number > 1 else number
+
+
+def find_confidence(value: Any, depth: int = 0) -> Optional[float]:
+    """Find the first confidence field in a parsed JSON output (searching nested objects)."""
+    if depth > 3:
+        return None
+    if isinstance(value, dict):
+        for key in CONFIDENCE_KEYS:
+            if key in value:
+                confidence = _parse_confidence(value[key])
+                if confidence is not None:
+                    return confidence
+        for item in value.values():
+            confidence = find_confidence(item, depth + 1)
+            if confidence is not None:
+                return confidence
+    elif isinstance(value, list):
+        for item in value[:5]:
+            confidence = find_confidence(item, depth + 1)
+            if confidence is not None:
+                return confidence
+    return None
+
+
+def check_output(
+    output: Any, policy: StagePolicy, low_confidence: float = LOW_CONFIDENCE
+) -> Tuple[bool, str]:
+    """
+    Decide whether an agent output is acceptable or the call should escalate.
+
+    Args:
+        output: The `output` of an agent result
+        policy: Policy of the stage
+        low_confidence: Confidence below which the output is rejected
+
+    Returns:
+        (accepted, reason) where reason explains a rejection
+    """
+    text = output if isinstance(output, str) else str(output or "")
+    if not text.strip():
+        return False, "empty output"
+    if not policy.expects_json:
+        return True, ""
+    parsed = extract_json(text)
+    if not parsed:
+        return False, "invalid JSON"
+    confidence = find_confidence(parsed)
+    if confidence is not None and confidence < low_confidence:
+        return False, f"low confidence {confidence:.2f}"
+    return True, ""
+
+
+class ModelRouter:
+    """
+    Chooses a model per agent call and escalates on failures.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        quality: Optional[Dict[str, float]] = None,
+        policies: Optional[Dict[str, StagePolicy]] = None,
+        low_confidence: float = LOW_CONFIDENCE,
+        max_error_rate: float = MAX_ERROR_RATE,
+        latency_weight: float = LATENCY_WEIGHT,
+        error_weight: float = ERROR_WEIGHT,
+        max_attempts: int = 3,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            models: Enabled model names; defaults to ``AM_ROUTER_MODELS`` or gpt-4o-mini and gpt-4o
+            quality: Quality score per model name, defaults to DEFAULT_QUALITY
+            policies: Policy per stage (agent name), defaults to DEFAULT_STAGE_POLICIES
+            low_confidence: Reported confidence below which an output escalates
+            max_error_rate: EWMA error rate above which a model is avoided
+            latency_weight: Cost equivalent (USD) of one second of expected latency
+            error_weight: Cost equivalent (USD) of a 100% expected error rate
+            max_attempts: Maximum number of models tried per call
+        """
+        if models is None:
+            env_models = os.getenv("AM_ROUTER_MODELS", "")
+            models = [model.strip() for model in env_models.split(",") if model.strip()] or [
+                ModelLibrary.GPT_4O_MINI.value.name,
+                ModelLibrary.GPT_4O.value.name,
+            ]
+        self.models = list(models)
+        self.quality = dict(DEFAULT_QUALITY)
+        self.quality.update(quality or {})
+        self.policies = dict(DEFAULT_STAGE_POLICIES)
+        self.policies.update(policies or {})
+        self.low_confidence = low_confidence
+        self.max_error_rate = max_error_rate
+        self.latency_weight = latency_weight
+        self.error_weight = error_weight
+        self.max_attempts = max_attempts
+        self.stats: Dict[str, ModelStats] = {model: ModelStats() for model in self.models}
+        self._variants: Dict[Tuple[int, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def policy(self, stage: str) -> StagePolicy:
+        """Return the policy of a stage."""
+        return self.policies.get(stage, DEFAULT_POLICY)
+
+    def expected_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Expected USD cost of one call."""
+        return calculate_cost(model, prompt_tokens, completion_tokens)["total_cost"]
+
+    def score(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Routing score of a model (lower is better): cost plus latency and error penalties."""
+        stats = self.stats.setdefault(model, ModelStats())
+        latency = stats.latency if stats.latency is not None else DEFAULT_LATENCY
+        return (
+            self.expected_cost(model, prompt_tokens, completion_tokens)
+            + self.latency_weight * latency
+            + self.error_weight * stats.error_rate
+        )
+
+    def candidates(
+        self, stage: str, prompt_tokens: int = 1000, configured: Optional[str] = None
+    ) -> List[str]:
+        """
+        Rank the models for a call of a stage.
+
+        Args:
+            stage: Stage (agent) name
+            prompt_tokens: Estimated prompt tokens of the call
+            configured: Model the agent is configured with; the first model is
+                never of higher quality (the configured model itself is used
+                when no eligible model is at or below it)
+
+        Returns:
+            List[str]: The first model to try, followed by the escalation chain
+                ordered by increasing quality
+        """
+        policy = self.policy(stage)
+        eligible = [
+            model
+            for model in self.models
+            if self.quality.get(model, 0.0) >= policy.quality_floor
+            and (not policy.multimodal or get_model_info(model).is_multimodal)
+            and get_model_info(model).context_length > prompt_tokens + policy.completion_tokens
+        ]
+        if not eligible:
+            # No model reaches the floor: fall back to the best available ones
+            eligible = sorted(self.models, key=lambda model: -self.quality.get(model, 0.0))[:1]
+
+        ceiling = self.quality.get(configured, 0.0) if configured else None
+        allowed = [
+            model for model in eligible
+            if ceiling is None or self.quality.get(model, 0.0) <= ceiling
+        ]
+
+        with self._lock:
+            healthy = [
+                model for model in allowed
+                if self.stats.setdefault(model, ModelStats()).error_rate <= self.max_error_rate
+            ] or allowed
+            first = min(
+                healthy, key=lambda model: self.score(model, prompt_tokens, policy.completion_tokens)
+            ) if healthy else configured
+        first_quality = self.quality.get(first, 0.0)
+        escalation = sorted(
+            (model for model in eligible if model != first and self.quality.get(model, 0.0) >= first_quality),
+            key=lambda model: (
+                self.quality.get(model, 0.0),
+                self.score(model, prompt_tokens, policy.completion_tokens),
+            ),
+        )
+        return [first] + escalation
+
+    def record(self, model: str, latency: float, success: bool) -> None:
+        """Record the latency and outcome of a call."""
+        with self._lock:
+            self.stats.setdefault(model, ModelStats()).update(latency, success)
+
+    def variant(self, agent: Any, model: str) -> Any:
+        """
+        Return the agent configured with a model.
+
+        Variants are clones kept per (agent, model), so concurrent calls never
+        switch the model of a shared agent.
+        """
+        if agent.model == model:
+            return agent
+        key = (id(agent), model)
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is None or variant.instructions != agent.instructions:
+                variant = agent.clone()
+                variant.set_model(model)
+                self._variants[key] = variant
+            return variant
+
+    async def arun(
+        self,
+        stage: str,
+        agent: Any,
+        call: Callable[[Any], Awaitable[Dict[str, Any]]],
+        prompt_tokens: Optional[int] = None,
+        prompt: str = "",
+    ) -> RouteResult:
+        """
+        Run an agent call on the routed model, escalating when needed.
+
+        Args:
+            stage: Stage (agent) name selecting the policy
+            agent: The configured agent; variants with other models are derived from it
+            call: Coroutine function running the call on the given agent, e.g.
+                ``lambda agent: agent.aprocess(context, prompt)``
+            prompt_tokens: Estimated prompt tokens (estimated from `prompt` if None)
+            prompt: The prompt, used only for the token estimate
+
+        Returns:
+            RouteResult with the accepted (or last) result and all attempts
+
+        Raises:
+            Exception: The last error if every attempted model raised
+        """
+        if prompt_tokens is None:
+            prompt_tokens = agent.token_estimator.count(agent.instructions + prompt)
+        policy = self.policy(stage)
+        route = RouteResult(stage)
+        last_error: Optional[Exception] = None
+
+        candidates = self.candidates(stage, prompt_tokens, agent.model)
+        for index, model in enumerate(candidates[: self.max_attempts]):
+            if index > 0:
+                with self._lock:
+                    self.stats[route.attempts[-1].model].escalations += 1
+            started = time.perf_counter()
+            try:
+                result = await call(self.variant(agent, model))
+            except Exception as e:
+                latency = time.perf_counter() - started
+                self.record(model, latency, False)
+                route.attempts.append(RouteAttempt(model, latency, "error", str(e)))
+                last_error = e
+                continue
+
+            latency = time.perf_counter() - started
+            self.record(model, latency, True)
+            route.result = result
+            route.model = model
+            accepted, reason = check_output(result.get("output"), policy, self.low_confidence)
+            route.attempts.append(
+                RouteAttempt(model, latency, "accepted" if accepted else "rejected", reason)
+            )
+            if accepted:
+                break
+            print(f"Debug: {stage} output from {model} rejected ({reason}), escalating")
+
+        if route.model is None and last_error is not None:
+            raise last_error
+        return route
+
+    def report(self) -> Dict[str, Any]:
+        """Return the live statistics of every model."""
+        with self._lock:
+            return {
+                model: dict(stats.to_dict(), quality=self.quality.get(model))
+                for model, stats in self.stats.items()
+            }
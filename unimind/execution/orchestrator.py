@@ -0,0 +1,234 @@
+"""
+Concurrent multi-agent execution driven by the message bus.
+
+The Runner and handoffs run one agent at a time, and an `inform_*` message
+waits until its target is next active. The Orchestrator runs agents as
+asyncio tasks on a shared Context instead:
+
+- primary tasks start together, and a handoff starts the target agent with
+  the handoff instructions as soon as the handing-off run ends;
+- watcher agents (e.g. `result_validator` while `action_executor` acts) sleep
+  until a message for them arrives on the context's message bus, then run
+  with the queued messages as input;
+- one agent object never runs twice at once, and a global semaphore caps the
+  number of concurrent runs (``AM_MAX_CONCURRENT_AGENTS``);
+- device tools are arbitrated by a DeviceArbiter set on the context, so reads
+  overlap while taps, inputs and screen dumps get the device to themselves.
+
+The report compares the wall time with the sum of all run times, which is
+what the sequential Runner would have taken for the same runs.
+"""
+
+import os
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from unimind.context import Context
+from unimind.tool.device_arbiter import DeviceArbiter
+from .agent import Agent
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("AM_MAX_CONCURRENT_AGENTS", 3))
+# Runs of one watcher per orchestration, to stop message ping-pong
+DEFAULT_MAX_WAKEUPS = 5
+# Handoff chain length per primary task, like Runner's max_iterations
+DEFAULT_MAX_HANDOFFS = 5
+
+
+@dataclass
+class AgentTask:
+    """An agent and the input it runs with."""
+
+    agent: Agent
+    input: str
+    max_iterations: Optional[int] = None
+
+
+@dataclass
+class AgentRun:
+    """Timing and outcome of one agent run."""
+
+    agent: str
+    trigger: str
+    started: float
+    finished: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "agent": self.agent,
+            "trigger": self.trigger,
+            "start": round(self.started - origin, 4),
+            "duration": round(self.duration, 4),
+            "reason": self.result.get("reason") if self.result else None,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _Watcher:
+    task: AgentTask
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    wakeups: int = 0
+
+
+class Orchestrator:
+    """
+    Runs agents concurrently on one Context, woken by handoffs and messages.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_wakeups: int = DEFAULT_MAX_WAKEUPS,
+        max_handoffs: int = DEFAULT_MAX_HANDOFFS,
+    ):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            max_concurrency: Maximum number of agent runs at the same time
+            max_wakeups: Maximum runs of each watcher per orchestration
+            max_handoffs: Maximum handoffs following one primary task
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_wakeups = max_wakeups
+        self.max_handoffs = max_handoffs
+
+    async def arun(
+        self,
+        context: Context,
+        tasks: Sequence[AgentTask],
+        watchers: Sequence[AgentTask] = (),
+    ) -> Dict[str, Any]:
+        """
+        Run the primary tasks concurrently, with the watchers woken by messages.
+
+        Args:
+            context: Shared context (message bus, history, usage)
+            tasks: Tasks started immediately; their handoffs are followed
+            watchers: Agents run whenever a message for them is queued,
+                with the task input followed by the messages
+
+        Returns:
+            Dict with the `results` of every run per agent, the `runs` in start
+            order and the `report` of wall time versus sequential time
+        """
+        loop = asyncio.get_running_loop()
+        if context.device_arbiter is None:
+            context.device_arbiter = DeviceArbiter()
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        agent_locks: Dict[int, asyncio.Lock] = {}
+        runs: List[AgentRun] = []
+        running = 0
+        peak = 0
+        origin = time.monotonic()
+
+        async def run_agent(task: AgentTask, input_text: str, trigger: str) -> Optional[Dict]:
+            nonlocal running, peak
+            lock = agent_locks.setdefault(id(task.agent), asyncio.Lock())
+            async with lock, semaphore:
+                running += 1
+                peak = max(peak, running)
+                run = AgentRun(task.agent.name, trigger, time.monotonic())
+                runs.append(run)
+                try:
+                    run.result = await task.agent.aprocess(
+                        context, input_text, max_iterations=task.max_iterations
+                    )
+                except Exception as e:
+                    run.error = f"{type(e).__name__}: {e}"
+                    print(f"Warning: {task.agent.name} failed in orchestration: {run.error}")
+                finally:
+                    run.finished = time.monotonic()
+                    running -= 1
+                return run.result
+
+        async def follow(task: AgentTask) -> None:
+            """Run a primary task and the chain of handoffs it starts."""
+            result = await run_agent(task, task.input, "task")
+            for _ in range(self.max_handoffs):
+                handoff = result and result.get("handoff")
+                if not handoff or not handoff.get("to"):
+                    return
+                trigger = f"handoff:{task.agent.name}"
+                next_input = handoff.get("instruction") or result.get("output") or task.input
+                task = AgentTask(handoff["to"], next_input, task.max_iterations)
+                result = await run_agent(task, next_input, trigger)
+
+        watching = {watcher.agent.name: _Watcher(watcher) for watcher in watchers}
+
+        def on_message(target: str) -> None:
+            # Called by the bus in the sending thread
+            watcher = watching.get(target)
+            if watcher is not None:
+                loop.call_soon_threadsafe(watcher.wake.set)
+
+        context.message_queue.subscribe(on_message)
+
+        async def watch(watcher: _Watcher) -> None:
+            name = watcher.task.agent.name
+            while watcher.wakeups < self.max_wakeups:
+                await watcher.wake.wait()
+                watcher.wake.clear()
+                if not context.has_messages(name):
+                    continue
+                watcher.wakeups += 1
+                # The queued messages are appended to the input by the agent
+                await run_agent(watcher.task, watcher.task.input, "message")
+
+        for name, watcher in watching.items():
+            if context.has_messages(name):
+                watcher.wake.set()
+        watcher_tasks = [asyncio.create_task(watch(watcher)) for watcher in watching.values()]
+        try:
+            await asyncio.gather(*(follow(task) for task in tasks))
+            # Let the watchers handle what the primary tasks sent last
+            while any(
+                context.has_messages(name) and watcher.wakeups < self.max_wakeups
+                for name, watcher in watching.items()
+            ) or any(lock.locked() for lock in agent_locks.values()):
+                await asyncio.sleep(0.01)
+        finally:
+            context.message_queue.unsubscribe(on_message)
+            for watcher_task in watcher_tasks:
+                watcher_task.cancel()
+            await asyncio.gather(*watcher_tasks, return_exceptions=True)
+
+        wall_time = time.monotonic() - origin
+        sequential_time = sum(run.duration for run in runs)
+        results: Dict[str, List[Dict]] = {}
+        for run in runs:
+            if run.result is not None:
+                results.setdefault(run.agent, []).append(run.result)
+        return {
+            "results": results,
+            "runs": [run.to_dict(origin) for run in runs],
+            "report": {
+                "wall_time": round(wall_time, 4),
+                "sequential_time": round(sequential_time, 4),
+                "saved": round(sequential_time - wall_time, 4),
+                "speedup": round(sequential_time / wall_time, 2) if wall_time > 0 else 1.0,
+                "peak_concurrency": peak,
+                "runs": len(runs),
+                "failed": sum(1 for run in runs if run.error),
+                "message_bus": context.message_queue.stats(),
+                "devices": context.device_arbiter.stats(),
+            },
+        }
+
+    def run(
+        self,
+        context: Context,
+        tasks: Sequence[AgentTask],
+        watchers: Sequence[AgentTask] = (),
+    ) -> Dict[str, Any]:
+        """Synchronous wrapper of `arun`."""
+        return asyncio.run(self.arun(context, tasks, watchers))
@@ -0,0 +1,356 @@
+"""
+Client-side rate limiting of chat completion requests.
+
+Providers enforce quotas in requests per minute (RPM) and tokens per minute
+(TPM) per API key and model. When several sessions run agents at once they
+exceed the quota together, receive 429s and retry into the same wall. The
+RateLimiter keeps requests within the quota before they are sent:
+
+- one pair of token buckets (RPM and TPM) per (API key, model);
+- a request reserves one request and its estimated tokens (prompt estimate
+  plus expected completion), and settles the difference with the actual
+  `usage` afterwards;
+- waiting requests are queued per session and granted round-robin across
+  sessions, so one busy session cannot starve the others;
+- a 429 pauses the bucket pair for the server's Retry-After.
+
+Limits come from ``AM_RATE_LIMIT_RPM`` and ``AM_RATE_LIMIT_TPM`` (0 disables
+a limit), and can be set per model with `RateLimiter.set_limit`.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200000
+# Completion tokens assumed for a request without max_tokens
+DEFAULT_COMPLETION_ESTIMATE = 512
+# Upper bound of one wait before the queue is re-checked (seconds)
+MAX_WAIT_SLICE = 1.0
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Quota of one (API key, model); 0 means unlimited."""
+
+    rpm: int = DEFAULT_RPM
+    tpm: int = DEFAULT_TPM
+
+    @classmethod
+    def from_env(cls) -> "RateLimit":
+        return cls(
+            rpm=int(os.getenv("AM_RATE_LIMIT_RPM", DEFAULT_RPM)),
+            tpm=int(os.getenv("AM_RATE_LIMIT_TPM", DEFAULT_TPM)),
+        )
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously up to its capacity. Not thread-safe;
+    the owning ModelLimiter holds the lock.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (after `refill`)."""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or charge (negative) tokens; the level may go into debt."""
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Ticket:
+    """A request waiting for, or holding, its reservation."""
+
+    session: str
+    tokens: int
+    enqueued: float = field(default_factory=time.monotonic)
+    granted_at: Optional[float] = None
+    event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[asyncio.Future] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    limiter: Optional["ModelLimiter"] = None
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    @property
+    def wait_seconds(self) -> float:
+        """Time spent in the queue."""
+        if self.granted_at is None:
+            return time.monotonic() - self.enqueued
+        return self.granted_at - self.enqueued
+
+    def _wake(self) -> None:
+        self.event.set()
+        if self.future is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(
+                lambda: self.future.done() or self.future.set_result(None)
+            )
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Correct the token reservation with the actual usage of the request."""
+        if self.limiter is not None and actual_tokens is not None:
+            self.limiter.settle(self, actual_tokens)
+
+
+class ModelLimiter:
+    """
+    RPM/TPM buckets and the fair queue of one (API key, model).
+    """
+
+    def __init__(self, name: str, limit: RateLimit):
+        self.name = name
+        self.limit = limit
+        self.requests = TokenBucket(limit.rpm)
+        self.tokens = TokenBucket(limit.tpm)
+        self.paused_until = 0.0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._queues: "OrderedDict[str, Deque[Ticket]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_limit(self, limit: RateLimit) -> None:
+        with self._lock:
+            self.limit = limit
+            self.requests = TokenBucket(limit.rpm)
+            self.tokens = TokenBucket(limit.tpm)
+
+    def _dispatch(self) -> float:
+        """
+        Grant queued tickets in round-robin session order while the buckets allow.
+
+        Returns:
+            float: Seconds until the next ticket can be granted (0 if the queue is empty)
+        """
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        while self._queues:
+            session, queue = next(iter(self._queues.items()))
+            ticket = queue[0]
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(ticket.tokens))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            queue.popleft()
+            # The session goes to the back of the rotation
+            del self._queues[session]
+            if queue:
+                self._queues[session] = queue
+            ticket.granted_at = now
+            self.granted += 1
+            self.total_wait += ticket.wait_seconds
+            self.max_wait = max(self.max_wait, ticket.wait_seconds)
+            ticket._wake()
+        return 0.0
+
+    def _enqueue(self, ticket: Ticket) -> float:
+        with self._lock:
+            self._queues.setdefault(ticket.session, deque()).append(ticket)
+            return self._dispatch()
+
+    def _poll(self, ticket: Ticket) -> float:
+        with self._lock:
+            if ticket.granted:
+                return 0.0
+            return self._dispatch()
+
+    def _abandon(self, ticket: Ticket) -> None:
+        """Remove a cancelled ticket from the queue."""
+        with self._lock:
+            queue = self._queues.get(ticket.session)
+            if queue and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del self._queues[ticket.session]
+
+    def acquire(self, tokens: int, session: str) -> Ticket:
+        """Block until the request may be sent."""
+        ticket = Ticket(session, tokens, limiter=self)
+        wait = self._enqueue(ticket)
+        while not ticket.granted:
+            ticket.event.wait(min(max(wait, 0.001), MAX_WAIT_SLICE))
+            wait = self._poll(ticket)
+        return ticket
+
+    async def aacquire(self, tokens: int, session: str) -> Ticket:
+        """Wait without blocking the event loop until the request may be sent."""
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(session, tokens, future=loop.create_future(), loop=loop, limiter=self)
+        wait = self._enqueue(ticket)
+        try:
+            while not ticket.granted:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(ticket.future), min(max(wait, 0.001), MAX_WAIT_SLICE)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                wait = self._poll(ticket)
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+        return ticket
+
+    def settle(self, ticket: Ticket, actual_tokens: int) -> None:
+        with self._lock:
+            self.tokens.adjust(min(ticket.tokens, self.tokens.capacity or ticket.tokens) - actual_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Stop granting for `seconds` (after a 429) and drain the request bucket."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.requests.level = min(self.requests.level, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "limiter": self.name,
+                "rpm": self.limit.rpm,
+                "tpm": self.limit.tpm,
+                "available_requests": None if self.requests.unlimited else round(self.requests.level, 1),
+                "available_tokens": None if self.tokens.unlimited else round(self.tokens.level),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "sessions_waiting": len(self._queues),
+                "granted": self.granted,
+                "avg_wait": round(self.total_wait / self.granted, 4) if self.granted else 0.0,
+                "max_wait": round(self.max_wait, 4),
+                "paused_for": round(max(0.0, self.paused_until - now), 3),
+            }
+
+
+def _key_id(api_key: Optional[str]) -> str:
+    """Short, non-reversible id of an API key."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+class RateLimiter:
+    """
+    Registry of ModelLimiters keyed by (API key, model).
+    """
+
+    def __init__(self, default_limit: Optional[RateLimit] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            default_limit: Quota of models without an explicit limit, defaults to the environment
+        """
+        self.default_limit = default_limit or RateLimit.from_env()
+        self._limits: Dict[str, RateLimit] = {}
+        self._limiters: Dict[Tuple[str, str], ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def set_limit(self, model: str, rpm: int, tpm: int) -> None:
+        """Set the quota of a model for every API key."""
+        limit = RateLimit(rpm, tpm)
+        with self._lock:
+            self._limits[model] = limit
+            limiters = [limiter for (_, name), limiter in self._limiters.items() if name == model]
+        for limiter in limiters:
+            limiter.set_limit(limit)
+
+    def limiter(self, api_key: Optional[str], model: str) -> ModelLimiter:
+        """Get the limiter of an (API key, model)."""
+        key = (_key_id(api_key), model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = ModelLimiter(
+                    f"{key[0]}:{model}", self._limits.get(model, self.default_limit)
+                )
+            return limiter
+
+    def acquire(
+        self, api_key: Optional[str], model: str, tokens: int, session: str = "default"
+    ) -> Ticket:
+        """
+        Reserve capacity for one request, blocking until it is granted.
+
+        Args:
+            api_key: API key the request is sent with
+            model: Model of the request
+            tokens: Estimated prompt plus completion tokens
+            session: Session id used for fair queuing
+
+        Returns:
+            Ticket with `wait_seconds`; call `ticket.settle(actual_tokens)` after the response
+        """
+        return self.limiter(api_key, model).acquire(tokens, session)
+
+    async def aacquire(
+        self, api_key: Optional[str], model: str, tokens: int, session: str = "default"
+    ) -> Ticket:
+        """Async variant of `acquire`."""
+        return await self.limiter(api_key, model).aacquire(tokens, session)
+
+    def penalize(self, api_key: Optional[str], model: str, seconds: float) -> None:
+        """Pause an (API key, model) after the server answered 429."""
+        self.limiter(api_key, model).pause(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state of every limiter."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter shared by all agents and executors."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
+
+
+def session_of(context: Any) -> str:
+    """Fair-queuing session id of a context (its `session_id`, or the object identity)."""
+    session = getattr(context, "session_id", None)
+    return str(session) if session else f"context-{id(context)}"
@@ -0,0 +1,303 @@
+"""
+Persistent cache of chat completion responses keyed by request fingerprint.
+
+Identical requests (same model, messages, tools and generation parameters) are
+answered from an on-disk SQLite store with size-bounded LRU eviction. The cache
+has four modes:
+
+- ``off``: never read or write
+- ``read_write``: answer hits from the cache, store misses (default)
+- ``record``: always call the API and overwrite the stored response
+- ``replay``: answer only from the cache; a miss raises `CacheMissError`,
+  which makes offline benchmark runs fail loudly instead of calling the API
+
+The process-wide default cache is configured with the environment variables
+``AM_LLM_CACHE`` (mode), ``AM_LLM_CACHE_PATH`` and ``AM_LLM_CACHE_MAX_ENTRIES``.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+MODE_OFF = "off"
+MODE_READ_WRITE = "read_write"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODES = (MODE_OFF, MODE_READ_WRITE, MODE_RECORD, MODE_REPLAY)
+
+DEFAULT_PATH = os.path.join(".cache", "llm_responses.sqlite")
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def fingerprint(
+    model: str,
+    messages: List[Dict],
+    tools: Optional[List[Dict]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Compute the cache key of a chat completion request.
+
+    Args:
+        model: Model name
+        messages: Request messages
+        tools: Optional tool definitions
+        params: Optional generation parameters
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical JSON form of the request
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "tools": tools or None,
+            "params": params or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def completion_to_dict(
+    model: str,
+    content: Optional[str],
+    tool_calls: List[Dict],
+    usage: Any = None,
+) -> Dict[str, Any]:
+    """
+    Build a ChatCompletion-shaped dict from assembled (e.g. streamed) response parts.
+
+    Args:
+        model: Model name
+        content: Message content
+        tool_calls: Tool calls as dicts with `id`, `name` and `arguments`
+        usage: Optional usage object with prompt/completion/total token counts
+
+    Returns:
+        Dict that `ChatCompletion.model_validate` accepts
+    """
+    return {
+        "id": f"cached-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": [
+                        {
+                            "id": tool_call["id"],
+                            "type": "function",
+                            "function": {
+                                "name": tool_call["name"],
+                                "arguments": tool_call["arguments"],
+                            },
+                        }
+                        for tool_call in tool_calls
+                    ]
+                    or None,
+                },
+            }
+        ],
+        "usage": (
+            {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens,
+            }
+            if usage
+            else None
+        ),
+    }
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        mode: str = MODE_READ_WRITE,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file (":memory:" for a process-local cache)
+            max_entries: Maximum number of stored responses before LRU eviction
+            mode: One of "off", "read_write", "record" or "replay"
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode: {mode}, expected one of {MODES}")
+        self.path = path
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is consulted at all."""
+        return self.mode != MODE_OFF
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response according to the cache mode.
+
+        Args:
+            key: Request fingerprint
+
+        Returns:
+            The stored ChatCompletion dict, or None if the API should be called
+
+        Raises:
+            CacheMissError: In replay mode when the key is not stored
+        """
+        if self.mode in (MODE_OFF, MODE_RECORD):
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                    (time.time(), key),
+                )
+                self._conn.commit()
+
+        if row is None:
+            if self.mode == MODE_REPLAY:
+                raise CacheMissError(f"No recorded response for request {key[:12]}")
+            return None
+        return json.loads(row[0])
+
+    def store(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        """
+        Store a response and evict the least recently used entries beyond the bound.
+
+        Args:
+            key: Request fingerprint
+            model: Model name
+            response: ChatCompletion dict
+        """
+        if self.mode not in (MODE_READ_WRITE, MODE_RECORD):
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, last_access, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model, json.dumps(response, ensure_ascii=False), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the entry count and hit/miss counters of this process."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> None:
+        """Delete all stored responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """Get the process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                path=os.getenv("AM_LLM_CACHE_PATH", DEFAULT_PATH),
+                max_entries=int(os.getenv("AM_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                mode=os.getenv("AM_LLM_CACHE", MODE_READ_WRITE),
+            )
+        return _default_cache
+
+
+def resolve_cache(cache: Any, temperature: Optional[float]) -> Optional[ResponseCache]:
+    """
+    Resolve an agent's cache setting.
+
+    Args:
+        cache: True/False to opt in/out, a ResponseCache instance, or None for the default
+        temperature: The agent's sampling temperature (None means the API default)
+
+    Returns:
+        The cache to use, or None if caching is disabled for the agent
+
+    By default only deterministic agents (temperature 0) use the cache, except in
+    record/replay mode where every agent does so that whole runs can be replayed.
+    """
+    if isinstance(cache, ResponseCache):
+        return cache if cache.enabled else None
+    if cache is False:
+        return None
+    mode = os.getenv("AM_LLM_CACHE", MODE_READ_WRITE)
+    if mode == MODE_OFF:
+        return None
+    if cache is None and mode == MODE_READ_WRITE and temperature != 0:
+        return None
+    return get_default_cache()
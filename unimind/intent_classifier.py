@@ -0,0 +1,471 @@
+"""
+本地意图快速识别
+Local Intent Classifier
+
+在调用意图理解智能体之前，用本地分类器识别常见请求：
+    - 关键词自动机（Aho–Corasick）：一次扫描匹配全部意图关键词和槽位词，
+      重叠的关键词只保留最长的一个（"查询话费" 不会再额外计入 "话费"）
+    - 字符 n-gram 朴素贝叶斯模型（可选）：从历史请求的标注语料训练，
+      语料为 JSONL，每行 {"text": "帮我查下话费", "intent": "balance_query"}
+
+返回意图、任务分类、置信度和提取的槽位（目标APP、场景模式、开关、金额、流量大小）。
+置信度足够高时，通用AI助手直接跳过意图理解和APP选择两个LLM阶段。
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 意图
+INTENT_BALANCE_QUERY = "balance_query"
+INTENT_DATA_USAGE_QUERY = "data_usage_query"
+INTENT_PHONE_AUTO_ANSWER = "phone_auto_answer"
+INTENT_BENEFITS_CLAIM = "benefits_claim"
+INTENT_MESSAGE = "message"
+INTENT_SHOPPING = "shopping"
+INTENT_TRAVEL = "travel"
+INTENT_ENTERTAINMENT = "entertainment"
+
+# 高置信度阈值：达到后跳过意图理解和APP选择
+HIGH_CONFIDENCE = 0.75
+
+# 关键词得分归一化时的平滑项，单个强关键词（权重1.0）的置信度为 0.8
+KEYWORD_SMOOTHING = 0.25
+
+# 意图规则：分类取值与 TaskCategory 一致，app 为 supported_apps 中的默认APP键名。
+# 意图按声明顺序决定同分时的优先级（与原先 if/elif 的判断顺序一致）
+INTENT_RULES: Dict[str, Dict[str, Any]] = {
+    INTENT_BALANCE_QUERY: {
+        "category": "联通电信服务",
+        "app": "unicom_main",
+        "keywords": {
+            "话费": 1.0, "余额": 0.5, "查询话费": 1.0, "话费余额": 1.0,
+            "剩余话费": 1.0, "查询余额": 1.0,
+        },
+    },
+    INTENT_DATA_USAGE_QUERY: {
+        "category": "联通电信服务",
+        "app": "unicom_main",
+        "keywords": {
+            "流量": 1.0, "剩余流量": 1.0, "通用流量": 1.0, "剩余通用流量": 1.0,
+            "查询流量": 1.0, "数据流量": 1.0, "流量使用": 1.0,
+        },
+    },
+    INTENT_PHONE_AUTO_ANSWER: {
+        "category": "联通电信服务",
+        "app": None,
+        "keywords": {
+            "电话代接": 1.0, "智能代接": 1.0, "代接": 1.0, "自动接听": 1.0, "智能接听": 1.0,
+            "代接设置": 1.0, "开启代接": 1.0, "关闭代接": 1.0, "代接状态": 1.0,
+            "场景模式": 1.0, "工作模式": 1.0, "休息模式": 1.0, "驾驶模式": 1.0,
+            "会议模式": 1.0, "学习模式": 1.0, "外卖模式": 1.0, "忙碌模式": 1.0, "医院模式": 1.0,
+            "电话设置": 1.0, "来电设置": 1.0, "来电管理": 1.0, "电话回复": 1.0,
+            "陌生电话": 1.0, "自定义回复": 1.0, "来电": 0.5,
+        },
+    },
+    INTENT_BENEFITS_CLAIM: {
+        "category": "联通电信服务",
+        "app": "unicom_main",
+        "keywords": {
+            "权益领取": 1.0, "领取权益": 1.0, "优惠券": 1.0, "领券": 1.0,
+            "积分权益": 1.0, "联通积分": 1.0, "会员权益": 1.0, "权益": 1.0, "领取": 0.5,
+        },
+    },
+    INTENT_MESSAGE: {
+        "category": "消息通讯",
+        "app": None,
+        "keywords": {"消息": 1.0, "聊天": 1.0, "回复": 0.5, "朋友圈": 1.0, "微信": 0.5, "qq": 0.5},
+    },
+    INTENT_SHOPPING: {
+        "category": "购物商务",
+        "app": None,
+        "keywords": {"购物": 1.0, "下单": 1.0, "买": 0.5, "商品": 1.0, "淘宝": 0.5, "京东": 0.5},
+    },
+    INTENT_TRAVEL: {
+        "category": "出行导航",
+        "app": None,
+        "keywords": {"导航": 1.0, "出行": 1.0, "地图": 1.0, "打车": 1.0, "叫车": 1.0, "路线": 1.0},
+    },
+    INTENT_ENTERTAINMENT: {
+        "category": "娱乐服务",
+        "app": None,
+        "keywords": {"视频": 1.0, "音乐": 1.0, "游戏": 1.0, "娱乐": 1.0, "直播": 1.0},
+    },
+}
+
+# 槽位词：关键词 -> (槽位名, 槽位值)
+SLOT_KEYWORDS: Dict[str, Tuple[str, str]] = {
+    # 目标APP（supported_apps 中的键名）
+    "联通": ("app", "unicom_main"),
+    "营业厅": ("app", "unicom_main"),
+    "沃钱包": ("app", "unicom_payment"),
+    "沃视频": ("app", "unicom_video"),
+    "微信": ("app", "wechat"),
+    "qq": ("app", "qq"),
+    "淘宝": ("app", "taobao"),
+    "京东": ("app", "jd"),
+    "高德": ("app", "amap"),
+    "滴滴": ("app", "didi"),
+    # 电话代接场景模式
+    "工作模式": ("scenario_mode", "work"),
+    "会议模式": ("scenario_mode", "meeting"),
+    "外卖模式": ("scenario_mode", "delivery"),
+    "驾驶模式": ("scenario_mode", "driving"),
+    "休息模式": ("scenario_mode", "rest"),
+    "学习模式": ("scenario_mode", "study"),
+    "忙碌模式": ("scenario_mode", "busy"),
+    "医院模式": ("scenario_mode", "hospital"),
+    # 开关
+    "开启": ("toggle", "on"),
+    "启用": ("toggle", "on"),
+    "打开": ("toggle", "on"),
+    "关闭": ("toggle", "off"),
+    "停用": ("toggle", "off"),
+}
+
+AMOUNT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*元")
+DATA_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(gb|mb|g|m)(?![a-z])", re.IGNORECASE)
+
+
+class AhoCorasick:
+    """
+    Aho–Corasick 多模式匹配自动机
+
+    add() 添加模式串及其附带数据，build() 编译失配指针后即可用 iter_matches() 扫描文本，
+    匹配耗时只与文本长度和命中数量有关，与关键词数量无关。
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self.payloads: List[List[Any]] = []
+        self._index: Dict[str, int] = {}
+        self._built = False
+
+    def add(self, pattern: str, payload: Any = None) -> None:
+        """添加模式串，同一模式串可附带多个数据"""
+        if not pattern:
+            return
+        if pattern in self._index:
+            self.payloads[self._index[pattern]].append(payload)
+            return
+
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+
+        index = len(self.patterns)
+        self._index[pattern] = index
+        self.patterns.append(pattern)
+        self.payloads.append([payload])
+        self._output[node].append(index)
+        self._built = False
+
+    def build(self) -> "AhoCorasick":
+        """广度优先计算失配指针并合并输出"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        扫描文本
+
+        Yields:
+            (起始位置, 结束位置, 模式串序号)
+        """
+        if not self._built:
+            self.build()
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._output[node]:
+                yield position + 1 - len(self.patterns[index]), position + 1, index
+
+    def longest_matches(self, text: str) -> List[Tuple[int, int, int]]:
+        """返回互不重叠的最左最长匹配"""
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        end = 0
+        for start, stop, index in matches:
+            if start >= end:
+                selected.append((start, stop, index))
+                end = stop
+        return selected
+
+
+class CharNgramModel:
+    """
+    字符 n-gram 多项式朴素贝叶斯分类器
+
+    以字符 1~max_n 元组为特征，适合短小的中文请求，训练和预测都是纯计数运算。
+    """
+
+    def __init__(self, max_n: int = 3, alpha: float = 0.5):
+        """
+        Args:
+            max_n: 最大 n-gram 长度
+            alpha: 拉普拉斯平滑系数
+        """
+        self.max_n = max_n
+        self.alpha = alpha
+        self.class_counts: Counter = Counter()
+        self.feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.feature_totals: Counter = Counter()
+        self.vocabulary: set = set()
+
+    def features(self, text: str) -> List[str]:
+        """提取字符 n-gram（忽略空白）"""
+        text = re.sub(r"\s+", "", text.lower())
+        return [
+            text[i:i + n]
+            for n in range(1, self.max_n + 1)
+            for i in range(len(text) - n + 1)
+        ]
+
+    def fit(self, samples: List[Tuple[str, str]]) -> "CharNgramModel":
+        """用 (文本, 意图) 样本训练"""
+        for text, intent in samples:
+            features = self.features(text)
+            self.class_counts[intent] += 1
+            self.feature_counts[intent].update(features)
+            self.feature_totals[intent] += len(features)
+            self.vocabulary.update(features)
+        return self
+
+    @classmethod
+    def from_jsonl(cls, path: str, **kwargs) -> "CharNgramModel":
+        """从标注语料训练，每行 {"text": ..., "intent": ...}，无法解析的行跳过"""
+        samples = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("text") and record.get("intent"):
+                    samples.append((record["text"], record["intent"]))
+        return cls(**kwargs).fit(samples)
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """预测各意图的后验概率"""
+        if not self.class_counts:
+            return {}
+        features = self.features(text)
+        total_samples = sum(self.class_counts.values())
+        vocabulary_size = len(self.vocabulary) + 1
+
+        log_scores = {}
+        for intent, count in self.class_counts.items():
+            denominator = self.feature_totals[intent] + self.alpha * vocabulary_size
+            counts = self.feature_counts[intent]
+            log_scores[intent] = math.log(count / total_samples) + sum(
+                math.log((counts[feature] + self.alpha) / denominator) for feature in features
+            )
+
+        peak = max(log_scores.values())
+        exp_scores = {intent: math.exp(score - peak) for intent, score in log_scores.items()}
+        total = sum(exp_scores.values())
+        return {intent: score / total for intent, score in exp_scores.items()}
+
+
+@dataclass
+class IntentResult:
+    """意图识别结果"""
+    intent: Optional[str]
+    category: Optional[str]
+    confidence: float
+    slots: Dict[str, Any] = field(default_factory=dict)
+    keywords: List[str] = field(default_factory=list)
+    source: str = "keyword"
+
+    def is_confident(self, threshold: float = HIGH_CONFIDENCE) -> bool:
+        """置信度是否达到阈值"""
+        return self.intent is not None and self.confidence >= threshold
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "category": self.category,
+            "confidence": round(self.confidence, 3),
+            "slots": self.slots,
+            "keywords": self.keywords,
+            "source": self.source,
+        }
+
+
+class IntentClassifier:
+    """
+    本地意图分类器
+
+    关键词自动机给出各意图的得分，训练了 n-gram 模型时与模型概率按 model_weight 加权融合。
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, Dict[str, Any]]] = None,
+        slot_keywords: Optional[Dict[str, Tuple[str, str]]] = None,
+        model: Optional[CharNgramModel] = None,
+        model_weight: float = 0.5,
+    ):
+        """
+        初始化分类器
+
+        Args:
+            rules: 意图规则，默认使用 INTENT_RULES
+            slot_keywords: 槽位词，默认使用 SLOT_KEYWORDS
+            model: 已训练的 n-gram 模型，可选
+            model_weight: 模型概率在融合中的权重
+        """
+        self.rules = rules or INTENT_RULES
+        self.model = model
+        self.model_weight = model_weight
+        self._priority = {intent: order for order, intent in enumerate(self.rules)}
+
+        self._intent_automaton = AhoCorasick()
+        for intent, rule in self.rules.items():
+            for keyword, weight in rule["keywords"].items():
+                self._intent_automaton.add(keyword.lower(), (intent, weight))
+        self._intent_automaton.build()
+
+        self._slot_automaton = AhoCorasick()
+        for keyword, slot in (slot_keywords or SLOT_KEYWORDS).items():
+            self._slot_automaton.add(keyword.lower(), slot)
+        self._slot_automaton.build()
+
+    @classmethod
+    def from_corpus(cls, path: Optional[str] = None, **kwargs) -> "IntentClassifier":
+        """
+        创建分类器，语料文件存在时同时训练 n-gram 模型
+
+        Args:
+            path: 标注语料路径，默认读取环境变量 AM_INTENT_CORPUS
+        """
+        path = path or os.getenv("AM_INTENT_CORPUS")
+        model = CharNgramModel.from_jsonl(path) if path and os.path.exists(path) else None
+        return cls(model=model, **kwargs)
+
+    def keyword_scores(self, text: str) -> Tuple[Dict[str, float], List[str]]:
+        """关键词自动机得分及命中的关键词"""
+        scores: Dict[str, float] = defaultdict(float)
+        keywords = []
+        for _, _, index in self._intent_automaton.longest_matches(text):
+            keywords.append(self._intent_automaton.patterns[index])
+            for intent, weight in self._intent_automaton.payloads[index]:
+                scores[intent] += weight
+        return dict(scores), keywords
+
+    def extract_slots(self, text: str) -> Dict[str, Any]:
+        """提取槽位，同一槽位取第一次出现的值"""
+        slots: Dict[str, Any] = {}
+        for _, _, index in self._slot_automaton.longest_matches(text):
+            for name, value in self._slot_automaton.payloads[index]:
+                slots.setdefault(name, value)
+
+        amount = AMOUNT_PATTERN.search(text)
+        if amount:
+            slots["amount"] = float(amount.group(1))
+        data_size = DATA_SIZE_PATTERN.search(text)
+        if data_size:
+            unit = data_size.group(2).upper()
+            slots["data_size"] = f"{data_size.group(1)}{unit if len(unit) == 2 else unit + 'B'}"
+        return slots
+
+    def classify(self, text: str) -> IntentResult:
+        """
+        识别意图
+
+        Args:
+            text: 用户输入
+
+        Returns:
+            IntentResult: 无法识别时 intent 为 None、置信度为 0
+        """
+        lowered = text.lower()
+        scores, keywords = self.keyword_scores(lowered)
+        slots = self.extract_slots(lowered)
+
+        total = sum(scores.values())
+        probabilities = {intent: score / (total + KEYWORD_SMOOTHING) for intent, score in scores.items()}
+        source = "keyword"
+
+        model_probabilities = self.model.predict_proba(text) if self.model else {}
+        # 语料中没有对应规则的标签无法给出分类和APP，不参与识别（概率不重新归一化，置信度随之降低）
+        model_probabilities = {
+            intent: probability for intent, probability in model_probabilities.items() if intent in self.rules
+        }
+        if model_probabilities:
+            if probabilities:
+                weight = self.model_weight
+                probabilities = {
+                    intent: (1 - weight) * probabilities.get(intent, 0.0)
+                    + weight * model_probabilities.get(intent, 0.0)
+                    for intent in set(probabilities) | set(model_probabilities)
+                }
+                source = "combined"
+            else:
+                probabilities = model_probabilities
+                source = "model"
+
+        if not probabilities:
+            return IntentResult(None, None, 0.0, slots, keywords, source)
+
+        intent = max(
+            probabilities,
+            key=lambda name: (probabilities[name], -self._priority.get(name, len(self._priority))),
+        )
+        rule = self.rules.get(intent, {})
+        if rule.get("app") and "app" not in slots:
+            slots["app"] = rule["app"]
+        return IntentResult(intent, rule.get("category"), probabilities[intent], slots, keywords, source)
+
+
+_default_classifier: Optional[IntentClassifier] = None
+_default_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """获取进程共享的分类器（首次调用时编译自动机并训练模型）"""
+    global _default_classifier
+    with _default_lock:
+        if _default_classifier is None:
+            _default_classifier = IntentClassifier.from_corpus()
+        return _default_classifier
+
+
+def classify_intent(text: str) -> IntentResult:
+    """使用共享分类器识别意图"""
+    return get_intent_classifier().classify(text)
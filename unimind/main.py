@@ -13,7 +13,7 @@ import asyncio
 from rich.console import Console
 from rich.panel import Panel
 from rich.align import Align
-from .universal_ai_assistant import universal_ai_assistant, run_universal_assistant
+from .universal_ai_assistant import universal_ai_assistant, run_universal_assistant, get_assistant_pool
 
 console = Console()
 interrupt_counter = 0
@@ -206,6 +206,13 @@ def print_result(result: dict, output_format: str = "simple"):
 async def interactive_mode():
     """交互式模式"""
     print_welcome()
+    
+    # 启动时预热助手池，之后的指令复用已创建的助手
+    try:
+        await get_assistant_pool().awarm()
+    except Exception as e:
+        console.print(f"⚠️ [yellow]助手预热失败，将在首个指令时重试: {e}[/yellow]")
+    
     console.print("\n💡 [yellow]提示: 输入 'quit' 或 'exit' 退出程序[/yellow]\n")
     
     while True:
@@ -0,0 +1,217 @@
+"""
+流水线阶段调度器
+Pipeline Stage Scheduler
+
+通用AI助手的各阶段原本严格串行等待。调度器把阶段作为 asyncio 任务启动，
+允许推测性阶段（例如根据本地意图预先选择APP、预热设备）与意图理解并行执行：
+    - start(): 启动阶段，after 记录其依赖的阶段（用于计算关键路径）
+    - adopt(): 推测结果被采用
+    - cancel(): 推测落空，取消阶段并记为浪费
+    - settle(): 等待已取消阶段仍在运行的线程结束
+    - report(): 输出各阶段耗时、关键路径以及并行节省的时间
+"""
+
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# 阶段状态
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+@dataclass
+class StageRecord:
+    """单个阶段的执行记录"""
+    name: str
+    after: List[str] = field(default_factory=list)
+    speculative: bool = False
+    status: str = RUNNING
+    started: float = 0.0
+    finished: Optional[float] = None
+    adopted: Optional[bool] = None
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "after": self.after,
+            "speculative": self.speculative,
+            "status": self.status,
+            "adopted": self.adopted,
+            "started": round(self.started, 3),
+            "finished": None if self.finished is None else round(self.finished, 3),
+            "elapsed": None if self.elapsed is None else round(self.elapsed, 3),
+        }
+
+
+class StageScheduler:
+    """
+    阶段调度器，每个请求创建一个
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.records: Dict[str, StageRecord] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # 在线程中执行的阶段：取消只能放弃结果，线程仍会执行完
+        self.threads: Dict[str, asyncio.Future] = {}
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def start(
+        self,
+        name: str,
+        awaitable: Awaitable,
+        after: Sequence[str] = (),
+        speculative: bool = False,
+    ) -> asyncio.Task:
+        """
+        启动阶段
+
+        Args:
+            name: 阶段名称（每个请求内唯一）
+            awaitable: 阶段协程
+            after: 该阶段依赖的阶段名称
+            speculative: 是否为推测性阶段，结果可能被丢弃
+
+        Returns:
+            asyncio.Task: 阶段任务
+        """
+        record = StageRecord(name, list(after), speculative, started=self._now())
+        self.records[name] = record
+
+        async def run():
+            try:
+                result = await awaitable
+            except asyncio.CancelledError:
+                record.status = CANCELLED
+                raise
+            except Exception:
+                record.status = FAILED
+                raise
+            else:
+                record.status = DONE
+                return result
+            finally:
+                record.finished = self._now()
+
+        task = asyncio.ensure_future(run())
+        self.tasks[name] = task
+        return task
+
+    def start_thread(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        after: Sequence[str] = (),
+        speculative: bool = False,
+    ) -> asyncio.Task:
+        """
+        在线程中启动阶段（如ADB操作），取消后可用 settle() 等待线程结束
+
+        Args:
+            name: 阶段名称（每个请求内唯一）
+            func: 在线程中执行的函数
+            *args: 函数参数
+            after: 该阶段依赖的阶段名称
+            speculative: 是否为推测性阶段，结果可能被丢弃
+        """
+        thread = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        self.threads[name] = thread
+        return self.start(name, asyncio.shield(thread), after, speculative)
+
+    async def settle(self) -> None:
+        """等待已取消阶段仍在运行的线程结束，避免其与后续阶段同时操作设备"""
+        pending = [
+            thread for name, thread in self.threads.items()
+            if self.records[name].status == CANCELLED and not thread.done()
+        ]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run(self, name: str, awaitable: Awaitable, after: Sequence[str] = ()) -> Any:
+        """启动阶段并等待其结果"""
+        return await self.start(name, awaitable, after)
+
+    def adopt(self, name: str) -> None:
+        """标记推测阶段的结果被采用"""
+        if name in self.records:
+            self.records[name].adopted = True
+
+    def cancel(self, name: str) -> None:
+        """取消推测落空的阶段"""
+        record = self.records.get(name)
+        if record is None:
+            return
+        record.adopted = False
+        task = self.tasks.get(name)
+        if task and not task.done():
+            task.cancel()
+            record.status = CANCELLED
+            record.finished = self._now()
+
+    def cancel_pending(self) -> None:
+        """取消所有未完成的阶段（请求失败时调用）"""
+        for name, task in self.tasks.items():
+            if not task.done():
+                self.cancel(name)
+
+    def critical_path(self) -> List[str]:
+        """
+        计算关键路径：从最后完成的阶段出发，沿依赖回溯最晚完成的前驱阶段
+        """
+        finished = {
+            name: record for name, record in self.records.items()
+            if record.status == DONE and record.adopted is not False
+        }
+        if not finished:
+            return []
+        current = max(finished.values(), key=lambda record: record.finished)
+        path = [current.name]
+        while True:
+            predecessors = [finished[name] for name in current.after if name in finished]
+            if not predecessors:
+                break
+            current = max(predecessors, key=lambda record: record.finished)
+            path.append(current.name)
+        return list(reversed(path))
+
+    def report(self) -> Dict[str, Any]:
+        """
+        输出阶段耗时报告
+
+        Returns:
+            包含 stages、critical_path、wall_time、sequential_time（有效阶段耗时之和）、
+            overlap_saved（并行节省的时间）和 wasted（落空推测的阶段及耗时）
+        """
+        wall_time = self._now()
+        path = self.critical_path()
+        useful = [
+            record for record in self.records.values()
+            if record.status == DONE and record.adopted is not False
+        ]
+        wasted = [record for record in self.records.values() if record.adopted is False]
+        sequential_time = sum(record.elapsed for record in useful)
+        return {
+            "wall_time": round(wall_time, 3),
+            "stages": [record.to_dict() for record in self.records.values()],
+            "critical_path": [
+                {"name": name, "elapsed": round(self.records[name].elapsed, 3)} for name in path
+            ],
+            "sequential_time": round(sequential_time, 3),
+            "overlap_saved": round(max(0.0, sequential_time - wall_time), 3),
+            "wasted": [
+                {"name": record.name, "elapsed": round(record.elapsed or 0.0, 3)} for record in wasted
+            ],
+        }
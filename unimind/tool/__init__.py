@@ -1,7 +1,8 @@
 from .tools import Tools
 from .tool_decorator import tool
-from .utils import get_tool, get_all_tools, execute_tool
+from .registry import tool_registry, ToolRegistry
+from .utils import get_tool, get_all_tools, get_registered_tools, execute_tool, is_read_only_tool
 from .app_automation_tools import AppAutomationTools
 
 
-__all__ = ["tool", "get_tool", "get_all_tools", "execute_tool", "Tools", "AppAutomationTools"]
+__all__ = ["tool", "tool_registry", "ToolRegistry", "get_tool", "get_all_tools", "get_registered_tools", "execute_tool", "is_read_only_tool", "Tools", "AppAutomationTools"]
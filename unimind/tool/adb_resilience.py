@@ -0,0 +1,70 @@
+"""
+ADB命令重试与熔断
+ADB Command Resilience
+
+USB抖动、adb守护进程重启或设备短暂离线时，ADB命令会以可识别的错误信息失败，
+这些失败发生在命令到达设备之前，重试是安全的。其他失败（包括超时）不重试，
+以免重复执行点击、输入等非幂等操作。
+
+每台设备一个熔断器：设备持续离线时直接快速失败，不再让每个工具调用各自等待超时。
+"""
+
+from typing import Callable, Optional, Tuple
+
+from unimind.utils.resilience import CircuitOpenError, call_with_retry
+
+# 命令未到达设备的错误信息（小写匹配）
+ADB_TRANSIENT_ERRORS = (
+    "device offline",
+    "no devices/emulators found",
+    "error: closed",
+    "protocol fault",
+    "cannot connect to daemon",
+    "daemon not running",
+    "connection reset",
+    "device still authorizing",
+)
+
+ADB_MAX_ATTEMPTS = 3
+ADB_BASE_DELAY = 0.5
+ADB_MAX_DELAY = 4.0
+
+
+def is_transient_adb_failure(result: Tuple[bool, str]) -> bool:
+    """判断 (是否成功, 输出) 形式的ADB结果是否为可重试的瞬时失败"""
+    success, output = result
+    if success:
+        return False
+    output = (output or "").lower()
+    return any(marker in output for marker in ADB_TRANSIENT_ERRORS)
+
+
+def run_adb_resilient(
+    run: Callable[[], Tuple[bool, str]],
+    device_id: Optional[str] = None,
+    name: str = "adb",
+) -> Tuple[bool, str]:
+    """
+    带重试和熔断地执行一条ADB命令
+
+    Args:
+        run: 执行一次命令并返回 (是否成功, 输出) 的函数
+        device_id: 设备ID，用作熔断器的键
+        name: 重试统计中使用的名称
+
+    Returns:
+        (是否成功, 输出)；熔断器打开时返回失败及原因
+    """
+    try:
+        return call_with_retry(
+            run,
+            name=name,
+            max_attempts=ADB_MAX_ATTEMPTS,
+            base_delay=ADB_BASE_DELAY,
+            max_delay=ADB_MAX_DELAY,
+            exceptions=(),
+            endpoint=f"adb:{device_id or 'default'}",
+            retry_on_result=is_transient_adb_failure,
+        )
+    except CircuitOpenError as e:
+        return False, str(e)
@@ -8,11 +8,17 @@ App Automation Tools
 import os
 import json
 import time
+import uuid
 import subprocess
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from pathlib import Path
 from .tool_decorator import tool
+from .ui_dump import parse_ui_elements
+from .scroll_collector import ScrollCollector
+from .app_lifecycle import AppLifecycleManager
+from .adb_resilience import run_adb_resilient
+from .value_extractor import ValueExtractor, BALANCE_PROFILE, DATA_USAGE_PROFILE
 from .phone_auto_answer import phone_manager, ScenarioMode
 
 # 尝试导入可选依赖
@@ -64,6 +70,13 @@ class AppAutomationTools:
         self.screenshot_dir = "screenshots"
         os.makedirs(self.screenshot_dir, exist_ok=True)
         
+        # 话费/流量数值提取器
+        self.balance_extractor = ValueExtractor(BALANCE_PROFILE)
+        self.data_usage_extractor = ValueExtractor(DATA_USAGE_PROFILE)
+        
+        # 按设备缓存的APP生命周期管理器
+        self.app_managers: Dict[Optional[str], AppLifecycleManager] = {}
+        
         # 初始化ADB路径
         try:
             self.adb_path = self._find_adb_path()
@@ -165,7 +178,7 @@ class AppAutomationTools:
         
         raise FileNotFoundError(error_msg)
 
-    @tool
+    @tool(read_only=True)
     def get_installed_apps(self, device_id: str = None) -> Dict[str, Any]:
         """
         获取设备上已安装的应用列表
@@ -215,7 +228,51 @@ class AppAutomationTools:
                 "apps": []
             }
     
-    @tool
+    def _run_adb(self, command: str, device_id: str = None) -> Tuple[bool, str]:
+        """执行ADB子命令，返回 (是否成功, 输出)；设备短暂离线时自动重试"""
+        cmd_args = [self.adb_path]
+        if device_id:
+            cmd_args.extend(["-s", device_id])
+        cmd_args.extend(command.split())
+
+        def run_once() -> Tuple[bool, str]:
+            try:
+                result = subprocess.run(cmd_args, capture_output=True, text=True, timeout=15)
+                if result.returncode == 0:
+                    return True, result.stdout.strip()
+                return False, result.stderr.strip()
+            except Exception as e:
+                return False, str(e)
+
+        return run_adb_resilient(run_once, device_id, name="app_automation.adb")
+
+    def get_app_manager(self, device_id: str = None) -> AppLifecycleManager:
+        """获取指定设备的APP生命周期管理器"""
+        if device_id not in self.app_managers:
+            self.app_managers[device_id] = AppLifecycleManager(
+                lambda command: self._run_adb(command, device_id),
+                ready_delay=2.0
+            )
+        return self.app_managers[device_id]
+
+    @tool(read_only=True)
+    def get_app_launch_stats(self, package_name: str = None, device_id: str = None) -> Dict[str, Any]:
+        """
+        获取APP冷/热启动统计
+        
+        Args:
+            package_name: 应用包名，为空时返回所有应用
+            device_id: 设备ID
+            
+        Returns:
+            各应用的冷启动、热启动次数及平均耗时
+        """
+        return {
+            "success": True,
+            "stats": self.get_app_manager(device_id).get_stats(package_name)
+        }
+    
+    @tool(read_only=True)
     def check_app_status(self, package_name: str, device_id: str = None) -> Dict[str, Any]:
         """
         检查指定应用的状态
@@ -289,14 +346,22 @@ class AppAutomationTools:
         try:
             device_param = f"-s {device_id}" if device_id else ""
             
-            # 使用找到的ADB路径
+            if not activity:
+                # 启动主Activity：已在前台则复用，已在后台则切回前台，否则冷启动
+                launch_result = self.get_app_manager(device_id).ensure_foreground(package_name)
+                if not launch_result["success"]:
+                    launch_result["message"] = f"启动应用失败: {launch_result['message']}"
+                    return launch_result
+                launch_result.update({
+                    "message": f"应用 {package_name} 启动成功",
+                    "launch_time": time.time(),
+                    "status": self.check_app_status(package_name, device_id)
+                })
+                return launch_result
+            
+            # 启动指定Activity
             adb_path = self.adb_path
-            if activity:
-                # 启动指定Activity
-                cmd = f'"{adb_path}" {device_param} shell am start -n {package_name}/{activity}'
-            else:
-                # 启动主Activity
-                cmd = f'"{adb_path}" {device_param} shell monkey -p {package_name} -c android.intent.category.LAUNCHER 1'
+            cmd = f'"{adb_path}" {device_param} shell am start -n {package_name}/{activity}'
             
             result = subprocess.run(
                 cmd, shell=True, capture_output=True, text=True, timeout=15
@@ -330,7 +395,7 @@ class AppAutomationTools:
                 "package_name": package_name
             }
     
-    @tool
+    @tool(read_only=True)
     def get_screen_content(self, device_id: str = None, include_ocr: bool = True) -> Dict[str, Any]:
         """
         获取当前屏幕内容
@@ -344,7 +409,8 @@ class AppAutomationTools:
         """
         try:
             timestamp = int(time.time())
-            screenshot_path = os.path.join(self.screenshot_dir, f"screen_{timestamp}.png")
+            # 只读工具可能并发执行，文件名带随机后缀避免同一秒内互相覆盖
+            screenshot_path = os.path.join(self.screenshot_dir, f"screen_{timestamp}_{uuid.uuid4().hex[:8]}.png")
             
             # 使用列表参数执行截屏命令
             adb_path = self.adb_path
@@ -445,7 +511,7 @@ class AppAutomationTools:
             self.logger.warning(f"屏幕唤醒失败: {e}")
             return False
 
-    @tool
+    @tool(read_only=True)
     def find_elements(self, text: str = None, description: str = None, device_id: str = None) -> Dict[str, Any]:
         """
         在屏幕上查找UI元素
@@ -460,6 +526,9 @@ class AppAutomationTools:
         """
         def _get_ui_elements(retry_count: int = 0) -> Dict[str, Any]:
             """内部函数：获取UI元素，支持重试"""
+            # 只读工具可能并发执行，每次调用使用独立的设备端和本地文件
+            dump_name = f"ui_dump_{uuid.uuid4().hex[:12]}.xml"
+            device_file = f"/sdcard/{dump_name}"
             try:
                 # 使用列表参数执行ADB命令
                 adb_path = self.adb_path
@@ -468,7 +537,7 @@ class AppAutomationTools:
                 dump_cmd = [adb_path]
                 if device_id:
                     dump_cmd.extend(["-s", device_id])
-                dump_cmd.extend(["shell", "uiautomator", "dump", "/sdcard/ui_dump.xml"])
+                dump_cmd.extend(["shell", "uiautomator", "dump", device_file])
                 
                 # 执行UI dump命令
                 result = subprocess.run(dump_cmd, timeout=15, capture_output=True, text=True)
@@ -483,9 +552,16 @@ class AppAutomationTools:
                 pull_cmd = [adb_path]
                 if device_id:
                     pull_cmd.extend(["-s", device_id])
-                pull_cmd.extend(["pull", "/sdcard/ui_dump.xml", "."])
+                pull_cmd.extend(["pull", device_file, dump_name])
                 
                 result = subprocess.run(pull_cmd, timeout=10, capture_output=True, text=True)
+                
+                # 清理设备上的临时文件
+                rm_cmd = [adb_path]
+                if device_id:
+                    rm_cmd.extend(["-s", device_id])
+                rm_cmd.extend(["shell", "rm", "-f", device_file])
+                subprocess.run(rm_cmd, timeout=10, capture_output=True, text=True)
                 if result.returncode != 0:
                     return {
                         "success": False,
@@ -498,7 +574,7 @@ class AppAutomationTools:
                 ui_file = None
                 
                 # 检查可能的文件名（处理扩展名截断问题）
-                for filename in ["ui_dump.xml", "ui_dump.xm"]:
+                for filename in [dump_name, dump_name[:-1]]:
                     if os.path.exists(filename):
                         ui_file = filename
                         break
@@ -509,53 +585,7 @@ class AppAutomationTools:
                             content = f.read()
                             
                             # 解析所有有用的UI元素
-                            import re
-                            import xml.etree.ElementTree as ET
-                            
-                            try:
-                                root = ET.fromstring(content)
-                                all_nodes = root.findall('.//node')
-                                
-                                for node in all_nodes:
-                                    node_text = node.get('text', '').strip()
-                                    content_desc = node.get('content-desc', '').strip()
-                                    bounds = node.get('bounds', '')
-                                    clickable = node.get('clickable', 'false')
-                                    
-                                    # 只处理有效的UI元素
-                                    if bounds and bounds != '[0,0][0,0]':
-                                        # 解析坐标
-                                        coord_match = re.match(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]', bounds)
-                                        if coord_match:
-                                            x1, y1, x2, y2 = map(int, coord_match.groups())
-                                            
-                                            # 有文本、描述或可点击的元素
-                                            if node_text or content_desc or clickable == 'true':
-                                                display_text = node_text or content_desc or f"可点击元素[{x1},{y1}]"
-                                                found_elements.append({
-                                                    "text": display_text,
-                                                    "bounds": bounds,
-                                                    "center_x": int((x1 + x2) / 2),
-                                                    "center_y": int((y1 + y2) / 2),
-                                                    "clickable": clickable == 'true',
-                                                    "raw_text": node_text,
-                                                    "content_desc": content_desc
-                                                })
-                                
-                            except ET.ParseError:
-                                # 如果XML解析失败，使用正则表达式
-                                node_pattern = r'<node[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"[^>]*/?>'
-                                matches = re.findall(node_pattern, content)
-                                for match in matches:
-                                    x1, y1, x2, y2 = map(int, match)
-                                    if (x1, y1, x2, y2) != (0, 0, 0, 0):
-                                        found_elements.append({
-                                            "text": f"UI元素[{x1},{y1}]",
-                                            "bounds": f"[{x1},{y1}][{x2},{y2}]",
-                                            "center_x": int((x1 + x2) / 2),
-                                            "center_y": int((y1 + y2) / 2),
-                                            "clickable": True
-                                        })
+                            found_elements = parse_ui_elements(content, with_container=True)
                             
                             # 如果指定了搜索文本，进行筛选
                             if text:
@@ -768,6 +798,27 @@ class AppAutomationTools:
                 }
             }
     
+    def scroll_collect(self, container: Any = None, until: Callable[[Dict[str, Any]], bool] = None,
+                       device_id: str = None, max_pages: int = 10) -> Iterator[Dict[str, Any]]:
+        """
+        在长列表中逐页滑动并采集元素
+        
+        Args:
+            container: 滚动容器（bounds字符串或元素字典），None表示整个屏幕
+            until: 目标判断函数，命中后立即停止滑动
+            device_id: 设备ID
+            max_pages: 最多采集的页数
+            
+        Yields:
+            去重后的新元素
+        """
+        collector = ScrollCollector(
+            dump=lambda: self.find_elements(device_id=device_id).get("elements", []),
+            swipe=lambda x1, y1, x2, y2: self.swipe_gesture(x1, y1, x2, y2, device_id=device_id),
+            max_pages=max_pages
+        )
+        return collector.collect(container, until)
+    
     @tool
     def press_key(self, key_code: str, device_id: str = None) -> Dict[str, Any]:
         """
@@ -865,7 +916,7 @@ class AppAutomationTools:
                 "coordinates": (x, y)
             }
     
-    @tool
+    @tool(read_only=True)
     def capture_screenshot(self, filename: str = None, device_id: str = None) -> Dict[str, Any]:
         """
         截取屏幕截图
@@ -880,7 +931,7 @@ class AppAutomationTools:
         try:
             if filename is None:
                 timestamp = int(time.time())
-                filename = f"screenshot_{timestamp}.png"
+                filename = f"screenshot_{timestamp}_{uuid.uuid4().hex[:8]}.png"
             
             screenshot_path = os.path.join(self.screenshot_dir, filename)
             device_param = f"-s {device_id}" if device_id else ""
@@ -1160,168 +1211,7 @@ class AppAutomationTools:
         Returns:
             提取到的余额信息或None
         """
-        import re
-        
-        balance_candidates = []
-        
-        # 遍历所有元素，查找金额
-        for i, elem in enumerate(elements):
-            text = elem.get('text', '').strip()
-            if not text:
-                continue
-                
-            # 方法1：查找包含完整金额的文本（如"66.60元"）
-            money_pattern = r'(\d+(?:\.\d{1,2})?)\s*[元￥¥]'
-            money_matches = re.findall(money_pattern, text)
-            
-            # 方法2：查找纯数字金额（如"66.60"），然后检查相邻元素
-            pure_number_pattern = r'^(\d+(?:\.\d{1,2})?)$'
-            pure_number_match = re.match(pure_number_pattern, text)
-            
-            # 处理完整金额文本
-            if money_matches:
-                for amount in money_matches:
-                    candidate = self._create_balance_candidate(amount, text, i, elements, "完整金额文本")
-                    balance_candidates.append(candidate)
-            
-            # 处理纯数字金额（重点改进部分）
-            elif pure_number_match:
-                amount = pure_number_match.group(1)
-                candidate = self._create_balance_candidate(amount, text, i, elements, "纯数字金额")
-                
-                # 检查相邻元素是否有货币符号
-                currency_bonus = 0
-                nearby_currency = []
-                for j in range(max(0, i-2), min(len(elements), i+3)):  # 检查前后2个元素
-                    if j != i and j < len(elements):
-                        neighbor_text = elements[j].get('text', '').strip()
-                        if neighbor_text in ['¥', '￥', '元']:
-                            currency_bonus = 80  # 高分奖励
-                            nearby_currency.append(f"相邻货币符号: {neighbor_text}")
-                            
-                candidate['context_score'] += currency_bonus
-                candidate['context'].extend(nearby_currency)
-                
-                # 特别检查：紧密相邻的"剩余话费"标题（重点加分）
-                title_proximity_bonus = 0
-                for j in range(max(0, i-3), i):  # 检查前3个元素
-                    if j < len(elements):
-                        neighbor_text = elements[j].get('text', '').strip().lower()
-                        if '剩余话费' in neighbor_text:
-                            distance = i - j
-                            if distance == 1:  # 紧挨着
-                                title_proximity_bonus = 200
-                                candidate['context'].append(f"紧挨着剩余话费标题(距离{distance})")
-                            elif distance == 2:  # 中间隔一个元素（可能是货币符号）
-                                title_proximity_bonus = 180
-                                candidate['context'].append(f"非常接近剩余话费标题(距离{distance})")
-                            elif distance == 3:
-                                title_proximity_bonus = 120
-                                candidate['context'].append(f"接近剩余话费标题(距离{distance})")
-                            break
-                
-                candidate['context_score'] += title_proximity_bonus
-                
-                # 检查是否在页面顶部位置（通过元素索引判断）
-                if i <= 15:  # 前15个元素认为是顶部
-                    candidate['context_score'] += 40
-                    candidate['context'].append("位于页面顶部区域")
-                
-                balance_candidates.append(candidate)
-        
-        # 按语义得分排序
-        balance_candidates.sort(key=lambda x: x['context_score'], reverse=True)
-        
-        # 输出分析结果
-        self.logger.info(f"🧠 智能分析找到 {len(balance_candidates)} 个金额候选")
-        for i, candidate in enumerate(balance_candidates[:5]):  # 显示前5个
-            self.logger.info(f"  {i+1}. {candidate['amount']} (得分: {candidate['context_score']})")
-            self.logger.info(f"     原文: {candidate['element_text']}")
-            self.logger.info(f"     元素位置: 第{candidate['element_index']+1}个")
-            self.logger.info(f"     上下文: {'; '.join(candidate['context'])}")
-        
-        # 返回得分最高的候选
-        if balance_candidates and balance_candidates[0]['context_score'] > 0:
-            best_candidate = balance_candidates[0]
-            return {
-                'amount': best_candidate['amount'],
-                'raw_amount': best_candidate['raw_amount'],
-                'context': best_candidate['element_text'],
-                'score': best_candidate['context_score']
-            }
-        
-        return None
-
-    def _create_balance_candidate(self, amount: str, text: str, element_index: int, elements: List[Dict[str, Any]], source_type: str) -> Dict[str, Any]:
-        """创建金额候选"""
-        candidate = {
-            'amount': f"{amount}元",
-            'raw_amount': float(amount),
-            'element_text': text,
-            'element_index': element_index,
-            'context_score': 0,
-            'context': [f"来源: {source_type}"]
-        }
-        
-        # 分析当前元素的语义上下文
-        text_lower = text.lower()
-        
-        # 高优先级关键词（明确表示余额）
-        high_priority_keywords = ['剩余', '余额', '可用', '账户余额', '话费余额', '当前余额']
-        for keyword in high_priority_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] += 60
-                candidate['context'].append(f"包含关键词: {keyword}")
-        
-        # 中优先级关键词
-        medium_priority_keywords = ['话费', '余量', '当前']
-        for keyword in medium_priority_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] += 30
-                candidate['context'].append(f"包含关键词: {keyword}")
-        
-        # 负面关键词（表示不是余额）
-        negative_keywords = ['充值', '缴费', '交费', '套餐', '售价', '优惠', '立即', '领取', '券', '福利', '不可使用', '暂不可使用']
-        for keyword in negative_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] -= 50
-                candidate['context'].append(f"负面关键词: {keyword}")
-        
-        # 检查邻近元素的语义上下文（重点增强）
-        context_range = 3  # 检查前后3个元素
-        for j in range(max(0, element_index-context_range), min(len(elements), element_index+context_range+1)):
-            if j == element_index:
-                continue
-            if j < len(elements):
-                neighbor = elements[j]
-                neighbor_text = neighbor.get('text', '').strip().lower()
-                
-                # 高优先级邻近元素
-                if any(keyword in neighbor_text for keyword in high_priority_keywords):
-                    distance_bonus = max(30 - abs(j - element_index) * 10, 10)  # 距离越近分数越高
-                    candidate['context_score'] += distance_bonus
-                    candidate['context'].append(f"邻近关键元素(距离{abs(j-element_index)}): {neighbor_text}")
-                
-                # 中优先级邻近元素
-                elif any(keyword in neighbor_text for keyword in medium_priority_keywords):
-                    distance_bonus = max(20 - abs(j - element_index) * 5, 5)
-                    candidate['context_score'] += distance_bonus
-                    candidate['context'].append(f"邻近相关元素(距离{abs(j-element_index)}): {neighbor_text}")
-                
-                # 负面邻近元素
-                elif any(keyword in neighbor_text for keyword in negative_keywords):
-                    candidate['context_score'] -= 30
-                    candidate['context'].append(f"邻近负面元素: {neighbor_text}")
-        
-        # 金额合理性检查
-        if 0.01 <= candidate['raw_amount'] <= 9999:  # 合理的话费余额范围
-            candidate['context_score'] += 15
-            candidate['context'].append("金额在合理范围内")
-        else:
-            candidate['context_score'] -= 30
-            candidate['context'].append("金额可能不合理")
-        
-        return candidate
+        return self.balance_extractor.extract(elements)
 
     def _check_if_in_app(self, elements: List[Dict[str, Any]], app_name: str = "联通") -> bool:
         """检查是否还在目标APP内"""
@@ -1383,26 +1273,18 @@ class AppAutomationTools:
                 
                 if device_id:
                     self.logger.info(f"📱 检测到设备: {device_id}")
-                    # 使用monkey命令启动联通APP
-                    launch_cmd = [self.adb_path, "-s", device_id, "shell", "monkey", "-p", "com.sinovatech.unicom.ui", "-c", "android.intent.category.LAUNCHER", "1"]
-                    launch_result = subprocess.run(launch_cmd, capture_output=True, text=True, timeout=10)
-                    
-                    if launch_result.returncode == 0:
-                        self.logger.info("✅ 联通APP启动成功")
-                        time.sleep(5)  # 等待APP完全启动
+                    # 已在前台则复用，已在后台则切回前台，否则冷启动（失败时使用am start备用方案）
+                    launch_result = self.get_app_manager(device_id).ensure_foreground(
+                        "com.sinovatech.unicom.ui", activity=".MainActivity"
+                    )
+                    if launch_result["success"]:
+                        self.logger.info(f"✅ 联通APP已就绪（{launch_result['mode']}，{launch_result['elapsed']}s）")
                     else:
-                        self.logger.info("🔄 尝试备用启动方案...")
-                        backup_cmd = [self.adb_path, "-s", device_id, "shell", "am", "start", "-n", "com.sinovatech.unicom.ui/.MainActivity"]
-                        backup_result = subprocess.run(backup_cmd, capture_output=True, text=True, timeout=10)
-                        if backup_result.returncode == 0:
-                            self.logger.info("✅ 备用方案启动成功")
-                            time.sleep(5)
-                        else:
-                            return {
-                                "success": False,
-                                "message": f"APP启动失败: {backup_result.stderr}",
-                                "query_time": str(datetime.now())
-                            }
+                        return {
+                            "success": False,
+                            "message": f"APP启动失败: {launch_result['message']}",
+                            "query_time": str(datetime.now())
+                        }
                 else:
                     return {
                         "success": False,
@@ -1559,184 +1441,7 @@ class AppAutomationTools:
         Returns:
             提取到的流量信息或None
         """
-        import re
-        
-        data_candidates = []
-        
-        # 遍历所有元素，查找流量数据
-        for i, elem in enumerate(elements):
-            text = elem.get('text', '').strip()
-            if not text:
-                continue
-                
-            # 方法1：查找包含完整流量的文本（如"2.5GB"、"500MB"）
-            data_pattern = r'(\d+(?:\.\d+)?)\s*(GB|MB|TB|g|m|t)'
-            data_matches = re.findall(data_pattern, text, re.IGNORECASE)
-            
-            # 方法2：查找纯数字流量（如"2.5"），然后检查相邻元素
-            pure_number_pattern = r'^(\d+(?:\.\d+)?)$'
-            pure_number_match = re.match(pure_number_pattern, text)
-            
-            # 处理完整流量文本
-            if data_matches:
-                for amount, unit in data_matches:
-                    candidate = self._create_data_candidate(amount, unit.upper(), text, i, elements, "完整流量文本")
-                    data_candidates.append(candidate)
-            
-            # 处理纯数字流量（重点改进部分）
-            elif pure_number_match:
-                amount = pure_number_match.group(1)
-                
-                # 检查相邻元素是否有流量单位
-                unit_found = None
-                unit_bonus = 0
-                nearby_units = []
-                for j in range(max(0, i-2), min(len(elements), i+3)):  # 检查前后2个元素
-                    if j != i and j < len(elements):
-                        neighbor_text = elements[j].get('text', '').strip().upper()
-                        if neighbor_text in ['GB', 'MB', 'TB', 'G', 'M', 'T']:
-                            unit_found = neighbor_text if neighbor_text in ['GB', 'MB', 'TB'] else neighbor_text + 'B'
-                            unit_bonus = 80  # 高分奖励
-                            nearby_units.append(f"相邻流量单位: {neighbor_text}")
-                            break
-                
-                # 如果找到单位，创建候选
-                if unit_found:
-                    candidate = self._create_data_candidate(amount, unit_found, text, i, elements, "纯数字流量")
-                    candidate['context_score'] += unit_bonus
-                    candidate['context'].extend(nearby_units)
-                    
-                    # 特别检查：紧密相邻的"剩余流量"、"剩余通用流量"标题（重点加分）
-                    title_proximity_bonus = 0
-                    for j in range(max(0, i-3), i):  # 检查前3个元素
-                        if j < len(elements):
-                            neighbor_text = elements[j].get('text', '').strip().lower()
-                            if any(keyword in neighbor_text for keyword in ['剩余通用流量', '剩余流量', '通用流量', '剩余数据', '可用流量']):
-                                distance = i - j
-                                if distance == 1:  # 紧挨着
-                                    title_proximity_bonus = 200
-                                    candidate['context'].append(f"紧挨着流量标题(距离{distance})")
-                                elif distance == 2:  # 中间隔一个元素（可能是单位）
-                                    title_proximity_bonus = 180
-                                    candidate['context'].append(f"非常接近流量标题(距离{distance})")
-                                elif distance == 3:
-                                    title_proximity_bonus = 120
-                                    candidate['context'].append(f"接近流量标题(距离{distance})")
-                                break
-                    
-                    candidate['context_score'] += title_proximity_bonus
-                    
-                    # 检查是否在页面顶部位置（通过元素索引判断）
-                    if i <= 15:  # 前15个元素认为是顶部
-                        candidate['context_score'] += 40
-                        candidate['context'].append("位于页面顶部区域")
-                    
-                    data_candidates.append(candidate)
-        
-        # 按语义得分排序
-        data_candidates.sort(key=lambda x: x['context_score'], reverse=True)
-        
-        # 输出分析结果
-        self.logger.info(f"🧠 智能分析找到 {len(data_candidates)} 个流量候选")
-        for i, candidate in enumerate(data_candidates[:5]):  # 显示前5个
-            self.logger.info(f"  {i+1}. {candidate['amount']} (得分: {candidate['context_score']})")
-            self.logger.info(f"     原文: {candidate['element_text']}")
-            self.logger.info(f"     元素位置: 第{candidate['element_index']+1}个")
-            self.logger.info(f"     上下文: {'; '.join(candidate['context'])}")
-        
-        # 返回得分最高的候选
-        if data_candidates and data_candidates[0]['context_score'] > 0:
-            best_candidate = data_candidates[0]
-            return {
-                'amount': best_candidate['amount'],
-                'raw_amount': best_candidate['raw_amount'],
-                'unit': best_candidate['unit'],
-                'context': best_candidate['element_text'],
-                'score': best_candidate['context_score']
-            }
-        
-        return None
-
-    def _create_data_candidate(self, amount: str, unit: str, text: str, element_index: int, elements: List[Dict[str, Any]], source_type: str) -> Dict[str, Any]:
-        """创建流量候选"""
-        candidate = {
-            'amount': f"{amount}{unit}",
-            'raw_amount': float(amount),
-            'unit': unit,
-            'element_text': text,
-            'element_index': element_index,
-            'context_score': 0,
-            'context': [f"来源: {source_type}"]
-        }
-        
-        # 分析当前元素的语义上下文
-        text_lower = text.lower()
-        
-        # 高优先级关键词（明确表示剩余流量）
-        high_priority_keywords = ['剩余通用流量', '剩余流量', '通用流量', '可用流量', '剩余数据', '可用数据', '剩余上网流量']
-        for keyword in high_priority_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] += 70  # 比话费稍高，因为流量词汇更具体
-                candidate['context'].append(f"包含关键词: {keyword}")
-        
-        # 中优先级关键词
-        medium_priority_keywords = ['流量', '数据', '上网', '网络', '通用']
-        for keyword in medium_priority_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] += 35
-                candidate['context'].append(f"包含关键词: {keyword}")
-        
-        # 负面关键词（表示不是剩余流量）
-        negative_keywords = ['充值', '购买', '套餐', '售价', '优惠', '立即', '领取', '券', '福利', '已用', '已使用', '消耗']
-        for keyword in negative_keywords:
-            if keyword in text_lower:
-                candidate['context_score'] -= 50
-                candidate['context'].append(f"负面关键词: {keyword}")
-        
-        # 检查邻近元素的语义上下文
-        context_range = 3  # 检查前后3个元素
-        for j in range(max(0, element_index-context_range), min(len(elements), element_index+context_range+1)):
-            if j == element_index:
-                continue
-            if j < len(elements):
-                neighbor = elements[j]
-                neighbor_text = neighbor.get('text', '').strip().lower()
-                
-                # 高优先级邻近元素
-                if any(keyword in neighbor_text for keyword in high_priority_keywords):
-                    distance_bonus = max(35 - abs(j - element_index) * 10, 10)  # 距离越近分数越高
-                    candidate['context_score'] += distance_bonus
-                    candidate['context'].append(f"邻近关键元素(距离{abs(j-element_index)}): {neighbor_text}")
-                
-                # 中优先级邻近元素
-                elif any(keyword in neighbor_text for keyword in medium_priority_keywords):
-                    distance_bonus = max(25 - abs(j - element_index) * 5, 5)
-                    candidate['context_score'] += distance_bonus
-                    candidate['context'].append(f"邻近相关元素(距离{abs(j-element_index)}): {neighbor_text}")
-                
-                # 负面邻近元素
-                elif any(keyword in neighbor_text for keyword in negative_keywords):
-                    candidate['context_score'] -= 30
-                    candidate['context'].append(f"邻近负面元素: {neighbor_text}")
-        
-        # 流量合理性检查
-        # GB范围：0.01-1000GB，MB范围：1-999999MB
-        if unit.upper() == 'GB':
-            if 0.01 <= candidate['raw_amount'] <= 1000:
-                candidate['context_score'] += 20
-                candidate['context'].append("GB数值在合理范围内")
-            else:
-                candidate['context_score'] -= 25
-                candidate['context'].append("GB数值可能不合理")
-        elif unit.upper() == 'MB':
-            if 1 <= candidate['raw_amount'] <= 999999:
-                candidate['context_score'] += 15
-                candidate['context'].append("MB数值在合理范围内")
-            else:
-                candidate['context_score'] -= 25
-                candidate['context'].append("MB数值可能不合理")
-        
-        return candidate
+        return self.data_usage_extractor.extract(elements)
 
     @tool(
         "query_unicom_data_usage",
@@ -1790,26 +1495,18 @@ class AppAutomationTools:
                 
                 if device_id:
                     self.logger.info(f"📱 检测到设备: {device_id}")
-                    # 使用monkey命令启动联通APP
-                    launch_cmd = [self.adb_path, "-s", device_id, "shell", "monkey", "-p", "com.sinovatech.unicom.ui", "-c", "android.intent.category.LAUNCHER", "1"]
-                    launch_result = subprocess.run(launch_cmd, capture_output=True, text=True, timeout=10)
-                    
-                    if launch_result.returncode == 0:
-                        self.logger.info("✅ 联通APP启动成功")
-                        time.sleep(5)  # 等待APP完全启动
+                    # 已在前台则复用，已在后台则切回前台，否则冷启动（失败时使用am start备用方案）
+                    launch_result = self.get_app_manager(device_id).ensure_foreground(
+                        "com.sinovatech.unicom.ui", activity=".MainActivity"
+                    )
+                    if launch_result["success"]:
+                        self.logger.info(f"✅ 联通APP已就绪（{launch_result['mode']}，{launch_result['elapsed']}s）")
                     else:
-                        self.logger.info("🔄 尝试备用启动方案...")
-                        backup_cmd = [self.adb_path, "-s", device_id, "shell", "am", "start", "-n", "com.sinovatech.unicom.ui/.MainActivity"]
-                        backup_result = subprocess.run(backup_cmd, capture_output=True, text=True, timeout=10)
-                        if backup_result.returncode == 0:
-                            self.logger.info("✅ 备用方案启动成功")
-                            time.sleep(5)
-                        else:
-                            return {
-                                "success": False,
-                                "message": f"APP启动失败: {backup_result.stderr}",
-                                "query_time": str(datetime.now())
-                            }
+                        return {
+                            "success": False,
+                            "message": f"APP启动失败: {launch_result['message']}",
+                            "query_time": str(datetime.now())
+                        }
                 else:
                     return {
                         "success": False,
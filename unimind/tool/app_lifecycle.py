@@ -0,0 +1,205 @@
+"""
+APP生命周期管理
+App Lifecycle Manager
+
+启动APP前先检查进程（pidof）和前台Activity：
+    - 已在前台：直接复用，不做任何操作
+    - 已在后台运行：切回前台（热启动）
+    - 未运行：冷启动
+启动后轮询前台Activity代替固定时长的sleep，并按包名统计冷/热启动耗时。
+"""
+
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 前台Activity行，例如 "mResumedActivity: ActivityRecord{... u0 com.sinovatech.unicom.ui/.MainActivity t123}"
+RESUMED_PATTERN = re.compile(r"(?:mResumedActivity|topResumedActivity|mCurrentFocus)[^\n]*?\s([\w.]+)/([\w.$]+)")
+
+# 启动方式
+MODE_FOREGROUND = "foreground"
+MODE_WARM = "warm"
+MODE_COLD = "cold"
+
+
+@dataclass
+class LaunchStats:
+    """单个包名的启动统计"""
+    cold: List[float] = field(default_factory=list)
+    warm: List[float] = field(default_factory=list)
+    foreground: int = 0
+    failures: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        def avg(values):
+            return round(sum(values) / len(values), 3) if values else None
+
+        return {
+            "cold_starts": len(self.cold),
+            "warm_starts": len(self.warm),
+            "already_foreground": self.foreground,
+            "failures": self.failures,
+            "avg_cold_time": avg(self.cold),
+            "avg_warm_time": avg(self.warm),
+        }
+
+
+class AppLifecycleManager:
+    """
+    APP生命周期管理器
+
+    通过注入的 ADB 命令回调（参数如 "shell pidof xxx"，返回 (成功, 输出)）适配不同的设备操作工具类。
+    """
+
+    def __init__(
+        self,
+        run_adb: Callable[[str], Tuple[bool, str]],
+        poll_interval: float = 0.3,
+        warm_timeout: float = 3.0,
+        cold_timeout: float = 10.0,
+        ready_delay: float = 0.0,
+    ):
+        """
+        初始化生命周期管理器
+
+        Args:
+            run_adb: 执行ADB子命令的回调
+            poll_interval: 轮询前台Activity的间隔秒数
+            warm_timeout: 热启动等待切回前台的最长秒数
+            cold_timeout: 冷启动等待进入前台的最长秒数
+            ready_delay: 冷启动进入前台后额外等待的秒数（首页数据加载）
+        """
+        self.run_adb = run_adb
+        self.poll_interval = poll_interval
+        self.warm_timeout = warm_timeout
+        self.cold_timeout = cold_timeout
+        self.ready_delay = ready_delay
+        self.stats: Dict[str, LaunchStats] = {}
+        self.warm_packages: Set[str] = set()
+
+    def get_pid(self, package_name: str) -> Optional[str]:
+        """获取APP进程号，未运行时返回None"""
+        success, output = self.run_adb(f"shell pidof {package_name}")
+        output = output.strip()
+        return output if success and output else None
+
+    def get_foreground(self) -> Optional[Tuple[str, str]]:
+        """获取前台 (包名, Activity)"""
+        for command in ("shell dumpsys activity activities | grep -E 'mResumedActivity|topResumedActivity'",
+                        "shell dumpsys window | grep mCurrentFocus"):
+            success, output = self.run_adb(command)
+            if not success:
+                continue
+            match = RESUMED_PATTERN.search(output)
+            if match:
+                return match.group(1), match.group(2)
+        return None
+
+    def is_foreground(self, package_name: str) -> bool:
+        """APP是否在前台"""
+        foreground = self.get_foreground()
+        return bool(foreground) and foreground[0] == package_name
+
+    def _wait_foreground(self, package_name: str, timeout: float) -> bool:
+        """轮询直到APP进入前台或超时"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            if self.is_foreground(package_name):
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def _start(self, package_name: str, activity: Optional[str]) -> Tuple[bool, str]:
+        """发送启动意图，已运行的APP会被切回前台而不会重启"""
+        success, output = self.run_adb(
+            f"shell monkey -p {package_name} -c android.intent.category.LAUNCHER 1"
+        )
+        if not success and activity:
+            success, output = self.run_adb(f"shell am start -n {package_name}/{activity}")
+        return success, output
+
+    def ensure_foreground(self, package_name: str, activity: Optional[str] = None) -> Dict[str, Any]:
+        """
+        确保APP在前台，优先复用已运行的进程
+
+        Args:
+            package_name: 应用包名
+            activity: 备用启动的Activity，可选
+
+        Returns:
+            启动结果，mode 为 foreground/warm/cold，elapsed 为耗时秒数
+        """
+        stats = self.stats.setdefault(package_name, LaunchStats())
+        start = time.perf_counter()
+
+        if self.is_foreground(package_name):
+            stats.foreground += 1
+            return {
+                "success": True,
+                "message": f"{package_name} 已在前台",
+                "package_name": package_name,
+                "mode": MODE_FOREGROUND,
+                "elapsed": round(time.perf_counter() - start, 3)
+            }
+
+        mode = MODE_WARM if self.get_pid(package_name) else MODE_COLD
+        success, output = self._start(package_name, activity)
+        if not success:
+            stats.failures += 1
+            return {"success": False, "message": f"启动失败: {output}", "package_name": package_name, "mode": mode}
+
+        timeout = self.warm_timeout if mode == MODE_WARM else self.cold_timeout
+        if not self._wait_foreground(package_name, timeout):
+            # 部分ROM的dumpsys输出无法解析，超时后以进程存在为准
+            if not self.get_pid(package_name):
+                stats.failures += 1
+                return {"success": False, "message": f"{package_name} 未能进入前台", "package_name": package_name, "mode": mode}
+            logger.warning(f"未检测到 {package_name} 进入前台，按进程存在继续")
+
+        if mode == MODE_COLD and self.ready_delay:
+            time.sleep(self.ready_delay)
+
+        elapsed = time.perf_counter() - start
+        (stats.warm if mode == MODE_WARM else stats.cold).append(elapsed)
+        logger.info(f"{package_name} {'热' if mode == MODE_WARM else '冷'}启动完成，耗时 {elapsed:.2f}s")
+        return {
+            "success": True,
+            "message": f"成功启动 {package_name}",
+            "package_name": package_name,
+            "mode": mode,
+            "elapsed": round(elapsed, 3)
+        }
+
+    def keep_warm(self, package_name: str, enabled: bool = True) -> None:
+        """设置请求结束后是否保持APP进程常驻"""
+        if enabled:
+            self.warm_packages.add(package_name)
+        else:
+            self.warm_packages.discard(package_name)
+
+    def prewarm(self, package_name: str, activity: Optional[str] = None) -> Dict[str, Any]:
+        """提前在后台拉起APP，后续请求即可热启动"""
+        self.keep_warm(package_name)
+        if self.get_pid(package_name):
+            return {"success": True, "message": f"{package_name} 已在运行", "package_name": package_name}
+        result = self.ensure_foreground(package_name, activity)
+        if result["success"]:
+            self.run_adb("shell input keyevent KEYCODE_HOME")
+        return result
+
+    def release(self, package_name: str) -> Tuple[bool, str]:
+        """请求结束：常驻的APP退到后台保留进程，否则结束进程"""
+        if package_name in self.warm_packages:
+            return self.run_adb("shell input keyevent KEYCODE_HOME")
+        return self.run_adb(f"shell am force-stop {package_name}")
+
+    def get_stats(self, package_name: Optional[str] = None) -> Dict[str, Any]:
+        """获取冷/热启动统计"""
+        if package_name:
+            return self.stats.get(package_name, LaunchStats()).to_dict()
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
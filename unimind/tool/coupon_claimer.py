@@ -0,0 +1,377 @@
+"""
+批量领券引擎
+Batch Coupon Claiming Engine
+
+在领券中心一次性识别当前屏幕上所有可领取按钮，通过一条批量输入脚本依次点击，
+再用一次UI dump核对每个按钮的状态变化，然后翻页继续，直到没有新内容。
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ui_dump import parse_bounds
+
+logger = logging.getLogger(__name__)
+
+Element = Dict[str, Any]
+
+# 可领取状态的按钮文本
+CLAIM_TEXTS = ("立即领取", "领取", "去领取", "免费领取", "点击领取", "马上领")
+# 已领取状态的按钮文本
+CLAIMED_TEXTS = ("已领取", "已领", "去使用", "立即使用", "已抢光", "已领完")
+
+# 按钮尺寸聚类的容差（像素）
+SIZE_TOLERANCE = 12
+# 核对状态时按钮中心的位置容差（像素）
+POSITION_TOLERANCE = 24
+# 点击后仍保留在原页面的判定阈值（原页面文本的保留比例）
+SAME_PAGE_RATIO = 0.5
+
+
+@dataclass
+class ClaimButton:
+    """一个领取按钮"""
+    text: str
+    bounds: Tuple[int, int, int, int]
+    center_x: int
+    center_y: int
+    label: str = ""
+    # 跨页去重键：名称、列位置和同一卡片内的其他文本（面额、使用条件等）
+    key: Tuple = ()
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.bounds[2] - self.bounds[0], self.bounds[3] - self.bounds[1])
+
+
+@dataclass
+class ClaimReport:
+    """批量领取结果统计"""
+    claimed: List[str] = field(default_factory=list)
+    already_claimed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    pages: int = 0
+    taps: int = 0
+    wall_time: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "message": (
+                f"成功领取 {len(self.claimed)} 张优惠券，"
+                f"已领取 {len(self.already_claimed)} 张，失败 {len(self.failed)} 张"
+            ),
+            "claimed": len(self.claimed),
+            "already_claimed": len(self.already_claimed),
+            "failed": len(self.failed),
+            "claimed_coupons": list(self.claimed),
+            "failed_coupons": list(self.failed),
+            "pages": self.pages,
+            "taps": self.taps,
+            "wall_time": round(self.wall_time, 3),
+        }
+
+
+def _matches(text: str, candidates: Sequence[str]) -> bool:
+    """按钮文本与候选文本完全一致（忽略空白）"""
+    return text.replace(" ", "") in candidates
+
+
+def _cluster_by_size(buttons: List[ClaimButton]) -> List[List[ClaimButton]]:
+    """按按钮尺寸聚类，同一列表中的领取按钮通常尺寸一致"""
+    clusters: List[List[ClaimButton]] = []
+    for button in sorted(buttons, key=lambda b: b.size):
+        width, height = button.size
+        for cluster in clusters:
+            ref_width, ref_height = cluster[0].size
+            if abs(width - ref_width) <= SIZE_TOLERANCE and abs(height - ref_height) <= SIZE_TOLERANCE:
+                cluster.append(button)
+                break
+        else:
+            clusters.append([button])
+    return clusters
+
+
+class CouponClaimer:
+    """
+    批量领券引擎
+
+    通过注入回调适配不同的设备操作工具类：
+        dump: 获取当前屏幕元素列表
+        run_script: 执行一组设备端shell命令（一次往返内依次执行）
+        swipe: 执行滑动，参数为 (start_x, start_y, end_x, end_y)
+        back: 返回上一页
+    """
+
+    def __init__(
+        self,
+        dump: Callable[[], List[Element]],
+        run_script: Callable[[List[str]], Any],
+        swipe: Callable[[int, int, int, int], Any],
+        back: Callable[[], Any],
+        tap_interval: float = 0.3,
+        settle: float = 1.0,
+        max_pages: int = 6,
+    ):
+        """
+        初始化领券引擎
+
+        Args:
+            dump: 获取当前屏幕元素列表的回调
+            run_script: 批量执行设备端命令的回调
+            swipe: 滑动回调
+            back: 返回回调
+            tap_interval: 批量脚本中相邻两次点击的间隔秒数（在设备端执行）
+            settle: 批量点击或滑动后等待界面稳定的秒数
+            max_pages: 最多处理的页数
+        """
+        self.dump = dump
+        self.run_script = run_script
+        self.swipe = swipe
+        self.back = back
+        self.tap_interval = tap_interval
+        self.settle = settle
+        self.max_pages = max_pages
+
+    @staticmethod
+    def _to_button(elem: Element) -> Optional[ClaimButton]:
+        bounds = parse_bounds(elem.get("bounds", ""))
+        if not bounds:
+            return None
+        return ClaimButton(
+            text=elem.get("text", "").strip(),
+            bounds=bounds,
+            center_x=(bounds[0] + bounds[2]) // 2,
+            center_y=(bounds[1] + bounds[3]) // 2,
+        )
+
+    @staticmethod
+    def _label_for(button: ClaimButton, elements: List[Element]) -> str:
+        """取按钮左侧或上方最近的非按钮文本作为优惠券名称"""
+        best, best_distance = "", None
+        for elem in elements:
+            text = elem.get("text", "").strip()
+            if not text or _matches(text, CLAIM_TEXTS) or _matches(text, CLAIMED_TEXTS):
+                continue
+            bounds = parse_bounds(elem.get("bounds", ""))
+            if not bounds or bounds[1] > button.bounds[3]:
+                continue
+            distance = abs(button.center_y - (bounds[1] + bounds[3]) // 2) + \
+                abs(button.center_x - (bounds[0] + bounds[2]) // 2) // 4
+            if best_distance is None or distance < best_distance:
+                best, best_distance = text, distance
+        return best or f"优惠券({button.center_x},{button.center_y})"
+
+    @staticmethod
+    def _card_texts(button: ClaimButton, elements: List[Element]) -> Tuple[str, ...]:
+        """按钮所在卡片中的其他文本：与按钮同一行带内、位于按钮左侧的非按钮文本"""
+        height = button.bounds[3] - button.bounds[1]
+        top, bottom = button.bounds[1] - height, button.bounds[3] + height
+        texts = []
+        for elem in elements:
+            text = elem.get("text", "").strip()
+            if not text or _matches(text, CLAIM_TEXTS) or _matches(text, CLAIMED_TEXTS):
+                continue
+            bounds = parse_bounds(elem.get("bounds", ""))
+            if bounds and top <= (bounds[1] + bounds[3]) // 2 <= bottom and bounds[2] <= button.bounds[2]:
+                texts.append(text)
+        return tuple(sorted(texts))
+
+    def find_buttons(self, elements: List[Element]) -> Tuple[List[ClaimButton], List[ClaimButton]]:
+        """
+        从一次快照中找出可领取和已领取的按钮
+
+        先按文本筛选，再按尺寸聚类：当存在多个同尺寸按钮组成的列表时，
+        尺寸孤立的"领取"文本（横幅标题、说明文字等）不作为按钮处理。
+
+        Returns:
+            (可领取按钮列表, 已领取按钮列表)，均按屏幕从上到下排序
+        """
+        claimable, claimed = [], []
+        for elem in elements:
+            text = elem.get("text", "")
+            if _matches(text, CLAIM_TEXTS):
+                target = claimable
+            elif _matches(text, CLAIMED_TEXTS):
+                target = claimed
+            else:
+                continue
+            button = self._to_button(elem)
+            if button:
+                target.append(button)
+
+        clusters = _cluster_by_size(claimable + claimed)
+        if any(len(cluster) > 1 for cluster in clusters):
+            grouped = {id(b) for cluster in clusters if len(cluster) > 1 for b in cluster}
+            claimable = [b for b in claimable if id(b) in grouped]
+            claimed = [b for b in claimed if id(b) in grouped]
+
+        for button in claimable + claimed:
+            button.label = self._label_for(button, elements)
+            # 翻页后同一张券的纵坐标会变化，键中不含 center_y；
+            # 名称和列位置相同的不同优惠券靠卡片文本区分
+            button.key = (button.label, button.center_x, self._card_texts(button, elements))
+
+        order = lambda b: (b.center_y, b.center_x)
+        return sorted(claimable, key=order), sorted(claimed, key=order)
+
+    def _tap_all(self, buttons: List[ClaimButton]) -> None:
+        """通过一条批量脚本依次点击所有按钮"""
+        commands = []
+        for button in buttons:
+            if commands and self.tap_interval:
+                commands.append(f"sleep {self.tap_interval}")
+            commands.append(f"input tap {button.center_x} {button.center_y}")
+        self.run_script(commands)
+        if self.settle:
+            time.sleep(self.settle)
+
+    @staticmethod
+    def _button_at(button: ClaimButton, elements: List[Element]) -> Optional[str]:
+        """返回快照中与按钮位置重合的按钮文本"""
+        for elem in elements:
+            text = elem.get("text", "")
+            if not (_matches(text, CLAIM_TEXTS) or _matches(text, CLAIMED_TEXTS)):
+                continue
+            bounds = parse_bounds(elem.get("bounds", ""))
+            if not bounds:
+                continue
+            if abs((bounds[0] + bounds[2]) // 2 - button.center_x) <= POSITION_TOLERANCE and \
+                    abs((bounds[1] + bounds[3]) // 2 - button.center_y) <= POSITION_TOLERANCE:
+                return text
+        return None
+
+    @staticmethod
+    def _same_page(before: List[Element], after: List[Element]) -> bool:
+        """点击后是否仍停留在原页面"""
+        before_texts = {e.get("text", "") for e in before if e.get("raw_text")}
+        if not before_texts:
+            return True
+        after_texts = {e.get("text", "") for e in after}
+        return len(before_texts & after_texts) / len(before_texts) >= SAME_PAGE_RATIO
+
+    def _verify(self, buttons: List[ClaimButton], elements: List[Element], report: ClaimReport) -> List[ClaimButton]:
+        """
+        根据一次快照核对按钮状态
+
+        Returns:
+            状态未确认、需要逐个重试的按钮
+        """
+        pending = []
+        for button in buttons:
+            state = self._button_at(button, elements)
+            if state is not None and _matches(state, CLAIM_TEXTS):
+                pending.append(button)
+            else:
+                # 按钮变为已领取状态或点击后消失，视为领取成功
+                report.claimed.append(button.label)
+        return pending
+
+    def _claim_one_by_one(self, buttons: List[ClaimButton], page_elements: List[Element],
+                          report: ClaimReport) -> List[Element]:
+        """批量点击导致页面跳转时，对剩余按钮逐个点击并核对"""
+        elements = page_elements
+        for index, button in enumerate(buttons):
+            self._tap_all([button])
+            report.taps += 1
+            after = self.dump()
+            if not self._same_page(page_elements, after):
+                self.back()
+                if self.settle:
+                    time.sleep(self.settle)
+                after = self.dump()
+                if not self._same_page(page_elements, after):
+                    # 未能回到领券页，剩余按钮无法核对
+                    logger.warning("返回后不在领券页面，停止逐个领取")
+                    report.failed.extend(b.label for b in buttons[index:])
+                    return after
+            state = self._button_at(button, after)
+            if state is not None and _matches(state, CLAIMED_TEXTS):
+                report.claimed.append(button.label)
+            elif state is None and self._same_page(page_elements, after):
+                # 按钮点击后消失，视为领取成功
+                report.claimed.append(button.label)
+            else:
+                report.failed.append(button.label)
+            elements = after
+        return elements
+
+    def _scroll(self, elements: List[Element]) -> None:
+        """根据当前屏幕范围向上滑动一页"""
+        coords = [b for b in (parse_bounds(e.get("bounds", "")) for e in elements) if b]
+        if not coords:
+            return
+        x1, y1 = min(b[0] for b in coords), min(b[1] for b in coords)
+        x2, y2 = max(b[2] for b in coords), max(b[3] for b in coords)
+        height = y2 - y1
+        x = (x1 + x2) // 2
+        self.swipe(x, int(y2 - height * 0.2), x, int(y1 + height * 0.2))
+        if self.settle:
+            time.sleep(self.settle)
+
+    def claim_all(self) -> Dict[str, Any]:
+        """
+        领取所有可领取的优惠券
+
+        Returns:
+            包含 claimed、already_claimed、failed 计数和 wall_time 的结果字典
+        """
+        report = ClaimReport()
+        start = time.perf_counter()
+        seen = set()
+        elements = self.dump()
+
+        for page in range(self.max_pages):
+            report.pages = page + 1
+            claimable, claimed = self.find_buttons(elements)
+            # 上一页已处理过的按钮（翻页重叠部分）不再重复点击
+            claimable = [b for b in claimable if b.key not in seen]
+
+            for button in claimed:
+                if button.key not in seen:
+                    seen.add(button.key)
+                    report.already_claimed.append(button.label)
+
+            if claimable:
+                logger.info(f"第 {page + 1} 页发现 {len(claimable)} 个可领取按钮")
+                seen.update(b.key for b in claimable)
+                self._tap_all(claimable)
+                report.taps += len(claimable)
+                after = self.dump()
+
+                if self._same_page(elements, after):
+                    pending = self._verify(claimable, after, report)
+                    if pending:
+                        after = self._claim_one_by_one(pending, after, report)
+                else:
+                    # 某个按钮跳转到了新页面，返回后逐个处理未确认的按钮
+                    self.back()
+                    if self.settle:
+                        time.sleep(self.settle)
+                    after = self.dump()
+                    if not self._same_page(elements, after):
+                        # 返回后仍不在领券页，按钮消失不能说明领取成功
+                        logger.warning("返回后不在领券页面，本批按钮记为失败")
+                        report.failed.extend(b.label for b in claimable)
+                        elements = after
+                        break
+                    pending = self._verify(claimable, after, report)
+                    after = self._claim_one_by_one(pending, after, report)
+                lost = not self._same_page(elements, after)
+                elements = after
+                if lost:
+                    break
+
+            signature = [(e.get("text"), e.get("bounds")) for e in elements]
+            self._scroll(elements)
+            elements = self.dump()
+            if [(e.get("text"), e.get("bounds")) for e in elements] == signature:
+                logger.info("页面已滚动到底部")
+                break
+
+        report.wall_time = time.perf_counter() - start
+        result = report.to_dict()
+        logger.info(f"{result['message']}，耗时 {result['wall_time']:.2f}s")
+        return result
@@ -0,0 +1,172 @@
+"""
+设备访问仲裁
+Device Access Arbitration
+
+多个Agent并发运行时（例如 action_executor 操作手机的同时 result_validator
+读取屏幕），对同一台设备的ADB操作需要协调：
+    - 只读工具（查询已安装应用、APP状态等）可以同时执行
+    - 会改变设备状态的工具（点击、输入、启动应用等）独占设备
+    - 导出UI结构或截屏的只读工具（find_elements、截图等）也独占设备：
+      设备上同一时间只能进行一次 uiautomator dump，且它们会写临时文件
+    - 有写操作在等待时，新的只读操作排在其后，避免写操作饿死
+    - 未指定 device_id 的调用按实际的默认设备加锁（工具已连接的设备、
+      ANDROID_SERIAL 或唯一在线的设备），与显式指定该设备的调用共用一把锁
+
+上下文的 device_arbiter 属性设置后，execute_tool 会自动按设备加锁。
+"""
+
+import os
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# 访问设备的工具所在模块
+DEVICE_TOOL_MODULES = (
+    "unimind.tool.app_automation_tools",
+    "unimind.tool.unicom_android_tools",
+    "unimind.tool.phone_auto_answer",
+)
+# 导出UI结构或截屏的只读工具，需要独占设备
+SCREEN_CAPTURE_TOOLS = frozenset({
+    "get_screen_content",
+    "find_elements",
+    "capture_screenshot",
+    "unicom_get_screen_content",
+    "unicom_find_element_by_text",
+})
+DEFAULT_DEVICE = "default"
+# 默认设备（adb devices 结果）的缓存秒数
+DEFAULT_DEVICE_TTL = 30.0
+
+
+@dataclass
+class _DeviceLock:
+    """单台设备的读写锁状态"""
+    readers: int = 0
+    writer: bool = False
+    writers_waiting: int = 0
+    acquisitions: int = 0
+    waits: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class DeviceArbiter:
+    """
+    按设备的读写锁
+    """
+
+    def __init__(self):
+        self._devices: Dict[str, _DeviceLock] = {}
+        self._changed = threading.Condition()
+        # adb路径 -> (默认设备, 查询时间)
+        self._default_devices: Dict[str, Tuple[str, float]] = {}
+        self._default_lock = threading.Lock()
+
+    @staticmethod
+    def covers(entry: Any) -> bool:
+        """工具（ToolEntry）是否访问设备"""
+        return entry.module in DEVICE_TOOL_MODULES
+
+    @staticmethod
+    def exclusive(entry: Any) -> bool:
+        """工具是否需要独占设备"""
+        return not entry.read_only or entry.name in SCREEN_CAPTURE_TOOLS
+
+    def device_of(self, owner: Any, arguments: Dict[str, Any]) -> str:
+        """
+        工具调用实际操作的设备
+
+        Args:
+            owner: 工具所属的实例（可能记录了已连接的 device_id 和 adb_path）
+            arguments: 工具参数
+
+        Returns:
+            设备ID；无法确定时为 DEFAULT_DEVICE
+        """
+        device = (
+            arguments.get("device_id")
+            or getattr(owner, "device_id", None)
+            or os.getenv("ANDROID_SERIAL")
+        )
+        if device:
+            return device
+        return self._default_device(getattr(owner, "adb_path", None) or "adb")
+
+    def _default_device(self, adb_path: str) -> str:
+        """不带 -s 的adb命令操作的设备：唯一在线的设备"""
+        with self._default_lock:
+            cached = self._default_devices.get(adb_path)
+            if cached and time.monotonic() - cached[1] < DEFAULT_DEVICE_TTL:
+                return cached[0]
+            device = DEFAULT_DEVICE
+            try:
+                result = subprocess.run(
+                    [adb_path, "devices"], capture_output=True, text=True, timeout=5
+                )
+                online = [
+                    line.split("\t")[0]
+                    for line in result.stdout.splitlines()[1:]
+                    if line.endswith("\tdevice")
+                ]
+                if len(online) == 1:
+                    device = online[0]
+            except (OSError, subprocess.SubprocessError):
+                pass
+            self._default_devices[adb_path] = (device, time.monotonic())
+            return device
+
+    @contextmanager
+    def hold(self, device_id: Optional[str] = None, exclusive: bool = True) -> Iterator[None]:
+        """
+        占用设备
+
+        Args:
+            device_id: 设备ID，未指定时使用默认设备
+            exclusive: True 独占（写操作），False 与其他只读操作共享
+        """
+        device = device_id or DEFAULT_DEVICE
+        started = time.monotonic()
+        with self._changed:
+            state = self._devices.setdefault(device, _DeviceLock())
+            if exclusive:
+                state.writers_waiting += 1
+                while state.writer or state.readers:
+                    self._changed.wait()
+                state.writers_waiting -= 1
+                state.writer = True
+            else:
+                while state.writer or state.writers_waiting:
+                    self._changed.wait()
+                state.readers += 1
+            waited = time.monotonic() - started
+            state.acquisitions += 1
+            if waited > 0.001:
+                state.waits += 1
+                state.total_wait += waited
+                state.max_wait = max(state.max_wait, waited)
+        try:
+            yield
+        finally:
+            with self._changed:
+                if exclusive:
+                    state.writer = False
+                else:
+                    state.readers -= 1
+                self._changed.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """每台设备的占用与等待统计"""
+        with self._changed:
+            return {
+                device: {
+                    "acquisitions": state.acquisitions,
+                    "waits": state.waits,
+                    "total_wait": round(state.total_wait, 4),
+                    "max_wait": round(state.max_wait, 4),
+                }
+                for device, state in self._devices.items()
+            }
@@ -2,9 +2,8 @@
 Tool group management and utilities for organizing tools into categories.
 """
 
-import inspect
-from tools import Tools
 from typing import Dict, List, Set
+from .registry import tool_registry
 
 
 # Standard tool groups
@@ -44,13 +43,7 @@ def get_available_groups() -> Set[str]:
     Returns:
         Set of group names that have tools registered
     """
-    available_groups = set()
-
-    for name, method in inspect.getmembers(Tools):
-        if hasattr(method, "is_tool") and method.is_tool:
-            available_groups.add(method.tool_group)
-
-    return available_groups
+    return set(tool_registry.groups())
 
 
 def get_tools_by_group() -> Dict[str, List[Dict]]:
@@ -60,14 +53,7 @@ def get_tools_by_group() -> Dict[str, List[Dict]]:
     Returns:
         Dictionary mapping group names to lists of tool schemas
     """
-    tools_by_group = {}
-
-    for name, method in inspect.getmembers(Tools):
-        if hasattr(method, "is_tool") and method.is_tool:
-            group = method.tool_group
-            if group not in tools_by_group:
-                tools_by_group[group] = []
-
-            tools_by_group[group].append(method.get_openai_schema())
-
-    return tools_by_group
+    return {
+        group: [entry.schema for entry in tool_registry.entries(group)]
+        for group in tool_registry.groups()
+    }
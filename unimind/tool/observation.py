@@ -0,0 +1,525 @@
+"""
+UI观察编码
+UI Observation Encoding
+
+find_elements 等工具返回的元素列表原本以JSON原样发给模型，每个元素都重复
+center_x、raw_text、content_desc 等键名，占用大量提示词token。
+观察编码器把界面快照渲染为紧凑的表格或缩进大纲：
+    - 去掉冗余字段（bounds、raw_text、content_desc 等），合并文本与描述
+    - 按所属容器分组
+    - 元素数量有上限，超出时优先保留可点击和有文本的元素
+    - 每个元素有短ID（e1、e2……），EncodedObservation.ids 保存ID到坐标的映射
+
+ObservationTracker 在同一会话内记住每个观察流上一次发给模型的快照，之后只发送
+结构差异（新增、移除、变化的元素，按 resource-id 和 bounds 匹配）和少量未变的
+锚点元素；变化过大或连续差异过多时回退为完整快照。节省的token按会话统计。
+差异只有在完整快照仍在模型的提示词中时才有意义：承载快照和后续差异的工具消息
+被清空、重建或压缩后，sync 会丢弃该观察流，下一次观察重新发送完整快照。
+"""
+
+import os
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from unimind.utils.token_estimator import estimate_tokens
+from .ui_dump import short_resource_id
+
+STYLE_TABLE = "table"
+STYLE_OUTLINE = "outline"
+
+DEFAULT_MAX_ELEMENTS = int(os.getenv("AM_OBSERVATION_ELEMENTS", 60))
+# 单个元素标签的最大长度
+MAX_LABEL_CHARS = 40
+# parse_ui_elements 为无文本的可点击元素生成的占位文本前缀
+PLACEHOLDER_PREFIX = "可点击元素["
+
+MODE_FULL = "full"
+MODE_DIFF = "diff"
+# 是否启用增量观察（AM_OBSERVATION_DIFF=0 关闭）
+INCREMENTAL_OBSERVATIONS = os.getenv("AM_OBSERVATION_DIFF", "1") != "0"
+# 变化元素数超过上次可见元素数的该比例时，改为发送完整快照
+DEFAULT_MAX_CHANGE_RATIO = float(os.getenv("AM_OBSERVATION_DIFF_RATIO", 0.5))
+# 连续发送差异的最大次数，之后发送一次完整快照，避免模型依赖过早的上下文
+DEFAULT_MAX_DIFFS = int(os.getenv("AM_OBSERVATION_MAX_DIFFS", 4))
+# 差异观察中附带的未变锚点元素数量
+DEFAULT_ANCHORS = 5
+
+
+@dataclass
+class EncodedObservation:
+    """编码后的观察"""
+    text: str
+    # 元素ID -> 中心坐标
+    ids: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    total: int = 0
+    shown: int = 0
+    mode: str = MODE_FULL
+
+    def resolve(self, element_id: str) -> Optional[Tuple[int, int]]:
+        """根据元素ID取回中心坐标"""
+        return self.ids.get(element_id.rstrip("*"))
+
+
+def element_label(element: Dict[str, Any]) -> str:
+    """
+    合并元素的文本与描述
+
+    文本与描述相同或互相包含时只保留一个；两者都没有时使用简短的resource-id
+    """
+    text = (element.get("raw_text") or "").strip()
+    desc = (element.get("content_desc") or "").strip()
+    if not text and not desc:
+        text = (element.get("text") or "").strip()
+        if text.startswith(PLACEHOLDER_PREFIX):
+            text = ""
+    if text and desc and desc not in text and text not in desc:
+        label = f"{text}/{desc}"
+    else:
+        label = text if len(text) >= len(desc) else desc
+    if not label:
+        label = f"#{short_resource_id(element.get('resource_id', ''))}" if element.get("resource_id") else ""
+    label = " ".join(label.split())
+    if len(label) > MAX_LABEL_CHARS:
+        label = label[:MAX_LABEL_CHARS - 1] + "…"
+    return label
+
+
+def is_ui_element_list(value: Any) -> bool:
+    """判断是否为 parse_ui_elements 形式的元素列表"""
+    return (
+        isinstance(value, list)
+        and bool(value)
+        and isinstance(value[0], dict)
+        and "center_x" in value[0]
+        and "center_y" in value[0]
+    )
+
+
+class ObservationEncoder:
+    """
+    UI快照编码器
+    """
+
+    def __init__(
+        self,
+        max_elements: int = DEFAULT_MAX_ELEMENTS,
+        style: str = STYLE_TABLE,
+        coordinates: bool = True,
+    ):
+        """
+        初始化编码器
+
+        Args:
+            max_elements: 每次观察最多保留的元素数量
+            style: "table"（每行 id|标签|坐标）或 "outline"（按容器缩进）
+            coordinates: 是否在文本中附带中心坐标，便于模型直接调用 tap_element
+        """
+        if style not in (STYLE_TABLE, STYLE_OUTLINE):
+            raise ValueError(f"未知的观察编码格式: {style}")
+        self.max_elements = max_elements
+        self.style = style
+        self.coordinates = coordinates
+
+    def select(self, elements: List[Dict[str, Any]]) -> List[int]:
+        """
+        在元素上限内选择保留的元素，返回其下标（保持屏幕顺序）
+
+        优先级：可点击且有文本 > 有文本 > 可点击 > 其他
+        """
+        if len(elements) <= self.max_elements:
+            return list(range(len(elements)))
+
+        def priority(index: int) -> int:
+            element = elements[index]
+            labeled = bool(element_label(element))
+            clickable = bool(element.get("clickable"))
+            return (0 if labeled and clickable else 1 if labeled else 2 if clickable else 3)
+
+        ranked = sorted(range(len(elements)), key=lambda index: (priority(index), index))
+        return sorted(ranked[:self.max_elements])
+
+    def _row(self, element_id: str, element: Dict[str, Any]) -> str:
+        flag = "*" if element.get("clickable") else ""
+        label = element_label(element) or "-"
+        if self.style == STYLE_TABLE:
+            row = f"{element_id}{flag}|{label.replace('|', '/')}"
+            if self.coordinates:
+                row += f"|{element['center_x']},{element['center_y']}"
+            return row
+        row = f"  {element_id}{flag} {label}"
+        if self.coordinates:
+            row += f" @{element['center_x']},{element['center_y']}"
+        return row
+
+    def encode(self, elements: List[Dict[str, Any]], ids: Optional[List[str]] = None) -> EncodedObservation:
+        """
+        编码一组UI元素
+
+        Args:
+            elements: parse_ui_elements 返回的元素列表（可带 container 字段）
+            ids: 可选的元素ID（与 elements 一一对应），默认按顺序编号 e1、e2……
+
+        Returns:
+            EncodedObservation
+        """
+        ids = ids or [f"e{index + 1}" for index in range(len(elements))]
+        selected = self.select(elements)
+
+        groups: Dict[str, List[int]] = {}
+        for index in selected:
+            groups.setdefault(elements[index].get("container") or "", []).append(index)
+
+        lines = []
+        if self.style == STYLE_TABLE:
+            lines.append("id|文本|x,y" if self.coordinates else "id|文本")
+        id_map = {}
+        for container, indexes in groups.items():
+            if container or len(groups) > 1:
+                lines.append(f"## {container or 'screen'}" if self.style == STYLE_TABLE else f"{container or 'screen'}:")
+            for index in indexes:
+                element = elements[index]
+                lines.append(self._row(ids[index], element))
+                id_map[ids[index]] = (element["center_x"], element["center_y"])
+        if len(selected) < len(elements):
+            lines.append(f"…另有{len(elements) - len(selected)}个元素未列出")
+
+        return EncodedObservation(
+            text="\n".join(lines),
+            ids=id_map,
+            total=len(elements),
+            shown=len(selected),
+        )
+
+
+def element_key(element: Dict[str, Any]) -> str:
+    """元素在相邻快照间的匹配键：resource-id + bounds"""
+    bounds = element.get("bounds") or f"{element['center_x']},{element['center_y']}"
+    return f"{element.get('resource_id', '')}@{bounds}"
+
+
+def _signature(element: Dict[str, Any]) -> Tuple[str, bool]:
+    """判断同一元素是否发生变化的内容"""
+    return element_label(element), bool(element.get("clickable"))
+
+
+@dataclass
+class _Snapshot:
+    """一个观察流上次发给模型的快照"""
+    # 元素键 -> (元素ID，未展示的元素为None；内容签名)
+    nodes: Dict[str, Tuple[Optional[str], Tuple[str, bool]]]
+    next_id: int
+    diffs: int = 0
+    # 承载完整快照及其后差异的工具消息，以及发送时的内容
+    carriers: List[Tuple[Dict[str, Any], str]] = field(default_factory=list)
+
+
+class ObservationTracker:
+    """
+    会话内的增量观察
+
+    同一会话的每个观察流（例如某个Agent的 find_elements 全屏结果）只在第一次、
+    变化较大或连续差异过多时发送完整快照，其余情况发送与上次观察的差异。
+    元素ID在差异之间保持不变，新增元素继续编号。
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[ObservationEncoder] = None,
+        max_change_ratio: float = DEFAULT_MAX_CHANGE_RATIO,
+        max_diffs: int = DEFAULT_MAX_DIFFS,
+        anchors: int = DEFAULT_ANCHORS,
+    ):
+        """
+        初始化增量观察
+
+        Args:
+            encoder: 观察编码器，默认使用 get_observation_encoder()
+            max_change_ratio: 变化比例上限，超过后发送完整快照
+            max_diffs: 两次完整快照之间最多发送的差异次数
+            anchors: 差异中附带的未变锚点元素数量
+        """
+        self.encoder = encoder or get_observation_encoder()
+        self.max_change_ratio = max_change_ratio
+        self.max_diffs = max_diffs
+        self.anchors = anchors
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self.observations = 0
+        self.full_snapshots = 0
+        self.diffs = 0
+        self.tokens_full = 0
+        self.tokens_sent = 0
+
+    def reset(self, stream: Optional[str] = None) -> None:
+        """丢弃某个观察流（默认全部）的上次快照，下一次观察发送完整快照"""
+        if stream is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(stream, None)
+
+    def attach(self, stream: str, message: Dict[str, Any]) -> None:
+        """记录承载观察流最近一次观察的工具消息"""
+        snapshot = self._snapshots.get(stream)
+        if snapshot is not None:
+            snapshot.carriers.append((message, message.get("content")))
+
+    def sync(self, messages: List[Dict[str, Any]], prefix: str = "") -> None:
+        """
+        丢弃基准已不在提示词中的观察流
+
+        承载完整快照或其后差异的消息不在 messages 中（记忆被清空、重试时重建）
+        或内容已改变（被摘要或替换为占位）时，模型无法还原差异的基准。
+
+        Args:
+            messages: 即将发给模型的消息
+            prefix: 只检查以该前缀开头的观察流（例如Agent名称）
+        """
+        present = {id(message) for message in messages}
+        for stream in [name for name in self._snapshots if name.startswith(prefix)]:
+            carriers = self._snapshots[stream].carriers
+            if not carriers or any(
+                id(message) not in present or message.get("content") != content
+                for message, content in carriers
+            ):
+                del self._snapshots[stream]
+
+    def carriers(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """
+        承载各观察流当前基准的工具消息，压缩记忆时应保持不变
+
+        Args:
+            prefix: 只返回以该前缀开头的观察流（例如Agent名称）
+        """
+        return [
+            message
+            for name, snapshot in self._snapshots.items() if name.startswith(prefix)
+            for message, _ in snapshot.carriers
+        ]
+
+    def _full(self, stream: str, elements: List[Dict[str, Any]], encoded: EncodedObservation) -> EncodedObservation:
+        selected = set(self.encoder.select(elements))
+        nodes = {}
+        for index, element in enumerate(elements):
+            nodes[element_key(element)] = (
+                f"e{index + 1}" if index in selected else None,
+                _signature(element),
+            )
+        self._snapshots[stream] = _Snapshot(nodes=nodes, next_id=len(elements) + 1)
+        self.full_snapshots += 1
+        return encoded
+
+    def _diff(self, snapshot: _Snapshot, elements: List[Dict[str, Any]]) -> Optional[EncodedObservation]:
+        """计算与上次快照的差异；变化过大时返回None"""
+        current = {element_key(element): element for element in elements}
+        visible = [key for key, (element_id, _) in snapshot.nodes.items() if element_id]
+        removed = [key for key in visible if key not in current]
+        changed = [
+            key for key in visible
+            if key in current and _signature(current[key]) != snapshot.nodes[key][1]
+        ]
+        new = [index for index, element in enumerate(elements) if element_key(element) not in snapshot.nodes]
+        if len(new) > self.encoder.max_elements:
+            return None
+        if len(new) + len(removed) + len(changed) > self.max_change_ratio * max(len(visible), 1):
+            return None
+
+        nodes = dict(snapshot.nodes)
+        next_id = snapshot.next_id
+        added = []
+        for index in new:
+            element_id = f"e{next_id}"
+            next_id += 1
+            nodes[element_key(elements[index])] = (element_id, _signature(elements[index]))
+            added.append((element_id, elements[index]))
+        for key in removed:
+            del nodes[key]
+        for key in changed:
+            nodes[key] = (nodes[key][0], _signature(current[key]))
+        for key in list(nodes):
+            if key not in current:
+                del nodes[key]
+
+        lines = [
+            f"界面变化(相对上次观察): 新增{len(added)} 移除{len(removed)} "
+            f"变化{len(changed)} 未变{len(visible) - len(removed) - len(changed)}"
+        ]
+        id_map = {}
+        for element_id, element in added:
+            lines.append("+" + self.encoder._row(element_id, element).strip())
+            id_map[element_id] = (element["center_x"], element["center_y"])
+        for key in removed:
+            element_id, (label, _) = snapshot.nodes[key]
+            lines.append(f"-{element_id}|{label.replace('|', '/')}" if label else f"-{element_id}")
+        for key in changed:
+            element_id = nodes[key][0]
+            lines.append("~" + self.encoder._row(element_id, current[key]).strip())
+            id_map[element_id] = (current[key]["center_x"], current[key]["center_y"])
+
+        untouched = set(removed) | set(changed)
+        anchors = []
+        for element in elements:
+            key = element_key(element)
+            element_id = snapshot.nodes.get(key, (None,))[0]
+            if element_id and key not in untouched:
+                id_map[element_id] = (element["center_x"], element["center_y"])
+                label = element_label(element)
+                if label and len(anchors) < self.anchors:
+                    anchors.append(f"{element_id}{'*' if element.get('clickable') else ''} {label}")
+        if anchors:
+            lines.append("锚点: " + " | ".join(anchors))
+
+        snapshot.nodes = nodes
+        snapshot.next_id = next_id
+        snapshot.diffs += 1
+        self.diffs += 1
+        return EncodedObservation(
+            text="\n".join(lines),
+            ids=id_map,
+            total=len(elements),
+            shown=len(id_map),
+            mode=MODE_DIFF,
+        )
+
+    def observe(self, elements: List[Dict[str, Any]], stream: str = "screen") -> EncodedObservation:
+        """
+        编码一次观察，必要时只发送与上次观察的差异
+
+        Args:
+            elements: parse_ui_elements 返回的元素列表
+            stream: 观察流名称；只有同一观察流的快照之间才计算差异
+
+        Returns:
+            EncodedObservation，mode 为 "full" 或 "diff"
+        """
+        full = self.encoder.encode(elements)
+        full_tokens = estimate_tokens(full.text)
+        snapshot = self._snapshots.get(stream)
+        encoded = None
+        if snapshot is not None and snapshot.diffs < self.max_diffs:
+            encoded = self._diff(snapshot, elements)
+        if encoded is None:
+            encoded = self._full(stream, elements, full)
+
+        self.observations += 1
+        self.tokens_full += full_tokens
+        self.tokens_sent += full_tokens if encoded is full else estimate_tokens(encoded.text)
+        return encoded
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_full - self.tokens_sent
+
+    def stats(self) -> Dict[str, Any]:
+        """会话的增量观察统计"""
+        return {
+            "observations": self.observations,
+            "full_snapshots": self.full_snapshots,
+            "diffs": self.diffs,
+            "tokens_full": self.tokens_full,
+            "tokens_sent": self.tokens_sent,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def get_observation_tracker(context: Any, encoder: Optional[ObservationEncoder] = None) -> Optional[ObservationTracker]:
+    """
+    获取上下文（会话）的增量观察，首次调用时创建
+
+    Args:
+        context: 会话上下文，增量观察保存在其 observation_tracker 属性上
+        encoder: 创建时使用的观察编码器
+
+    Returns:
+        ObservationTracker；未启用增量观察或没有上下文时返回None
+    """
+    if not INCREMENTAL_OBSERVATIONS or context is None:
+        return None
+    tracker = getattr(context, "observation_tracker", None)
+    if tracker is None:
+        tracker = ObservationTracker(encoder)
+        context.observation_tracker = tracker
+    return tracker
+
+
+_default_encoder: Optional[ObservationEncoder] = None
+
+
+def get_observation_encoder() -> ObservationEncoder:
+    """获取默认的观察编码器"""
+    global _default_encoder
+    if _default_encoder is None:
+        _default_encoder = ObservationEncoder()
+    return _default_encoder
+
+
+def observation_stream(result: Dict[str, Any], prefix: str = "") -> str:
+    """观察流名称：筛选条件不同的结果（如全屏与按文本查找）之间不计算差异"""
+    criteria = result.get("search_criteria") or {}
+    return f"{prefix}:" + json.dumps(criteria, ensure_ascii=False, sort_keys=True)
+
+
+def encode_tool_result(
+    result: Any,
+    encoder: Optional[ObservationEncoder] = None,
+    tracker: Optional[ObservationTracker] = None,
+    stream: str = "",
+) -> str:
+    """
+    把工具结果序列化为发给模型的文本
+
+    结果中的UI元素列表（elements 字段）替换为紧凑的 observation 文本，
+    其他结果与原来一样序列化为JSON
+
+    Args:
+        result: 工具返回值
+        encoder: 观察编码器，默认使用 get_observation_encoder()
+        tracker: 会话的增量观察；提供时可能只发送与上次观察的差异
+        stream: 观察流名称前缀（例如Agent名称），不同前缀的观察互不比较
+
+    Returns:
+        str: 工具消息内容
+    """
+    return _encode_result(result, encoder, tracker, stream)[0]
+
+
+def _encode_result(
+    result: Any,
+    encoder: Optional[ObservationEncoder],
+    tracker: Optional[ObservationTracker],
+    stream: str,
+) -> Tuple[str, Optional[str]]:
+    """序列化工具结果，同时返回增量观察使用的观察流名称（没有时为None）"""
+    if isinstance(result, dict) and is_ui_element_list(result.get("elements")):
+        tracked = None
+        if tracker is not None:
+            tracked = observation_stream(result, stream)
+            encoded = tracker.observe(result["elements"], tracked)
+        else:
+            encoded = (encoder or get_observation_encoder()).encode(result["elements"])
+        compact = {key: value for key, value in result.items() if key != "elements"}
+        compact["observation"] = encoded.text
+        return json.dumps(compact, ensure_ascii=False), tracked
+    return json.dumps(result), None
+
+
+def encode_tool_message(
+    tool_call_id: str,
+    result: Any,
+    encoder: Optional[ObservationEncoder] = None,
+    tracker: Optional[ObservationTracker] = None,
+    stream: str = "",
+) -> Dict[str, Any]:
+    """
+    构造工具结果消息
+
+    与 encode_tool_result 相同，另外把消息登记为观察流的承载消息，
+    之后 tracker.sync 据此判断差异的基准是否仍在提示词中
+
+    Returns:
+        Dict: role 为 tool 的消息
+    """
+    content, tracked = _encode_result(result, encoder, tracker, stream)
+    message = {"role": "tool", "tool_call_id": tool_call_id, "content": content}
+    if tracked is not None:
+        tracker.attach(tracked, message)
+    return message
@@ -0,0 +1,273 @@
+"""
+操作步骤DAG执行器
+Operation Step DAG Executor
+
+将业务操作的步骤描述为有向无环图：每个步骤通过 after 声明依赖，
+互不依赖的步骤（例如上一步点击等待界面稳定时，并行完成截图识别）并发执行。
+支持步骤级超时与重试，输出结构化的分步耗时，并可从失败的步骤恢复执行。
+
+步骤格式:
+    {"id": "tap", "action": "find_and_tap", "target": "话费",
+     "after": ["launch"], "timeout": 15, "retries": 1}
+
+未声明 after 的步骤默认依赖上一个步骤，因此旧的顺序步骤列表可以直接执行。
+"""
+
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+StepHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# 步骤状态
+PENDING = "pending"
+SUCCESS = "success"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class StepRecord:
+    """单个步骤的执行记录"""
+    id: str
+    action: str
+    status: str = PENDING
+    attempts: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "action": self.action,
+            "status": self.status,
+            "attempts": self.attempts,
+            "started": None if self.started is None else round(self.started, 3),
+            "finished": None if self.finished is None else round(self.finished, 3),
+            "elapsed": None if self.elapsed is None else round(self.elapsed, 3),
+            "result": self.result,
+        }
+
+
+def normalize_steps(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    补全步骤的 id 和 after 字段并检查依赖
+
+    Raises:
+        ValueError: 步骤id重复、依赖不存在或存在环
+    """
+    normalized = []
+    ids = set()
+    previous = None
+    for index, step in enumerate(steps):
+        step = dict(step)
+        step.setdefault("id", f"step_{index + 1}")
+        if "after" not in step:
+            step["after"] = [previous] if previous else []
+        elif isinstance(step["after"], str):
+            step["after"] = [step["after"]]
+        if step["id"] in ids:
+            raise ValueError(f"步骤id重复: {step['id']}")
+        ids.add(step["id"])
+        previous = step["id"]
+        normalized.append(step)
+
+    for step in normalized:
+        for dep in step["after"]:
+            if dep not in ids:
+                raise ValueError(f"步骤 {step['id']} 依赖不存在的步骤: {dep}")
+
+    # 拓扑检查
+    remaining = {step["id"]: set(step["after"]) for step in normalized}
+    while remaining:
+        ready = [sid for sid, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"步骤依赖存在环: {sorted(remaining)}")
+        for sid in ready:
+            del remaining[sid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return normalized
+
+
+class OperationDAG:
+    """
+    操作步骤DAG执行器
+
+    通过 action 名称到处理函数的映射适配不同的设备操作工具类，
+    处理函数接收步骤字典，返回包含 success 字段的结果字典。
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, StepHandler],
+        max_workers: int = 3,
+        default_timeout: float = 30.0,
+        default_retries: int = 0,
+        retry_delay: float = 0.5,
+    ):
+        """
+        初始化执行器
+
+        Args:
+            handlers: action 名称到处理函数的映射
+            max_workers: 最大并发步骤数
+            default_timeout: 步骤默认超时秒数
+            default_retries: 步骤默认重试次数
+            retry_delay: 重试前等待的秒数
+        """
+        self.handlers = handlers
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.default_retries = default_retries
+        self.retry_delay = retry_delay
+
+    def _call(self, step: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+        """在工作线程中执行一次步骤"""
+        if attempt > 0 and self.retry_delay:
+            time.sleep(self.retry_delay)
+        handler = self.handlers.get(step["action"])
+        if handler is None:
+            return {"success": False, "message": f"未知步骤: {step['action']}"}
+        try:
+            result = handler(step)
+        except Exception as e:
+            return {"success": False, "message": f"步骤执行异常: {str(e)}"}
+        return result if isinstance(result, dict) else {"success": bool(result)}
+
+    def run(self, steps: List[Dict[str, Any]], checkpoint: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        执行步骤图
+
+        Args:
+            steps: 步骤列表
+            checkpoint: 上一次执行返回的结果，其中已成功的步骤不再执行
+
+        Returns:
+            执行结果，包含 success、failed_step、steps（分步记录）、
+            wall_time 以及可用于恢复执行的 checkpoint
+        """
+        steps = normalize_steps(steps)
+        by_id = {step["id"]: step for step in steps}
+        records = {step["id"]: StepRecord(step["id"], step["action"]) for step in steps}
+
+        completed = set()
+        if checkpoint:
+            for sid, previous in checkpoint.get("completed", {}).items():
+                if sid in records:
+                    records[sid].status = SKIPPED
+                    records[sid].result = previous
+                    completed.add(sid)
+
+        start = time.perf_counter()
+        running: Dict[Future, str] = {}
+        # 未设置超时（timeout 为 None 或 0）的步骤没有截止时间
+        deadlines: Dict[Future, Optional[float]] = {}
+        # 已超时但线程仍在执行的尝试，结束后才提交重试
+        abandoned = set()
+        scheduled = set(completed)
+        failed_step = None
+
+        def submit(sid: str):
+            record = records[sid]
+            if record.started is None:
+                record.started = time.perf_counter() - start
+            future = pool.submit(self._call, by_id[sid], record.attempts)
+            record.attempts += 1
+            timeout = by_id[sid].get("timeout", self.default_timeout)
+            running[future] = sid
+            deadlines[future] = time.perf_counter() + timeout if timeout else None
+
+        def finish(sid: str, result: Dict[str, Any], retry: bool = True) -> bool:
+            """记录一次尝试的结果，返回是否需要重试"""
+            record = records[sid]
+            retries = by_id[sid].get("retries", self.default_retries)
+            if retry and not result.get("success", False) and record.attempts <= retries:
+                logger.info(f"步骤 {sid} 第 {record.attempts} 次执行失败，重试")
+                return True
+            record.finished = time.perf_counter() - start
+            record.result = result
+            record.status = SUCCESS if result.get("success", False) else FAILED
+            return False
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="operation-step")
+        try:
+            while True:
+                if failed_step is None:
+                    for step in steps:
+                        sid = step["id"]
+                        if sid not in scheduled and all(dep in completed for dep in step["after"]):
+                            scheduled.add(sid)
+                            submit(sid)
+                if not running:
+                    break
+
+                finite = [deadline for deadline in deadlines.values() if deadline is not None]
+                timeout = max(0.0, min(finite) - time.perf_counter()) if finite else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    sid = running.pop(future)
+                    deadlines.pop(future)
+                    # 超时的尝试已结束，设备上不再有同一步骤在执行：
+                    # 迟到的成功结果直接采用，仍失败时才提交重试
+                    abandoned.discard(future)
+                    if finish(sid, future.result()):
+                        submit(sid)
+                    elif records[sid].status == SUCCESS:
+                        completed.add(sid)
+                    elif failed_step is None:
+                        failed_step = sid
+
+                # 超时的步骤无法中断，放弃其结果；点击、输入等步骤的线程仍在操作设备，
+                # 立即重试会让同一步骤执行两次，因此最多再等一个超时周期，结束后才重试
+                now = time.perf_counter()
+                for future in [f for f, deadline in deadlines.items() if deadline is not None and deadline <= now]:
+                    sid = running[future]
+                    timeout = by_id[sid].get("timeout", self.default_timeout)
+                    if future in abandoned:
+                        abandoned.discard(future)
+                        retry = False
+                        message = f"步骤超时（{timeout}s），且超时后仍未结束"
+                    else:
+                        retry = True
+                        message = f"步骤超时（{timeout}s）"
+                    if finish(sid, {"success": False, "message": message}, retry):
+                        abandoned.add(future)
+                        deadlines[future] = now + timeout
+                        continue
+                    running.pop(future)
+                    deadlines.pop(future)
+                    if failed_step is None:
+                        failed_step = sid
+        finally:
+            pool.shutdown(wait=False)
+
+        wall_time = time.perf_counter() - start
+        success = failed_step is None and len(completed) == len(steps)
+        if failed_step:
+            logger.warning(f"步骤 {failed_step} 执行失败，可从该步骤恢复执行")
+
+        return {
+            "success": success,
+            "failed_step": failed_step,
+            "steps_executed": sum(1 for r in records.values() if r.status in (SUCCESS, FAILED)),
+            "steps": [records[step["id"]].to_dict() for step in steps],
+            "results": [records[step["id"]].result for step in steps if records[step["id"]].status != PENDING],
+            "wall_time": round(wall_time, 3),
+            "checkpoint": {
+                "completed": {sid: records[sid].result for sid in completed}
+            },
+        }
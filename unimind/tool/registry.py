@@ -0,0 +1,184 @@
+"""
+Registry of all tools defined with the @tool decorator.
+
+Tools register themselves when they are decorated, so looking one up is a
+dict access instead of an `inspect.getmembers` scan of the Tools class, and
+everything derived from the function (required arguments, whether it takes
+the context, its OpenAI schema) is computed once.
+
+Tools may be plain or static functions (e.g. `Tools`) or instance methods
+(e.g. `AppAutomationTools`, `UnicomAndroidTools`). Methods are called on the
+instance bound with `tool_registry.bind(instance)`, or on one created lazily
+with the class's no-argument constructor.
+"""
+
+import sys
+import inspect
+import importlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Tool modules not imported by `unimind.tool` itself, loaded on first lookup
+OPTIONAL_TOOL_MODULES = ("unimind.tool.unicom_android_tools",)
+
+
+@dataclass
+class ToolEntry:
+    """A registered tool and its precomputed metadata."""
+
+    name: str
+    func: Callable
+    group: str
+    read_only: bool
+    confirmation_required: bool
+    # Module and class name of the owner for instance methods
+    module: str
+    owner: Optional[str]
+    # Class the tool is defined in, for methods and static methods (e.g. "Tools")
+    namespace: Optional[str]
+    # Arguments the caller must provide (without self and context)
+    required: Tuple[str, ...]
+    takes_context: bool
+    # Memoized `get_openai_schema` of the tool
+    schema_factory: Callable[[], Dict[str, Any]] = field(repr=False, default=None)
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        """The OpenAI schema, built on first access. Shared: do not mutate."""
+        return self.schema_factory()
+
+
+class ToolRegistry:
+    """
+    Name-indexed registry of tools with group indexes and bound instances.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, ToolEntry] = {}
+        self._groups: Dict[str, List[str]] = {}
+        self._instances: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def register(self, wrapper: Callable, func: Callable) -> ToolEntry:
+        """
+        Register a decorated tool. Called by @tool.
+
+        Args:
+            wrapper: The decorated function carrying the tool metadata
+            func: The original function (for its signature and qualified name)
+
+        Returns:
+            ToolEntry of the tool
+        """
+        parameters = list(inspect.signature(func).parameters.values())
+        is_method = bool(parameters) and parameters[0].name == "self"
+        if is_method:
+            parameters = parameters[1:]
+        required = tuple(
+            param.name
+            for param in parameters
+            if param.default is param.empty
+            and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+            and param.name != "context"
+        )
+        qualname = func.__qualname__.split(".<locals>.")[-1]
+        entry = ToolEntry(
+            name=wrapper.tool_name,
+            func=wrapper,
+            group=wrapper.tool_group,
+            read_only=wrapper.read_only,
+            confirmation_required=wrapper.confirmation_required,
+            module=func.__module__,
+            owner=qualname.rsplit(".", 1)[0] if is_method and "." in qualname else None,
+            namespace=qualname.rsplit(".", 1)[0] if "." in qualname else None,
+            required=required,
+            takes_context=any(param.name == "context" for param in parameters),
+            schema_factory=wrapper.get_openai_schema,
+        )
+
+        with self._lock:
+            previous = self._tools.get(entry.name)
+            if previous is not None and previous.group in self._groups:
+                self._groups[previous.group].remove(entry.name)
+            self._tools[entry.name] = entry
+            self._groups.setdefault(entry.group, []).append(entry.name)
+        return entry
+
+    def _ensure_loaded(self) -> None:
+        """Import the tool modules that `unimind.tool` does not import (once)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            for module in OPTIONAL_TOOL_MODULES:
+                try:
+                    importlib.import_module(module)
+                except ImportError as e:
+                    print(f"Warning: tools of {module} unavailable: {e}")
+
+    def get(self, name: str) -> Optional[ToolEntry]:
+        """Return the entry of a tool, or None."""
+        entry = self._tools.get(name)
+        if entry is None and not self._loaded:
+            self._ensure_loaded()
+            entry = self._tools.get(name)
+        return entry
+
+    def entries(self, *groups: str, namespace: Optional[str] = None) -> List[ToolEntry]:
+        """
+        Return the entries of all tools, or of the given groups, in registration order.
+
+        Args:
+            *groups: If provided, only return tools from these groups
+            namespace: If provided, only return tools defined in this class (e.g. "Tools")
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if not groups:
+                entries = list(self._tools.values())
+            else:
+                entries = [
+                    self._tools[name] for group in groups for name in self._groups.get(group, [])
+                ]
+        if namespace is None:
+            return entries
+        return [entry for entry in entries if entry.namespace == namespace]
+
+    def groups(self) -> List[str]:
+        """Return the groups having at least one tool."""
+        self._ensure_loaded()
+        with self._lock:
+            return [group for group, names in self._groups.items() if names]
+
+    def bind(self, instance: Any) -> None:
+        """Use `instance` for the tools defined as methods of its class."""
+        cls = type(instance)
+        with self._lock:
+            self._instances[(cls.__module__, cls.__qualname__)] = instance
+
+    def _instance(self, entry: ToolEntry) -> Any:
+        key = (entry.module, entry.owner)
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                owner = sys.modules[entry.module]
+                for part in entry.owner.split("."):
+                    owner = getattr(owner, part)
+                instance = self._instances[key] = owner()
+            return instance
+
+    def resolve(self, entry: ToolEntry) -> Callable:
+        """Return the callable of a tool, bound to its instance for methods."""
+        if entry.owner is None:
+            return entry.func
+        return entry.func.__get__(self._instance(entry))
+
+
+tool_registry = ToolRegistry()
@@ -0,0 +1,232 @@
+"""
+滚动采集工具
+Scroll-and-Collect Utilities
+
+在超过一屏的列表（领券中心、账单记录、权益超市等）中逐页滑动并采集元素。
+相邻两页之间的重叠元素按稳定键（文本 + 相对容器的内容坐标）去重，
+结果以生成器逐个产出，调用方可以在滑动结束前就开始处理。
+"""
+
+import time
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .ui_dump import parse_bounds
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]
+Element = Dict[str, Any]
+
+# 滑动起止点距容器上下边缘的比例，保证相邻两页有重叠
+SWIPE_MARGIN = 0.15
+
+
+def _element_bounds(elem: Element) -> Optional[Bounds]:
+    """获取元素的坐标"""
+    return parse_bounds(elem.get("bounds", ""))
+
+
+def _resolve_container(
+    container: Union[None, str, Element, Bounds], elements: List[Element]
+) -> Optional[Bounds]:
+    """
+    将容器参数统一为坐标元组
+
+    Args:
+        container: None（整个屏幕）、bounds字符串、元素字典或坐标元组
+        elements: 当前页面元素，容器为None时用于推断屏幕范围
+    """
+    if container is None:
+        coords = [b for b in (_element_bounds(e) for e in elements) if b]
+        if not coords:
+            return None
+        return (
+            min(b[0] for b in coords),
+            min(b[1] for b in coords),
+            max(b[2] for b in coords),
+            max(b[3] for b in coords),
+        )
+    if isinstance(container, str):
+        return parse_bounds(container)
+    if isinstance(container, dict):
+        return _element_bounds(container)
+    return tuple(container)
+
+
+class ScrollCollector:
+    """
+    逐页滑动采集元素
+
+    通过注入 dump 和 swipe 两个回调适配不同的设备操作工具类。
+    """
+
+    def __init__(
+        self,
+        dump: Callable[[], List[Element]],
+        swipe: Callable[[int, int, int, int], Any],
+        settle: float = 0.0,
+        max_pages: int = 10,
+    ):
+        """
+        初始化采集器
+
+        Args:
+            dump: 获取当前屏幕元素列表的回调
+            swipe: 执行滑动的回调，参数为 (start_x, start_y, end_x, end_y)
+            settle: 每次滑动后等待界面稳定的秒数
+            max_pages: 最多采集的页数（包括首屏）
+        """
+        self.dump = dump
+        self.swipe = swipe
+        self.settle = settle
+        self.max_pages = max_pages
+
+    @staticmethod
+    def _shape_key(elem: Element, bounds: Bounds, container: Bounds) -> Tuple:
+        """与纵向位置无关的键，用于估计两页之间的滚动距离"""
+        x1, y1, x2, y2 = bounds
+        return (elem.get("text", ""), x1 - container[0], x2 - container[0], y2 - y1)
+
+    @staticmethod
+    def _estimate_offset(
+        previous: List[Tuple[Tuple, int]], current: List[Tuple[Tuple, int]]
+    ) -> Optional[int]:
+        """
+        估计新一页相对上一页的滚动距离
+
+        同形元素（文本、横向位置、尺寸相同）的纵向差值中出现次数最多的
+        即为滚动距离。位置不变的元素（标题栏、底部导航等）只在没有其他
+        重叠时才说明页面未滚动；完全没有重叠时返回None。
+        """
+        by_shape: Dict[Tuple, List[int]] = {}
+        for shape, y in previous:
+            by_shape.setdefault(shape, []).append(y)
+
+        votes = Counter()
+        unchanged = False
+        for shape, y in current:
+            for prev_y in by_shape.get(shape, ()):
+                if prev_y > y:
+                    votes[prev_y - y] += 1
+                elif prev_y == y:
+                    unchanged = True
+        if votes:
+            return votes.most_common(1)[0][0]
+        return 0 if unchanged else None
+
+    def collect(
+        self,
+        container: Union[None, str, Element, Bounds] = None,
+        until: Optional[Callable[[Element], bool]] = None,
+    ) -> Iterator[Element]:
+        """
+        滑动并逐个产出新出现的元素
+
+        Args:
+            container: 滚动容器，可为 bounds 字符串、元素字典、坐标元组，None 表示整个屏幕
+            until: 目标判断函数，对某个元素返回True时产出该元素后立即停止
+
+        Yields:
+            新元素，额外包含 content_y（在整个列表中的纵向坐标）、
+            page（首次出现的页码）和 key（稳定键）字段
+        """
+        elements = self.dump()
+        bounds = _resolve_container(container, elements)
+        if not bounds:
+            logger.warning("无法确定滚动容器范围")
+            return
+
+        cx1, cy1, cx2, cy2 = bounds
+        seen = set()
+        # 标题栏、底部导航等固定元素的 (形状, 屏幕纵坐标)
+        fixed = set()
+        previous: List[Tuple[Tuple, int]] = []
+        scrolled = 0
+
+        for page in range(self.max_pages):
+            if page > 0:
+                elements = self.dump()
+
+            current = []
+            for elem in elements:
+                elem_bounds = _element_bounds(elem)
+                if not elem_bounds:
+                    continue
+                center_x = (elem_bounds[0] + elem_bounds[2]) // 2
+                center_y = (elem_bounds[1] + elem_bounds[3]) // 2
+                if cx1 <= center_x <= cx2 and cy1 <= center_y <= cy2:
+                    current.append((elem, elem_bounds))
+
+            shapes = [(self._shape_key(e, b, bounds), b[1]) for e, b in current]
+            if page > 0:
+                offset = self._estimate_offset(previous, shapes)
+                # 没有重叠时按滑动距离估算
+                if offset is None:
+                    offset = self._swipe_distance(bounds)
+                scrolled += offset
+                # 页面滚动后位置仍不变的元素不属于列表内容
+                if offset > 0:
+                    fixed.update(set(previous) & set(shapes))
+            previous = shapes
+
+            added = 0
+            for (elem, elem_bounds), (shape, y1) in zip(current, shapes):
+                if (shape, y1) in fixed:
+                    continue
+                content_y = y1 - cy1 + scrolled
+                key = (*shape, content_y)
+                if key in seen:
+                    continue
+                seen.add(key)
+                added += 1
+
+                item = dict(elem)
+                item["content_y"] = content_y
+                item["page"] = page
+                item["key"] = key
+                yield item
+
+                if until and until(item):
+                    logger.info(f"滚动采集在第 {page + 1} 页找到目标")
+                    return
+
+            if page > 0 and added == 0:
+                logger.info(f"第 {page + 1} 页没有新元素，停止滚动")
+                return
+
+            if page + 1 < self.max_pages:
+                self._scroll(bounds)
+
+    @staticmethod
+    def _swipe_distance(bounds: Bounds) -> int:
+        """单次滑动的理论距离"""
+        height = bounds[3] - bounds[1]
+        return int(height * (1 - 2 * SWIPE_MARGIN))
+
+    def _scroll(self, bounds: Bounds) -> None:
+        """在容器内向上滑动一页"""
+        x1, y1, x2, y2 = bounds
+        height = y2 - y1
+        x = (x1 + x2) // 2
+        start_y = int(y2 - height * SWIPE_MARGIN)
+        end_y = int(y1 + height * SWIPE_MARGIN)
+        self.swipe(x, start_y, x, end_y)
+        if self.settle:
+            time.sleep(self.settle)
+
+
+def text_matches(*keywords: str) -> Callable[[Element], bool]:
+    """
+    构造按文本匹配的 until 判断函数
+
+    Args:
+        *keywords: 任一关键词出现在元素文本中即视为命中
+    """
+
+    def predicate(elem: Element) -> bool:
+        text = elem.get("text", "")
+        return any(keyword in text for keyword in keywords)
+
+    return predicate
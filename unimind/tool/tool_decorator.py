@@ -2,6 +2,7 @@ import inspect
 import functools
 from dataclasses import dataclass
 from typing import Any, Callable, Optional, Type, Union, get_type_hints
+from .registry import tool_registry
 
 
 @dataclass
@@ -20,6 +21,7 @@ def tool(
     description: Optional[str] = None,
     confirmation_required: bool = False,
     group: str = "general",
+    read_only: bool = False,
 ):
     """
     Decorator to mark a function as a tool and provide OpenAI API tools format metadata.
@@ -29,6 +31,8 @@ def tool(
         description: Optional description (defaults to function docstring)
         confirmation_required: Whether user confirmation is required before execution
         group: Group/category this tool belongs to (default: "general")
+        read_only: Whether the tool is free of side effects, so that several calls
+            in one model response may run concurrently (default: False)
 
     Returns:
         Decorated function with OpenAI tools metadata
@@ -47,6 +51,7 @@ def tool(
             description=description,
             confirmation_required=confirmation_required,
             group=group,
+            read_only=read_only,
         )
 
     return decorator
@@ -58,6 +63,7 @@ def _tool_impl(
     description: Optional[str] = None,
     confirmation_required: bool = False,
     group: str = "general",
+    read_only: bool = False,
 ):
     """
     Actual implementation of the tool decorator
@@ -68,6 +74,7 @@ def _tool_impl(
         description: Optional description
         confirmation_required: Whether user confirmation is required before execution
         group: Group/category this tool belongs to
+        read_only: Whether the tool is free of side effects
     """
     func_name = name or func.__name__
     signature = inspect.signature(func)
@@ -78,6 +85,7 @@ def _tool_impl(
 
     # Extract parameter specifications
     params = []
+    type_hints = get_type_hints(func)
     for param_name, param in signature.parameters.items():
         if param_name == "self":
             continue
@@ -99,7 +107,7 @@ def _tool_impl(
                 elif f"{param_name} (" in line:
                     param_desc = line.split(":", 1)[1].strip() if ":" in line else ""
 
-        param_type = get_type_hints(func).get(param_name, str)
+        param_type = type_hints.get(param_name, str)
 
         params.append(
             ParameterSpec(
@@ -122,9 +130,10 @@ def _tool_impl(
     wrapper.tool_parameters = params
     wrapper.confirmation_required = confirmation_required
     wrapper.tool_group = group
+    wrapper.read_only = read_only
 
     # Add a method to get OpenAI format
-    def get_openai_schema():
+    def build_openai_schema():
         properties = {}
         required_params = []
 
@@ -164,7 +173,9 @@ def _tool_impl(
 
         return schema
 
-    wrapper.get_openai_schema = get_openai_schema
+    # The schema never changes, so it is built once on first use
+    wrapper.get_openai_schema = functools.lru_cache(maxsize=None)(build_openai_schema)
+    tool_registry.register(wrapper, func)
     return wrapper
 
 
@@ -154,6 +154,7 @@ class Tools:
         "read_file",
         description="Read the content of a file",
         group="file_system",
+        read_only=True,
     )
     def read_file(path: str) -> Dict[str, Any]:
         """
@@ -225,6 +226,7 @@ class Tools:
         "list_project_structure",
         description="List the structure of the project",
         group="file_system",
+        read_only=True,
     )
     def list_directory() -> Dict[str, Any]:
         """
@@ -369,6 +371,7 @@ class Tools:
         "get_code_structure",
         description="Get the code structure of one file",
         group="development",
+        read_only=True,
     )
     def get_code_structure(file: str) -> Dict[str, Any]:
         """
@@ -412,6 +415,7 @@ class Tools:
         "run_static_analysis",
         description="Run static analysis on file",
         group="development",
+        read_only=True,
     )
     def run_static_analysis(file_path: str) -> Dict[str, Any]:
         """
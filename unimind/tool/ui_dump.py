@@ -0,0 +1,118 @@
+"""
+UI dump解析工具
+UI Dump Parsing Utilities
+
+将 uiautomator dump 出的XML解析为工具层统一使用的元素列表
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List
+
+BOUNDS_PATTERN = re.compile(r"\[(\d+),(\d+)\]\[(\d+),(\d+)\]")
+NODE_BOUNDS_PATTERN = re.compile(
+    r'<node[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"[^>]*/?>'
+)
+# 视为容器的控件类名后缀
+CONTAINER_CLASSES = ("RecyclerView", "ListView", "GridView", "ScrollView", "ViewPager", "TabLayout")
+
+
+def parse_bounds(bounds: str):
+    """
+    解析bounds字符串
+
+    Args:
+        bounds: 形如 "[x1,y1][x2,y2]" 的字符串
+
+    Returns:
+        (x1, y1, x2, y2) 元组，无法解析时返回None
+    """
+    match = BOUNDS_PATTERN.match(bounds or "")
+    if not match:
+        return None
+    return tuple(map(int, match.groups()))
+
+
+def short_resource_id(resource_id: str) -> str:
+    """去掉包名前缀的resource-id，如 com.x:id/title -> title"""
+    return (resource_id or "").rsplit("/", 1)[-1]
+
+
+def _container_of(node, parents: Dict[Any, Any]) -> str:
+    """最近的容器祖先：可滚动、列表类控件或带resource-id的布局"""
+    parent = parents.get(node)
+    while parent is not None:
+        resource_id = short_resource_id(parent.get("resource-id", ""))
+        class_name = parent.get("class", "")
+        if parent.get("scrollable") == "true" or class_name.endswith(CONTAINER_CLASSES):
+            return resource_id or class_name.rsplit(".", 1)[-1]
+        if resource_id:
+            return resource_id
+        parent = parents.get(parent)
+    return ""
+
+
+def parse_ui_elements(content: str, with_container: bool = False) -> List[Dict[str, Any]]:
+    """
+    解析UI dump内容，提取有文本、描述或可点击的元素
+
+    Args:
+        content: uiautomator dump 的XML文本
+        with_container: 是否为每个元素附加所属容器（container 字段），供观察编码分组
+
+    Returns:
+        元素列表，每个元素包含 text、bounds、center_x、center_y、clickable、
+        raw_text、content_desc、resource_id 字段
+    """
+    elements = []
+
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        # 如果XML解析失败，使用正则表达式
+        for match in NODE_BOUNDS_PATTERN.findall(content):
+            x1, y1, x2, y2 = map(int, match)
+            if (x1, y1, x2, y2) != (0, 0, 0, 0):
+                elements.append({
+                    "text": f"UI元素[{x1},{y1}]",
+                    "bounds": f"[{x1},{y1}][{x2},{y2}]",
+                    "center_x": int((x1 + x2) / 2),
+                    "center_y": int((y1 + y2) / 2),
+                    "clickable": True
+                })
+        return elements
+
+    parents = {child: parent for parent in root.iter() for child in parent} if with_container else None
+
+    for node in root.iter("node"):
+        node_text = node.get("text", "").strip()
+        content_desc = node.get("content-desc", "").strip()
+        bounds = node.get("bounds", "")
+        clickable = node.get("clickable", "false")
+
+        # 只处理有效的UI元素
+        if not bounds or bounds == "[0,0][0,0]":
+            continue
+        coords = parse_bounds(bounds)
+        if not coords:
+            continue
+        x1, y1, x2, y2 = coords
+
+        # 有文本、描述或可点击的元素
+        if node_text or content_desc or clickable == "true":
+            display_text = node_text or content_desc or f"可点击元素[{x1},{y1}]"
+            element = {
+                "text": display_text,
+                "bounds": bounds,
+                "center_x": int((x1 + x2) / 2),
+                "center_y": int((y1 + y2) / 2),
+                "clickable": clickable == "true",
+                "raw_text": node_text,
+                "content_desc": content_desc,
+                "resource_id": node.get("resource-id", "")
+            }
+            if parents is not None:
+                element["container"] = _container_of(node, parents)
+            elements.append(element)
+
+    return elements
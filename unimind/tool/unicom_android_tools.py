@@ -6,14 +6,21 @@ China Unicom Android Device Operation Tools
 import os
 import json
 import time
+import uuid
 import subprocess
 import logging
 import cv2
 import numpy as np
 import yaml
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Callable, Iterator, Optional, List, Tuple
 from pathlib import Path
 from .tool_decorator import tool
+from .ui_dump import parse_ui_elements
+from .scroll_collector import ScrollCollector, text_matches
+from .coupon_claimer import CouponClaimer
+from .app_lifecycle import AppLifecycleManager
+from .adb_resilience import run_adb_resilient
+from .operation_dag import OperationDAG
 
 
 class UnicomAndroidTools:
@@ -25,6 +32,22 @@ class UnicomAndroidTools:
         self.scrcpy_process = None
         self.logger = logging.getLogger(__name__)
         self.unicom_apps = self.config.get("unicom_app_packages", {})
+        wait_times = self.config.get("ui_automation", {}).get("wait_times", {})
+        # 失败操作的断点，用于从失败步骤恢复执行
+        self._operation_checkpoints: Dict[str, Dict[str, Any]] = {}
+        self.app_manager = AppLifecycleManager(
+            self._execute_adb_command,
+            cold_timeout=wait_times.get("app_launch", 5) * 2,
+            ready_delay=wait_times.get("element_appear", 2)
+        )
+        # 配置为常驻的APP：关闭时只退到后台保留进程，下次请求即可热启动
+        lifecycle = self.config.get("app_lifecycle", {}) or {}
+        self.prewarm_on_connect = bool(lifecycle.get("prewarm_on_connect", False))
+        for app_name in lifecycle.get("keep_warm", []) or []:
+            if app_name in self.unicom_apps:
+                self.app_manager.keep_warm(self.unicom_apps[app_name])
+            else:
+                self.logger.warning(f"app_lifecycle.keep_warm 中的未知联通APP: {app_name}")
         
     def _load_unicom_config(self) -> Dict[str, Any]:
         """加载中国联通配置"""
@@ -53,7 +76,15 @@ class UnicomAndroidTools:
             return {}
 
     def _execute_adb_command(self, command: str) -> Tuple[bool, str]:
-        """执行ADB命令"""
+        """执行ADB命令（设备短暂离线时自动重试）"""
+        return run_adb_resilient(
+            lambda: self._execute_adb_command_once(command),
+            self.device_id,
+            name="unicom_android.adb"
+        )
+
+    def _execute_adb_command_once(self, command: str) -> Tuple[bool, str]:
+        """执行一次ADB命令"""
         try:
             if self.device_id:
                 full_command = f"{self.config['android_connection']['adb_path']} -s {self.device_id} {command}"
@@ -84,17 +115,20 @@ class UnicomAndroidTools:
             os.makedirs(screenshot_dir, exist_ok=True)
             
             timestamp = int(time.time())
-            screenshot_path = os.path.join(screenshot_dir, f"screenshot_{timestamp}.png")
+            # 只读工具可能并发执行，设备端和本地文件名都带随机后缀
+            suffix = uuid.uuid4().hex[:8]
+            screenshot_path = os.path.join(screenshot_dir, f"screenshot_{timestamp}_{suffix}.png")
+            device_file = f"/sdcard/screenshot_temp_{suffix}.png"
             
             # 使用简单的方法：先保存到设备，再拉取
-            success, output = self._execute_adb_command("shell screencap -p /sdcard/screenshot_temp.png")
+            success, output = self._execute_adb_command(f"shell screencap -p {device_file}")
             if success:
                 # 拉取文件到本地（使用正确的路径格式）
                 normalized_path = screenshot_path.replace("\\", "/")
-                success, output = self._execute_adb_command(f"pull /sdcard/screenshot_temp.png {normalized_path}")
+                success, output = self._execute_adb_command(f"pull {device_file} {normalized_path}")
+                # 清理设备上的临时文件
+                self._execute_adb_command(f"shell rm -f {device_file}")
                 if success:
-                    # 清理设备上的临时文件
-                    self._execute_adb_command("shell rm /sdcard/screenshot_temp.png")
                     return screenshot_path
                 else:
                     self.logger.error(f"拉取截图失败: {output}")
@@ -168,6 +202,47 @@ class UnicomAndroidTools:
             self.logger.error(f"查找联通APP元素失败: {e}")
             return []
 
+    def _read_ui_dump(self) -> Tuple[bool, str]:
+        """导出并读取当前界面的UI结构，每次调用使用独立的设备端临时文件"""
+        device_file = f"/sdcard/ui_dump_{uuid.uuid4().hex[:12]}.xml"
+        success, output = self._execute_adb_command(f"shell uiautomator dump {device_file}")
+        if not success:
+            return False, output
+        success, content = self._execute_adb_command(f"shell cat {device_file}")
+        self._execute_adb_command(f"shell rm -f {device_file}")
+        return success, content
+
+    def _dump_ui_elements(self) -> List[Dict[str, Any]]:
+        """获取当前界面的UI元素列表"""
+        success, content = self._read_ui_dump()
+        if not success:
+            return []
+        return parse_ui_elements(content)
+
+    def scroll_collect(self, container: Any = None, until: Callable[[Dict[str, Any]], bool] = None,
+                       max_pages: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        在长列表中逐页滑动并采集元素
+
+        Args:
+            container: 滚动容器（bounds字符串或元素字典），None表示整个屏幕
+            until: 目标判断函数，命中后立即停止滑动
+            max_pages: 最多采集的页数
+
+        Yields:
+            去重后的新元素
+        """
+        swipe_duration = self.config.get("ui_automation", {}).get("operations", {}).get("swipe_duration", 500)
+        collector = ScrollCollector(
+            dump=self._dump_ui_elements,
+            swipe=lambda x1, y1, x2, y2: self._execute_adb_command(
+                f"shell input swipe {x1} {y1} {x2} {y2} {swipe_duration}"
+            ),
+            settle=1,
+            max_pages=max_pages
+        )
+        return collector.collect(container, until)
+
     @tool(
         "unicom_android_connect",
         description="连接到Android设备，专门用于中国联通APP操作",
@@ -193,11 +268,21 @@ class UnicomAndroidTools:
                 if success and package_name in output:
                     installed_apps.append(app_name)
             
+            # 按配置在后台预先拉起常驻APP
+            prewarmed = []
+            if self.prewarm_on_connect:
+                for app_name in installed_apps:
+                    package_name = self.unicom_apps[app_name]
+                    if package_name in self.app_manager.warm_packages and \
+                            self.app_manager.prewarm(package_name).get("success"):
+                        prewarmed.append(app_name)
+            
             return {
                 "success": True,
                 "message": f"成功连接到设备 {device_id}",
                 "device_id": device_id,
-                "installed_unicom_apps": installed_apps
+                "installed_unicom_apps": installed_apps,
+                "prewarmed_apps": prewarmed
             }
             
         except Exception as e:
@@ -216,18 +301,11 @@ class UnicomAndroidTools:
             
             package_name = self.unicom_apps[app_name]
             
-            # 启动APP
-            success, output = self._execute_adb_command(f"shell monkey -p {package_name} -c android.intent.category.LAUNCHER 1")
-            
-            if success:
-                time.sleep(self.config.get("ui_automation", {}).get("wait_times", {}).get("app_launch", 5))
-                return {
-                    "success": True,
-                    "message": f"成功启动 {app_name}",
-                    "package_name": package_name
-                }
-            else:
-                return {"success": False, "message": f"启动失败: {output}"}
+            # 已在前台则直接复用，已在后台则切回前台，否则冷启动
+            result = self.app_manager.ensure_foreground(package_name)
+            if result["success"]:
+                result["message"] = f"成功启动 {app_name}"
+            return result
                 
         except Exception as e:
             return {"success": False, "message": f"启动失败: {str(e)}"}
@@ -235,7 +313,8 @@ class UnicomAndroidTools:
     @tool(
         "unicom_get_screen_content",
         description="获取当前屏幕内容，专门识别中国联通APP界面元素",
-        group="unicom_android"
+        group="unicom_android",
+        read_only=True
     )
     def unicom_get_screen_content(self, app_context: str = "unicom_app") -> Dict[str, Any]:
         """获取屏幕内容，专门针对联通APP"""
@@ -288,22 +367,21 @@ class UnicomAndroidTools:
     @tool(
         "unicom_find_element_by_text",
         description="在联通APP中根据文本查找元素",
-        group="unicom_android"
+        group="unicom_android",
+        read_only=True
     )
     def unicom_find_element_by_text(self, text: str, app_context: str = "unicom_app") -> Dict[str, Any]:
         """根据文本查找元素"""
         try:
             # 首先尝试使用UI Automator查找元素（不依赖OCR）
-            success, output = self._execute_adb_command(f'shell uiautomator dump /sdcard/ui_dump.xml')
-            if success:
-                success, xml_content = self._execute_adb_command('shell cat /sdcard/ui_dump.xml')
-                if success and text in xml_content:
-                    return {
-                        "success": True,
-                        "found": True,
-                        "text": text,
-                        "method": "uiautomator"
-                    }
+            success, xml_content = self._read_ui_dump()
+            if success and text in xml_content:
+                return {
+                    "success": True,
+                    "found": True,
+                    "text": text,
+                    "method": "uiautomator"
+                }
             
             # 如果UI Automator没找到，尝试OCR方法
             screen_result = self.unicom_get_screen_content(app_context)
@@ -344,32 +422,30 @@ class UnicomAndroidTools:
             
             # 尝试使用更直接的方式点击 - 通过input tap
             # 首先尝试通过UI Automator获取坐标
-            success, output = self._execute_adb_command(f'shell uiautomator dump /sdcard/ui_dump.xml')
-            if success:
-                success, xml_content = self._execute_adb_command('shell cat /sdcard/ui_dump.xml')
-                if success and text in xml_content:
-                    # 尝试提取坐标信息（简化实现）
-                    # 这里使用模拟点击，先尝试通过input tap命令
-                    import re
-                    bounds_pattern = rf'text="{text}"[^>]*bounds="(\[[\d,\]]+)"'
-                    match = re.search(bounds_pattern, xml_content)
-                    if match:
-                        bounds = match.group(1)
-                        # 解析bounds获取中心点坐标
-                        coords = re.findall(r'\d+', bounds)
-                        if len(coords) >= 4:
-                            x = (int(coords[0]) + int(coords[2])) // 2
-                            y = (int(coords[1]) + int(coords[3])) // 2
-                            
-                            # 使用坐标点击
-                            success, output = self._execute_adb_command(f'shell input tap {x} {y}')
-                            if success:
-                                time.sleep(self.config.get("ui_automation", {}).get("operations", {}).get("tap_duration", 100) / 1000)
-                                return {
-                                    "success": True,
-                                    "message": f"成功点击元素: {text} (坐标: {x}, {y})",
-                                    "method": "coordinate_tap"
-                                }
+            success, xml_content = self._read_ui_dump()
+            if success and text in xml_content:
+                # 尝试提取坐标信息（简化实现）
+                # 这里使用模拟点击，先尝试通过input tap命令
+                import re
+                bounds_pattern = rf'text="{text}"[^>]*bounds="(\[[\d,\]]+)"'
+                match = re.search(bounds_pattern, xml_content)
+                if match:
+                    bounds = match.group(1)
+                    # 解析bounds获取中心点坐标
+                    coords = re.findall(r'\d+', bounds)
+                    if len(coords) >= 4:
+                        x = (int(coords[0]) + int(coords[2])) // 2
+                        y = (int(coords[1]) + int(coords[3])) // 2
+                        
+                        # 使用坐标点击
+                        success, output = self._execute_adb_command(f'shell input tap {x} {y}')
+                        if success:
+                            time.sleep(self.config.get("ui_automation", {}).get("operations", {}).get("tap_duration", 100) / 1000)
+                            return {
+                                "success": True,
+                                "message": f"成功点击元素: {text} (坐标: {x}, {y})",
+                                "method": "coordinate_tap"
+                            }
             
             # 如果坐标点击失败，尝试使用内容描述点击
             content_desc_command = f'shell input tap $(dumpsys window | grep -E "mCurrentFocus.*{text}" | head -1)'
@@ -432,8 +508,16 @@ class UnicomAndroidTools:
         description="执行联通业务操作，如查询话费、充值、办理套餐等",
         group="unicom_android"
     )
-    def unicom_perform_operation(self, operation_type: str, parameters: Dict[str, Any] = None) -> Dict[str, Any]:
-        """执行联通业务操作"""
+    def unicom_perform_operation(self, operation_type: str, parameters: Dict[str, Any] = None,
+                                 resume: bool = False) -> Dict[str, Any]:
+        """
+        执行联通业务操作
+
+        Args:
+            operation_type: 操作名称或关键词
+            parameters: 操作参数
+            resume: 是否从上一次失败的步骤继续执行
+        """
         try:
             if parameters is None:
                 parameters = {}
@@ -454,23 +538,24 @@ class UnicomAndroidTools:
             if not operation_found:
                 return {"success": False, "message": f"未知的操作类型: {operation_type}"}
             
-            # 启动对应的APP
             app_name = operation_found.get("app", "unicom_app")
-            launch_result = self.unicom_launch_app(app_name)
-            if not launch_result["success"]:
-                return launch_result
+            checkpoint = self._operation_checkpoints.get(operation_type) if resume else None
             
-            # 等待APP加载
-            time.sleep(3)
-            
-            # 获取当前屏幕内容
-            screen_result = self.unicom_get_screen_content(app_name)
-            if not screen_result["success"]:
-                return screen_result
+            # 启动APP、获取屏幕内容及具体操作步骤统一由DAG执行
+            steps_result = self._execute_operation_steps(operation_type, operation_found, parameters, checkpoint)
             
-            # 根据操作类型执行具体步骤
-            steps_result = self._execute_operation_steps(operation_type, operation_found, parameters)
+            if not steps_result["success"]:
+                self._operation_checkpoints[operation_type] = steps_result.get("checkpoint", {})
+                return {
+                    "success": False,
+                    "operation": operation_type,
+                    "app": app_name,
+                    "failed_step": steps_result.get("failed_step"),
+                    "steps_result": steps_result,
+                    "message": f"操作 {operation_type} 在步骤 {steps_result.get('failed_step')} 失败，可使用 resume=True 从该步骤继续"
+                }
             
+            self._operation_checkpoints.pop(operation_type, None)
             return {
                 "success": True,
                 "operation": operation_type,
@@ -478,69 +563,96 @@ class UnicomAndroidTools:
                 "steps_result": steps_result,
                 "message": f"操作 {operation_type} 执行完成"
             }
-            
+                
         except Exception as e:
-            return {"success": False, "message": f"执行操作失败: {str(e)}"}
+            return {"success": False, "message": f"操作执行失败: {str(e)}"}
+
+    def _build_operation_steps(self, operation_type: str, operation_config: Dict[str, Any],
+                               parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """构造操作步骤图，配置中定义了 steps 时优先使用配置"""
+        app_name = operation_config.get("app", "unicom_app")
+        steps = [
+            {"id": "launch", "action": "launch_app", "app": app_name, "timeout": 30, "retries": 1},
+            # 首屏识别完成后再点击，避免截图、UI dump 与点击同时操作设备
+            {"id": "initial_screen", "action": "get_screen_content", "context": app_name, "after": ["launch"]},
+        ]
+        
+        if operation_config.get("steps"):
+            body = [dict(step) for step in operation_config["steps"]]
+            if body and "after" not in body[0]:
+                body[0]["after"] = ["initial_screen"]
+            return steps + body
+        
+        # 点击步骤内等待界面稳定（settle），同时并行执行不操作界面的只读预取步骤
+        if "查询话费" in operation_type:
+            body = [
+                {"id": "tap", "action": "find_and_tap", "target": "话费", "settle": 2, "retries": 1},
+                {"id": "screen", "action": "get_screen_content", "context": "话费查询", "after": ["tap"]}
+            ]
+        elif "充值" in operation_type:
+            amount = parameters.get("amount", "")
+            body = [
+                {"id": "tap", "action": "find_and_tap", "target": "充值", "settle": 2, "retries": 1},
+                {"id": "input", "action": "input_text", "text": amount, "after": ["tap"]} if amount
+                else {"id": "input", "action": "skip", "after": ["tap"]},
+                {"id": "confirm", "action": "find_and_tap", "target": "确定", "after": ["input"]}
+            ]
+        elif "查询流量" in operation_type:
+            body = [
+                {"id": "tap", "action": "find_and_tap", "target": "流量", "settle": 2, "retries": 1},
+                {"id": "screen", "action": "get_screen_content", "context": "流量查询", "after": ["tap"]}
+            ]
+        else:
+            body = [
+                {"id": "screen", "action": "get_screen_content", "context": "通用操作"}
+            ]
+        
+        body[0]["after"] = ["initial_screen"]
+        prefetch = {"id": "app_status", "action": "app_status", "app": app_name, "after": ["initial_screen"]}
+        return steps + [prefetch] + body
+
+    def _tap_and_settle(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """点击元素，成功后在同一步骤内等待界面稳定"""
+        result = self.unicom_tap_element(step["target"])
+        if result.get("success") and step.get("settle"):
+            time.sleep(step["settle"])
+        return result
+
+    def _operation_app_status(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """只读预取目标APP的进程与启动统计，不截图、不操作界面，可与点击并行"""
+        package_name = self.unicom_apps.get(step["app"])
+        if not package_name:
+            return {"success": True, "action": "app_status", "message": f"未知的联通APP: {step['app']}"}
+        return {
+            "success": True,
+            "action": "app_status",
+            "package_name": package_name,
+            "pid": self.app_manager.get_pid(package_name),
+            "launch_stats": self.app_manager.get_stats(package_name)
+        }
 
-    def _execute_operation_steps(self, operation_type: str, operation_config: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def _execute_operation_steps(self, operation_type: str, operation_config: Dict[str, Any],
+                                 parameters: Dict[str, Any], checkpoint: Dict[str, Any] = None) -> Dict[str, Any]:
         """执行具体的操作步骤"""
         try:
-            steps = []
-            
-            # 根据操作类型定义步骤
-            if "查询话费" in operation_type:
-                steps = [
-                    {"action": "find_and_tap", "target": "话费"},
-                    {"action": "wait", "duration": 2},
-                    {"action": "get_screen_content", "context": "话费查询"}
-                ]
-            elif "充值" in operation_type:
-                amount = parameters.get("amount", "")
-                steps = [
-                    {"action": "find_and_tap", "target": "充值"},
-                    {"action": "wait", "duration": 2},
-                    {"action": "input_text", "text": amount} if amount else {"action": "skip"},
-                    {"action": "find_and_tap", "target": "确定"}
-                ]
-            elif "查询流量" in operation_type:
-                steps = [
-                    {"action": "find_and_tap", "target": "流量"},
-                    {"action": "wait", "duration": 2},
-                    {"action": "get_screen_content", "context": "流量查询"}
-                ]
-            else:
-                steps = [
-                    {"action": "get_screen_content", "context": "通用操作"}
-                ]
-            
-            # 执行步骤
-            results = []
-            for step in steps:
-                if step["action"] == "find_and_tap":
-                    result = self.unicom_tap_element(step["target"])
-                elif step["action"] == "input_text":
-                    result = self.unicom_input_text(step["text"])
-                elif step["action"] == "wait":
-                    time.sleep(step["duration"])
-                    result = {"success": True, "action": "wait"}
-                elif step["action"] == "get_screen_content":
-                    result = self.unicom_get_screen_content(step.get("context", "unicom_app"))
-                elif step["action"] == "skip":
-                    result = {"success": True, "action": "skip"}
-                else:
-                    result = {"success": False, "message": f"未知步骤: {step['action']}"}
-                
-                results.append(result)
-                
-                # 如果某个步骤失败，停止执行
-                if not result.get("success", False):
-                    break
-            
-            return {
-                "success": True,
-                "steps_executed": len(results),
-                "results": results
+            steps = self._build_operation_steps(operation_type, operation_config, parameters)
+            
+            handlers = {
+                "launch_app": lambda step: self.unicom_launch_app(step["app"]),
+                "find_and_tap": self._tap_and_settle,
+                "app_status": self._operation_app_status,
+                "input_text": lambda step: self.unicom_input_text(step["text"]),
+                "wait": lambda step: (time.sleep(step["duration"]), {"success": True, "action": "wait"})[1],
+                "get_screen_content": lambda step: self.unicom_get_screen_content(step.get("context", "unicom_app")),
+                "skip": lambda step: {"success": True, "action": "skip"},
             }
+            executor = OperationDAG(handlers)
+            
+            result = executor.run(steps, checkpoint)
+            for step in result["steps"]:
+                if step["elapsed"] is not None:
+                    self.logger.info(f"步骤 {step['id']}（{step['action']}）{step['status']}，耗时 {step['elapsed']}s")
+            return result
             
         except Exception as e:
             return {"success": False, "message": f"执行步骤失败: {str(e)}"}
@@ -558,14 +670,15 @@ class UnicomAndroidTools:
             
             package_name = self.unicom_apps[app_name]
             
-            # 强制停止APP
-            success, output = self._execute_adb_command(f"shell am force-stop {package_name}")
+            # 常驻APP退到后台，其余强制停止
+            success, output = self.app_manager.release(package_name)
             
             if success:
                 return {
                     "success": True,
                     "message": f"成功关闭 {app_name}",
-                    "package_name": package_name
+                    "package_name": package_name,
+                    "kept_warm": package_name in self.app_manager.warm_packages
                 }
             else:
                 return {"success": False, "message": f"关闭失败: {output}"}
@@ -576,7 +689,8 @@ class UnicomAndroidTools:
     @tool(
         "unicom_get_app_status",
         description="获取中国联通APP的运行状态",
-        group="unicom_android"
+        group="unicom_android",
+        read_only=True
     )
     def unicom_get_app_status(self) -> Dict[str, Any]:
         """获取联通APP运行状态"""
@@ -603,6 +717,7 @@ class UnicomAndroidTools:
                 "success": True,
                 "device_id": self.device_id,
                 "app_status": app_status,
+                "launch_stats": self.app_manager.get_stats(),
                 "timestamp": time.time()
             }
             
@@ -727,132 +842,49 @@ class UnicomAndroidTools:
             return {"success": False, "message": f"导航到我的页面失败: {str(e)}"}
 
     def _claim_coupons_in_center(self) -> Dict[str, Any]:
-        """在领券中心领取优惠券"""
+        """在领券中心批量领取优惠券"""
         try:
-            import re
-            
-            def get_ui_dump():
-                """获取UI布局信息"""
-                success, _ = self._execute_adb_command("shell uiautomator dump /sdcard/ui_current.xml")
-                if success:
-                    success, content = self._execute_adb_command("shell cat /sdcard/ui_current.xml")
-                    if success:
-                        return content
-                return None
+            # 智能查找并点击"领券中心"
+            elements = self._dump_ui_elements()
+            entry = next((e for e in elements if e["text"] == "领券中心"), None) or \
+                next((e for e in elements if "领券中心" in e["text"]), None)
+            if not entry:
+                return {"success": False, "message": "未找到领券中心"}
 
-            def find_element_by_text(ui_content, text):
-                """从UI内容中查找包含指定文本的元素坐标"""
-                if not ui_content:
-                    return None
-                
-                # 使用正则表达式查找包含指定文本的元素及其bounds
-                pattern = rf'text="{text}"[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"'
-                match = re.search(pattern, ui_content)
-                
-                if match:
-                    x1, y1, x2, y2 = map(int, match.groups())
-                    center_x = (x1 + x2) // 2
-                    center_y = (y1 + y2) // 2
-                    return (center_x, center_y)
-                
-                # 如果没找到精确匹配，尝试模糊匹配
-                pattern = rf'text="[^"]*{text}[^"]*"[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"'
-                match = re.search(pattern, ui_content)
-                
-                if match:
-                    x1, y1, x2, y2 = map(int, match.groups())
-                    center_x = (x1 + x2) // 2
-                    center_y = (y1 + y2) // 2
-                    return (center_x, center_y)
-                
-                return None
+            success, _ = self._execute_adb_command(f"shell input tap {entry['center_x']} {entry['center_y']}")
+            if not success:
+                return {"success": False, "message": "点击领券中心失败"}
+            time.sleep(self.config.get("ui_automation", {}).get("wait_times", {}).get("page_load", 3))
 
-            def find_clickable_elements_with_text(ui_content, keywords):
-                """查找包含关键词的可点击元素"""
-                elements = []
-                for keyword in keywords:
-                    # 方法1: 查找包含关键词且可点击的元素
-                    pattern1 = rf'clickable="true"[^>]*text="{keyword}"[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"'
-                    matches1 = re.findall(pattern1, ui_content)
-                    
-                    for match in matches1:
-                        x1, y1, x2, y2 = map(int, match)
-                        center_x = (x1 + x2) // 2
-                        center_y = (y1 + y2) // 2
-                        elements.append((center_x, center_y, keyword))
-                    
-                    # 方法2: 如果没找到精确匹配，尝试模糊匹配
-                    if not matches1:
-                        pattern2 = rf'text="{keyword}"[^>]*bounds="\[(\d+),(\d+)\]\[(\d+),(\d+)\]"'
-                        matches2 = re.findall(pattern2, ui_content)
-                        
-                        for match in matches2:
-                            x1, y1, x2, y2 = map(int, match)
-                            center_x = (x1 + x2) // 2
-                            center_y = (y1 + y2) // 2
-                            elements.append((center_x, center_y, keyword))
-                
-                return elements
+            result = self.create_coupon_claimer().claim_all()
 
-            def click_coordinate(x, y):
-                """点击指定坐标"""
-                success, output = self._execute_adb_command(f"shell input tap {x} {y}")
-                return success
+            # 返回到我的页面
+            self._execute_adb_command("shell input keyevent KEYCODE_BACK")
+            time.sleep(1)
+            return result
 
-            # 智能查找并点击"领券中心"
-            ui_content = get_ui_dump()
-            coupon_pos = find_element_by_text(ui_content, "领券中心")
-            
-            if coupon_pos:
-                success = click_coordinate(coupon_pos[0], coupon_pos[1])
-                if success:
-                    time.sleep(3)
-                    
-                    # 智能循环领取优惠券
-                    max_attempts = 10  # 最多尝试领取10个优惠券
-                    claimed_count = 0
-                    
-                    for attempt in range(max_attempts):
-                        ui_content = get_ui_dump()
-                        
-                        # 查找当前页面的"立即领取"按钮
-                        claim_buttons = find_clickable_elements_with_text(ui_content, ["立即领取", "领取"])
-                        
-                        if not claim_buttons:
-                            break
-                        
-                        # 点击第一个找到的"立即领取"按钮
-                        x, y, keyword = claim_buttons[0]
-                        success = click_coordinate(x, y)
-                        
-                        if success:
-                            claimed_count += 1
-                            time.sleep(2)  # 等待领取完成
-                            
-                            # 检查是否跳转到了新页面（如果跳转了，需要返回）
-                            time.sleep(2)
-                            self._execute_adb_command("shell input keyevent KEYCODE_BACK")
-                            time.sleep(2)
-                        else:
-                            break
-                    
-                    # 返回到我的页面
-                    self._execute_adb_command("shell input keyevent KEYCODE_BACK")
-                    time.sleep(2)
-                    
-                    return {
-                        "success": True, 
-                        "message": f"成功领取 {claimed_count} 张优惠券",
-                        "claimed_coupons": [f"优惠券_{i+1}" for i in range(claimed_count)]
-                    }
-                else:
-                    return {"success": False, "message": "点击领券中心失败"}
-            else:
-                return {"success": False, "message": "未找到领券中心"}
-            
         except Exception as e:
             return {"success": False, "message": f"领取优惠券失败: {str(e)}"}
 
+    def create_coupon_claimer(self, max_pages: int = 6) -> CouponClaimer:
+        """
+        创建绑定当前设备的批量领券引擎
+
+        Args:
+            max_pages: 最多处理的页数
+        """
+        swipe_duration = self.config.get("ui_automation", {}).get("operations", {}).get("swipe_duration", 500)
+        return CouponClaimer(
+            dump=self._dump_ui_elements,
+            # adb shell 会在设备端按顺序执行以 ; 分隔的命令，一次往返完成所有点击
+            run_script=lambda commands: self._execute_adb_command("shell " + " ; ".join(commands)),
+            swipe=lambda x1, y1, x2, y2: self._execute_adb_command(
+                f"shell input swipe {x1} {y1} {x2} {y2} {swipe_duration}"
+            ),
+            back=lambda: self._execute_adb_command("shell input keyevent KEYCODE_BACK"),
+            max_pages=max_pages
+        )
+
     def _navigate_to_service_page(self) -> Dict[str, Any]:
         """导航到服务页面"""
         try:
@@ -921,14 +953,9 @@ class UnicomAndroidTools:
     def _handle_benefits_market(self, user_interaction_callback=None) -> Dict[str, Any]:
         """处理权益超市"""
         try:
-            # 向下滑动寻找权益栏目
-            for _ in range(3):  # 最多滑动3次
-                screen_result = self.unicom_get_screen_content("unicom_app")
-                if "权益" in screen_result.get("ocr_text", ""):
-                    break
-                # 向下滑动
-                self._execute_adb_command("shell input swipe 500 800 500 400 500")
-                time.sleep(1)
+            # 向下滑动寻找权益栏目，找到后立即停止
+            for _ in self.scroll_collect(until=text_matches("权益"), max_pages=4):
+                pass
             
             # 查找并点击"权益超市"
             find_result = self.unicom_find_element_by_text("权益超市")
@@ -1004,22 +1031,15 @@ class UnicomAndroidTools:
                 success, output = self._execute_adb_command(f"shell input tap {x} {y}")
                 return success
 
-            # 向下滑动并智能查找PLUS会员
+            # 向下滑动并智能查找PLUS会员，找到后立即停止
             plus_found = False
-            for scroll_attempt in range(8):
-                ui_content = get_ui_dump()
-                plus_pos = find_element_by_text(ui_content, "PLUS会员")
-                
-                if plus_pos:
-                    success = click_coordinate(plus_pos[0], plus_pos[1])
+            plus_matcher = text_matches("PLUS会员")
+            for elem in self.scroll_collect(until=plus_matcher, max_pages=8):
+                if plus_matcher(elem):
+                    success = click_coordinate(elem["center_x"], elem["center_y"])
                     if success:
                         time.sleep(3)
                         plus_found = True
-                        break
-                
-                if scroll_attempt < 7:  # 不是最后一次尝试
-                    self._execute_adb_command("shell input swipe 500 1000 500 100 500")
-                    time.sleep(1)
             
             if not plus_found:
                 return {"success": False, "message": "未找到PLUS会员"}
@@ -1,7 +1,6 @@
-import inspect
 import readchar
-from .tools import Tools
 from typing import Any, Dict, List
+from .registry import tool_registry
 from unimind.context import Context
 
 
@@ -15,22 +14,18 @@ def get_tool(tool_name: str) -> Dict[str, Any]:
     Returns:
         Tool definition for OpenAI API or None if not found.
     """
-    for name, method in inspect.getmembers(Tools):
-        if (
-            hasattr(method, "is_tool")
-            and method.is_tool
-            and method.tool_name == tool_name
-        ):
-            return method.get_openai_schema()
-
-    return None
+    entry = tool_registry.get(tool_name)
+    return entry.schema if entry else None
 
 
 def get_all_tools(*groups) -> List[Dict[str, Any]]:
     """
-    Get all tools defined with the @tool decorator in OpenAI format,
+    Get all tools of the `Tools` class in OpenAI format,
     optionally filtered by one or more groups.
 
+    Device tools (AppAutomationTools, UnicomAndroidTools, phone automation)
+    are not included; use `get_registered_tools` for the whole registry.
+
     Args:
         *groups: If provided, only return tools from these groups.
                 Multiple group names can be passed as separate arguments.
@@ -38,14 +33,35 @@ def get_all_tools(*groups) -> List[Dict[str, Any]]:
     Returns:
         List of tool definitions for OpenAI API
     """
-    tool_schemas = []
-    for name, method in inspect.getmembers(Tools):
-        if hasattr(method, "is_tool") and method.is_tool:
-            # If no groups specified or tool belongs to one of the specified groups
-            if not groups or method.tool_group in groups:
-                tool_schemas.append(method.get_openai_schema())
+    return [entry.schema for entry in tool_registry.entries(*groups, namespace="Tools")]
+
+
+def get_registered_tools(*groups) -> List[Dict[str, Any]]:
+    """
+    Get every tool defined with the @tool decorator in OpenAI format,
+    including device tools, optionally filtered by one or more groups.
 
-    return tool_schemas
+    Args:
+        *groups: If provided, only return tools from these groups.
+
+    Returns:
+        List of tool definitions for OpenAI API
+    """
+    return [entry.schema for entry in tool_registry.entries(*groups)]
+
+
+def is_read_only_tool(tool_name: str) -> bool:
+    """
+    Check whether a tool is marked as free of side effects (read_only=True).
+
+    Args:
+        tool_name: Name of the tool
+
+    Returns:
+        True if the tool exists and is read-only
+    """
+    entry = tool_registry.get(tool_name)
+    return bool(entry and entry.read_only)
 
 
 def execute_tool(
@@ -62,55 +78,51 @@ def execute_tool(
     Returns:
         Result of tool execution
     """
-    for name, method in inspect.getmembers(Tools):
-        if (
-            hasattr(method, "is_tool")
-            and method.is_tool
-            and method.tool_name == tool_name
-        ):
-            # Check if all required arguments are provided
-            missing_args = []
-            sig = inspect.signature(method)
-            for param_name, param in sig.parameters.items():
-                # Required params have no default and aren't variadic (*args, **kwargs)
-                if param.default is param.empty and param.kind not in (
-                    param.VAR_POSITIONAL,
-                    param.VAR_KEYWORD,
-                ):
-                    if param_name not in arguments and param_name != "context":
-                        missing_args.append(param_name)
-            if missing_args:
-                return {
-                    "success": False,
-                    "message": f"Missing required arguments: {', '.join(missing_args)}",
-                }
-
-            # Check if confirmation is required
-            if (
-                hasattr(method, "confirmation_required")
-                and method.confirmation_required
-            ):
-                # Format arguments as a readable string
-                args_str = "\n".join(f"{k}={repr(v)}" for k, v in arguments.items())
-
-                print(f"Do you want to execute {tool_name}? (y/n)")
-                confirmation = readchar.readchar()
-
-                # Check if user confirmed
-                if confirmation.lower() not in ["y", "yes"]:
-                    return {
-                        "success": False,
-                        "message": "Tool execution cancelled by user",
-                    }
-
-            result = method(**arguments)
-
-            context.add_used_tool(
-                tool_name=tool_name,
-                params=arguments,
-                result=result,
-            )
-
-            return result
-
-    return {"success": False, "message": f"Unknown tool: {tool_name}"}
+    entry = tool_registry.get(tool_name)
+    if entry is None:
+        return {"success": False, "message": f"Unknown tool: {tool_name}"}
+
+    # Check if all required arguments are provided
+    missing_args = [name for name in entry.required if name not in arguments]
+    if missing_args:
+        return {
+            "success": False,
+            "message": f"Missing required arguments: {', '.join(missing_args)}",
+        }
+
+    # Check if confirmation is required
+    if entry.confirmation_required:
+        print(f"Do you want to execute {tool_name}? (y/n)")
+        confirmation = readchar.readchar()
+
+        # Check if user confirmed
+        if confirmation.lower() not in ["y", "yes"]:
+            return {
+                "success": False,
+                "message": "Tool execution cancelled by user",
+            }
+
+    method = tool_registry.resolve(entry)
+    arbiter = getattr(context, "device_arbiter", None)
+    if arbiter is not None and arbiter.covers(entry):
+        # Agents running concurrently share the device: reads overlap, writes
+        # and screen dumps are exclusive
+        device = arbiter.device_of(getattr(method, "__self__", None), arguments)
+        with arbiter.hold(device, exclusive=arbiter.exclusive(entry)):
+            result = _call_tool(entry, method, context, arguments)
+    else:
+        result = _call_tool(entry, method, context, arguments)
+
+    context.add_used_tool(
+        tool_name=tool_name,
+        params=arguments,
+        result=result,
+    )
+
+    return result
+
+
+def _call_tool(entry, method, context: Context, arguments: Dict[str, Any]) -> Any:
+    if entry.takes_context:
+        return method(context=context, **arguments)
+    return method(**arguments)
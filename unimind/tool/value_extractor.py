@@ -0,0 +1,396 @@
+"""
+界面数值提取引擎
+UI Value Extraction Engine
+
+从UI元素列表中识别话费余额、剩余流量等数值。
+单次遍历元素生成特征矩阵（金额、单位、关键词邻近度、纵向位置），
+再用NumPy按权重表向量化打分。权重表可替换，便于适配不同页面。
+"""
+
+import re
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 邻近关键词检查范围（前后元素个数）
+CONTEXT_RANGE = 3
+# 货币符号/流量单位检查范围
+AFFIX_RANGE = 2
+# 标题检查范围（仅向前）
+TITLE_RANGE = 3
+
+# 特征矩阵的列定义，权重表按列名给出
+FEATURES = (
+    "self_high",          # 元素自身包含的高优先级关键词数
+    "self_medium",        # 元素自身包含的中优先级关键词数
+    "self_negative",      # 元素自身包含的负面关键词数
+    "near_high_1",        # 距离1/2/3处的高优先级邻近元素
+    "near_high_2",
+    "near_high_3",
+    "near_medium_1",      # 距离1/2/3处的中优先级邻近元素
+    "near_medium_2",
+    "near_medium_3",
+    "near_negative",      # 负面邻近元素个数
+    "affix",              # 相邻的货币符号/流量单位（仅纯数字）
+    "title_1",            # 与标题的距离为1/2/3（仅纯数字）
+    "title_2",
+    "title_3",
+    "top_region",         # 位于页面顶部区域（仅纯数字）
+    "vertical",           # 纵向位置，0为顶部，1为底部
+    "plausibility",       # 数值合理性奖惩
+    "amount",             # 数值本身
+)
+_COLUMN = {name: i for i, name in enumerate(FEATURES)}
+
+# 邻近关键词分类
+_CLASS_NONE, _CLASS_NEGATIVE, _CLASS_MEDIUM, _CLASS_HIGH = 0, 1, 2, 3
+
+
+def _keyword_pattern(keywords: Sequence[str]) -> Optional[Pattern]:
+    """将关键词列表编译为一个正则"""
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+
+@dataclass
+class ExtractionProfile:
+    """
+    数值提取配置，包含匹配规则和权重表
+
+    Attributes:
+        name: 配置名称
+        value_pattern: 匹配"数值+单位"完整文本的正则，需包含数值分组和可选的单位分组
+        high_keywords: 高优先级关键词
+        medium_keywords: 中优先级关键词
+        negative_keywords: 负面关键词
+        title_keywords: 标题关键词（出现在纯数字前方时加分）
+        affix_units: 相邻独立元素的单位文本到规范单位的映射
+        default_unit: 完整文本未捕获单位时使用的单位
+        require_affix: 纯数字是否必须有相邻单位才作为候选
+        plausible_ranges: 单位 -> (下限, 上限, 合理加分, 不合理扣分)
+        weights: 特征名 -> 权重
+        top_region_index: 元素序号不超过该值视为页面顶部
+    """
+
+    name: str
+    value_pattern: Pattern
+    high_keywords: List[str]
+    medium_keywords: List[str]
+    negative_keywords: List[str]
+    title_keywords: List[str]
+    affix_units: Dict[str, str]
+    default_unit: str = ""
+    require_affix: bool = False
+    plausible_ranges: Dict[str, Tuple[float, float, float, float]] = field(
+        default_factory=dict
+    )
+    weights: Dict[str, float] = field(default_factory=dict)
+    top_region_index: int = 15
+
+    def weight_vector(self, overrides: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """按特征列顺序返回权重向量，overrides 中的权重优先"""
+        weights = {**self.weights, **(overrides or {})}
+        return np.array([weights.get(name, 0.0) for name in FEATURES])
+
+
+PURE_NUMBER_PATTERN = re.compile(r"^(\d+(?:\.\d{1,2})?)$")
+PURE_DECIMAL_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)$")
+
+BALANCE_PROFILE = ExtractionProfile(
+    name="balance",
+    value_pattern=re.compile(r"(\d+(?:\.\d{1,2})?)\s*[元￥¥]"),
+    high_keywords=["剩余", "余额", "可用", "账户余额", "话费余额", "当前余额"],
+    medium_keywords=["话费", "余量", "当前"],
+    negative_keywords=[
+        "充值", "缴费", "交费", "套餐", "售价", "优惠", "立即", "领取",
+        "券", "福利", "不可使用", "暂不可使用",
+    ],
+    title_keywords=["剩余话费"],
+    affix_units={"¥": "元", "￥": "元", "元": "元"},
+    default_unit="元",
+    require_affix=False,
+    plausible_ranges={"元": (0.01, 9999, 15, -30)},
+    weights={
+        "self_high": 60, "self_medium": 30, "self_negative": -50,
+        "near_high_1": 20, "near_high_2": 10, "near_high_3": 10,
+        "near_medium_1": 15, "near_medium_2": 10, "near_medium_3": 5,
+        "near_negative": -30,
+        "affix": 80,
+        "title_1": 200, "title_2": 180, "title_3": 120,
+        "top_region": 40,
+        "plausibility": 1,
+    },
+)
+
+DATA_USAGE_PROFILE = ExtractionProfile(
+    name="data_usage",
+    value_pattern=re.compile(r"(\d+(?:\.\d+)?)\s*(GB|MB|TB|g|m|t)", re.IGNORECASE),
+    high_keywords=[
+        "剩余通用流量", "剩余流量", "通用流量", "可用流量", "剩余数据",
+        "可用数据", "剩余上网流量",
+    ],
+    medium_keywords=["流量", "数据", "上网", "网络", "通用"],
+    negative_keywords=[
+        "充值", "购买", "套餐", "售价", "优惠", "立即", "领取", "券", "福利",
+        "已用", "已使用", "消耗",
+    ],
+    title_keywords=["剩余通用流量", "剩余流量", "通用流量", "剩余数据", "可用流量"],
+    affix_units={"GB": "GB", "MB": "MB", "TB": "TB", "G": "GB", "M": "MB", "T": "TB"},
+    require_affix=True,
+    plausible_ranges={"GB": (0.01, 1000, 20, -25), "MB": (1, 999999, 15, -25)},
+    weights={
+        "self_high": 70, "self_medium": 35, "self_negative": -50,
+        "near_high_1": 25, "near_high_2": 15, "near_high_3": 10,
+        "near_medium_1": 20, "near_medium_2": 15, "near_medium_3": 10,
+        "near_negative": -30,
+        "affix": 80,
+        "title_1": 200, "title_2": 180, "title_3": 120,
+        "top_region": 40,
+        "plausibility": 1,
+    },
+)
+
+
+class ValueExtractor:
+    """基于特征矩阵和权重表的数值提取器"""
+
+    def __init__(
+        self, profile: ExtractionProfile, weights: Optional[Dict[str, float]] = None
+    ):
+        """
+        初始化提取器
+
+        Args:
+            profile: 提取配置
+            weights: 可选的权重覆盖，不修改配置本身
+        """
+        self.profile = profile
+        self.weights: Dict[str, float] = {}
+        self._high = _keyword_pattern(profile.high_keywords)
+        self._medium = _keyword_pattern(profile.medium_keywords)
+        self._negative = _keyword_pattern(profile.negative_keywords)
+        self._title = _keyword_pattern(profile.title_keywords)
+        self._pure = PURE_DECIMAL_PATTERN if profile.require_affix else PURE_NUMBER_PATTERN
+        self._weights = profile.weight_vector()
+        if weights:
+            self.set_weights(weights)
+
+    def set_weights(self, weights: Dict[str, float]) -> None:
+        """
+        更新权重表
+
+        Args:
+            weights: 特征名 -> 权重，未给出的特征保持原值
+        """
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+        self.weights.update(weights)
+        self._weights = self.profile.weight_vector(self.weights)
+
+    def _count(self, keywords: List[str], text: str) -> int:
+        """统计文本中包含的关键词个数"""
+        return sum(1 for keyword in keywords if keyword in text)
+
+    def _classify(self, text: str) -> int:
+        """按优先级对邻近元素分类"""
+        if not text:
+            return _CLASS_NONE
+        if self._high and self._high.search(text):
+            return _CLASS_HIGH
+        if self._medium and self._medium.search(text):
+            return _CLASS_MEDIUM
+        if self._negative and self._negative.search(text):
+            return _CLASS_NEGATIVE
+        return _CLASS_NONE
+
+    def build_features(
+        self, elements: List[Dict[str, Any]]
+    ) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        单次遍历元素，构建候选的特征矩阵
+
+        Args:
+            elements: UI元素列表
+
+        Returns:
+            (特征矩阵, 候选信息列表)，矩阵每行对应一个候选
+        """
+        profile = self.profile
+        n = len(elements)
+        classes = np.zeros(n + 2 * CONTEXT_RANGE, dtype=np.int8)
+        titles = np.zeros(n + TITLE_RANGE, dtype=bool)
+        affixes = np.full(n + 2 * AFFIX_RANGE, "", dtype=object)
+        y_positions = np.zeros(n)
+
+        candidates: List[Dict[str, Any]] = []
+        rows: List[Tuple[int, float, int, int, int, bool]] = []
+
+        for i, elem in enumerate(elements):
+            text = elem.get("text", "").strip()
+            y_positions[i] = elem.get("center_y", 0) or 0
+            if not text:
+                continue
+
+            lowered = text.lower()
+            classes[i + CONTEXT_RANGE] = self._classify(lowered)
+            if self._title and self._title.search(lowered):
+                titles[i + TITLE_RANGE] = True
+            affixes[i + AFFIX_RANGE] = profile.affix_units.get(text.upper(), "")
+
+            matches = profile.value_pattern.findall(text)
+            pure = None if matches else self._pure.match(text)
+            if not matches and not pure:
+                continue
+
+            counts = (
+                self._count(profile.high_keywords, lowered),
+                self._count(profile.medium_keywords, lowered),
+                self._count(profile.negative_keywords, lowered),
+            )
+
+            if matches:
+                for match in matches:
+                    amount, unit = (match, "") if isinstance(match, str) else match
+                    unit = unit.upper()
+                    unit = profile.affix_units.get(unit, unit) or profile.default_unit
+                    rows.append((i, float(amount), *counts, False))
+                    candidates.append({
+                        "amount": amount,
+                        "unit": unit,
+                        "element_text": text,
+                        "element_index": i,
+                        "source": "完整文本",
+                    })
+            else:
+                rows.append((i, float(pure.group(1)), *counts, True))
+                candidates.append({
+                    "amount": pure.group(1),
+                    "unit": "",
+                    "element_text": text,
+                    "element_index": i,
+                    "source": "纯数字",
+                })
+
+        features = np.zeros((len(rows), len(FEATURES)))
+        if not rows:
+            return features, candidates
+
+        table = np.array(rows, dtype=float)
+        index = table[:, 0].astype(int)
+        is_pure = table[:, 5].astype(bool)
+
+        features[:, _COLUMN["amount"]] = table[:, 1]
+        features[:, _COLUMN["self_high"]] = table[:, 2]
+        features[:, _COLUMN["self_medium"]] = table[:, 3]
+        features[:, _COLUMN["self_negative"]] = table[:, 4]
+
+        # 邻近元素语义，按距离分列
+        for offset in range(1, CONTEXT_RANGE + 1):
+            before = classes[index + CONTEXT_RANGE - offset]
+            after = classes[index + CONTEXT_RANGE + offset]
+            for cls, column in ((_CLASS_HIGH, "near_high"), (_CLASS_MEDIUM, "near_medium")):
+                features[:, _COLUMN[f"{column}_{offset}"]] += (before == cls)
+                features[:, _COLUMN[f"{column}_{offset}"]] += (after == cls)
+            features[:, _COLUMN["near_negative"]] += (before == _CLASS_NEGATIVE)
+            features[:, _COLUMN["near_negative"]] += (after == _CLASS_NEGATIVE)
+
+        # 纯数字：相邻单位，按从前到后的顺序取第一个
+        units = np.full(len(rows), "", dtype=object)
+        for offset in (*range(-AFFIX_RANGE, 0), *range(1, AFFIX_RANGE + 1)):
+            nearby = affixes[index + AFFIX_RANGE + offset]
+            units = np.where((units == "") & is_pure, nearby, units)
+        has_affix = is_pure & (units != "")
+        features[:, _COLUMN["affix"]] = has_affix
+        for row in np.flatnonzero(is_pure):
+            candidates[row]["unit"] = units[row] or profile.default_unit
+
+        # 纯数字：最近的前置标题
+        found = np.zeros(len(rows), dtype=bool)
+        for distance in range(1, TITLE_RANGE + 1):
+            hit = titles[index + TITLE_RANGE - distance] & is_pure & ~found
+            features[:, _COLUMN[f"title_{distance}"]] = hit
+            found |= hit
+
+        features[:, _COLUMN["top_region"]] = is_pure & (index <= profile.top_region_index)
+
+        height = y_positions.max() if n else 0
+        if height > 0:
+            features[:, _COLUMN["vertical"]] = y_positions[index] / height
+
+        # 数值合理性
+        amounts = table[:, 1]
+        unit_array = np.array([c["unit"] for c in candidates])
+        for unit, (low, high, bonus, penalty) in profile.plausible_ranges.items():
+            mask = unit_array == unit
+            in_range = (amounts >= low) & (amounts <= high)
+            features[:, _COLUMN["plausibility"]] += np.where(
+                mask, np.where(in_range, bonus, penalty), 0
+            )
+
+        # 需要单位的配置里，没有相邻单位的纯数字不作为候选
+        if profile.require_affix:
+            keep = ~is_pure | has_affix
+            features = features[keep]
+            candidates = [c for c, k in zip(candidates, keep) if k]
+
+        return features, candidates
+
+    def rank(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        对所有候选打分并按得分降序排列
+
+        Args:
+            elements: UI元素列表
+
+        Returns:
+            附带 score 字段的候选列表
+        """
+        features, candidates = self.build_features(elements)
+        if not candidates:
+            return []
+
+        scores = features @ self._weights
+        order = np.argsort(-scores, kind="stable")
+        ranked = []
+        for row in order:
+            candidate = dict(candidates[row])
+            candidate["raw_amount"] = float(features[row, _COLUMN["amount"]])
+            candidate["score"] = float(scores[row])
+            ranked.append(candidate)
+        return ranked
+
+    def extract(self, elements: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        提取得分最高的数值
+
+        Args:
+            elements: UI元素列表
+
+        Returns:
+            包含 amount、raw_amount、unit、context、score 的字典，无有效候选时返回None
+        """
+        ranked = self.rank(elements)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s: %d candidates, top: %s",
+                self.profile.name,
+                len(ranked),
+                [(c["amount"] + c["unit"], c["score"]) for c in ranked[:5]],
+            )
+
+        if not ranked or ranked[0]["score"] <= 0:
+            return None
+
+        best = ranked[0]
+        return {
+            "amount": f"{best['amount']}{best['unit']}",
+            "raw_amount": best["raw_amount"],
+            "unit": best["unit"],
+            "context": best["element_text"],
+            "score": best["score"],
+        }
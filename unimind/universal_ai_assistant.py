@@ -6,16 +6,32 @@ Universal AI Assistant - Multi-Agent Architecture for APP Automation
 """
 
 import os
+import copy
 import yaml
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
 
-from .execution.agent import Agent
+from .execution.agent import Agent, DeltaRelay
+from .execution.model_router import ModelRouter
 from .context.context import Context
 from .tool.app_automation_tools import AppAutomationTools
+from .tool.registry import tool_registry
+from .tool.observation import ObservationEncoder
+from .tool.app_lifecycle import MODE_FOREGROUND
+from .stage_scheduler import StageScheduler
+from .intent_classifier import (
+    HIGH_CONFIDENCE,
+    INTENT_BALANCE_QUERY,
+    INTENT_DATA_USAGE_QUERY,
+    INTENT_PHONE_AUTO_ANSWER,
+    IntentResult,
+    IntentClassifier,
+    get_intent_classifier,
+)
 from .prompt.universal_assistant_prompts import (
     INTENT_ANALYZER,
     APP_SELECTOR,
@@ -27,6 +43,18 @@ from .prompt.universal_assistant_prompts import (
 )
 
 
+# 本地意图置信度达到该值时推测性地预热设备
+SPECULATION_THRESHOLD = 0.4
+# 等待设备预热的最长秒数
+PREWARM_TIMEOUT = 15
+# 首个界面观察保留的元素数量
+OBSERVATION_ELEMENTS = 40
+
+# 已解析的配置文件：绝对路径 -> (修改时间, 配置)
+_config_cache: Dict[str, Any] = {}
+_config_lock = threading.Lock()
+
+
 class TaskCategory(Enum):
     """任务分类枚举"""
     UNICOM_TELECOM = "联通电信服务"  # 联通APP操作
@@ -49,23 +77,47 @@ class UniversalAIAssistant:
     5. 自动化工具调用
     """
     
-    def __init__(self, config_path: str = "config_unicom_android.yaml"):
-        """初始化通用AI助手"""
-        self.config = self._load_config(config_path)
+    def __init__(self, config_path: str = "config_unicom_android.yaml",
+                 tools: Optional[AppAutomationTools] = None):
+        """
+        初始化通用AI助手
+        
+        Args:
+            config_path: 配置文件路径
+            tools: 可选的APP自动化工具实例（助手池中的多个助手共用一个）
+        """
         self.logger = self._setup_logging()
-        self.tools = AppAutomationTools()
+        self.config = self._load_config(config_path)
+        self.tools = tools or AppAutomationTools()
+        # 智能体按名称调用的APP工具使用这个实例
+        tool_registry.bind(self.tools)
         self.agents = self._initialize_agents()
         self.session_id = f"assistant_session_{int(datetime.now().timestamp())}"
         
         # 支持的APP类别和包名映射
         self.supported_apps = self._load_app_configurations()
         
+        # 本地意图识别，置信度达到阈值时跳过意图理解和APP选择
+        classifier_config = self.config.get("intent_classifier", {})
+        corpus = classifier_config.get("corpus")
+        self.intent_classifier = IntentClassifier.from_corpus(corpus) if corpus else get_intent_classifier()
+        self.intent_threshold = classifier_config.get("threshold", HIGH_CONFIDENCE)
+        
+        # 按阶段路由模型（默认关闭，model_router.enabled 为 true 或设置 AM_ROUTER_MODELS 时启用）
+        self.model_router = self._init_model_router()
+        
     def _load_config(self, config_path: str) -> Dict[str, Any]:
-        """加载配置文件"""
+        """加载配置文件（按路径和修改时间缓存解析结果，每个助手得到独立的副本）"""
         try:
             if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
+                path = os.path.abspath(config_path)
+                mtime = os.path.getmtime(path)
+                with _config_lock:
+                    cached = _config_cache.get(path)
+                    if cached is None or cached[0] != mtime:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            cached = _config_cache[path] = (mtime, yaml.safe_load(f))
+                return copy.deepcopy(cached[1])
             else:
                 # 返回默认配置
                 return self._get_default_config()
@@ -89,12 +141,31 @@ class UniversalAIAssistant:
                 "result_validator": {"model": "gpt-4o-mini", "temperature": 0.1},
                 "conversation_manager": {"model": "gpt-4o-mini", "temperature": 0.4},
                 "multimodal_processor": {"model": "gpt-4o-mini", "temperature": 0.2}
+            },
+            "model_router": {
+                "enabled": False,
+                "models": ["gpt-4o-mini", "gpt-4o"],
+                "low_confidence": 0.5
             }
         }
     
+    def _init_model_router(self) -> Optional[ModelRouter]:
+        """根据配置创建模型路由器，未启用时各智能体使用固定模型"""
+        router_config = self.config.get("model_router") or {}
+        if not router_config.get("enabled", bool(os.getenv("AM_ROUTER_MODELS"))):
+            return None
+        return ModelRouter(
+            models=router_config.get("models"),
+            quality=router_config.get("quality"),
+            low_confidence=router_config.get("low_confidence", 0.5),
+            max_attempts=router_config.get("max_attempts", 3)
+        )
+    
     def _setup_logging(self) -> logging.Logger:
-        """设置日志系统"""
+        """设置日志系统（处理器只添加一次，重复创建助手不会重复输出日志）"""
         logger = logging.getLogger("UniversalAIAssistant")
+        if logger.handlers:
+            return logger
         logger.setLevel(logging.INFO)
         
         # 创建日志目录
@@ -287,13 +358,15 @@ class UniversalAIAssistant:
         
         return agents
     
-    async def process_user_request(self, user_input: str, context: Optional[Dict] = None) -> Dict[str, Any]:
+    async def process_user_request(self, user_input: str, context: Optional[Dict] = None,
+                                   on_delta: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
         """
         处理用户请求的主流程
         
         Args:
             user_input: 用户的自然语言指令
             context: 上下文信息（设备信息、历史对话等）
+            on_delta: 可选回调，流式接收最终回复的文本片段（如Streamlit界面实时显示）
             
         Returns:
             处理结果字典
@@ -305,44 +378,27 @@ class UniversalAIAssistant:
             task_context = Context(user_input, None)
             if context:
                 task_context.metadata = context
+            task_context.model_routes = []
             
-            # 阶段1: 意图理解
-            intent_result = await self._analyze_user_intent(user_input, task_context)
-            if not intent_result["success"]:
-                return intent_result
+            scheduler = StageScheduler()
+            try:
+                result = await self._run_stages(user_input, task_context, scheduler, on_delta)
+            finally:
+                # 请求结束（或失败）时取消仍在进行的推测阶段，并等待其ADB线程结束
+                scheduler.cancel_pending()
+                await scheduler.settle()
             
-            # 阶段2: APP选择 
-            app_result = await self._select_target_app(intent_result["intent"], task_context)
-            if not app_result["success"]:
-                return app_result
-            
-            # 阶段3: UI导航
-            navigation_result = await self._navigate_to_target(app_result["app_info"], intent_result["intent"], task_context)
-            if not navigation_result["success"]:
-                return navigation_result
-            
-            # 阶段4: 动作执行
-            execution_result = await self._execute_actions(navigation_result["navigation_plan"], task_context)
-            if not execution_result["success"]:
-                return execution_result
-            
-            # 阶段5: 结果验证
-            validation_result = await self._validate_results(execution_result["actions"], intent_result["intent"], task_context)
-            
-            # 阶段6: 生成用户友好的反馈
-            response = await self._generate_user_response(validation_result, task_context)
-            
-            return {
-                "success": True,
-                "session_id": self.session_id,
-                "user_input": user_input,
-                "task_category": intent_result["intent"].get("category"),
-                "target_app": app_result["app_info"].get("name"),
-                "execution_steps": len(execution_result["actions"]),
-                "result": validation_result,
-                "user_response": response,
-                "timestamp": datetime.now().isoformat()
-            }
+            result["stage_timings"] = scheduler.report()
+            if self.model_router:
+                result["model_routing"] = task_context.model_routes
+            if task_context.observation_tracker:
+                # 增量观察节省的提示词token
+                result["observations"] = task_context.observation_tracker.stats()
+            self.logger.info(
+                f"请求处理完成，耗时 {result['stage_timings']['wall_time']:.2f}s，"
+                f"关键路径: {' -> '.join(stage['name'] for stage in result['stage_timings']['critical_path'])}"
+            )
+            return result
             
         except Exception as e:
             self.logger.error(f"处理用户请求失败: {str(e)}")
@@ -353,6 +409,222 @@ class UniversalAIAssistant:
                 "timestamp": datetime.now().isoformat()
             }
     
+    async def _run_stages(self, user_input: str, task_context: Context, scheduler: StageScheduler,
+                          on_delta: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        按依赖调度六个阶段
+        
+        意图理解进行时，根据本地意图推测性地并行执行APP选择和设备预热
+        （推测时只在目标APP已在前台时获取首个界面，高置信度时才启动APP）。LLM识别出的任务分类与推测一致时直接采用推测结果，
+        否则取消推测阶段并重新选择APP。
+        """
+        device_id = (getattr(task_context, "metadata", None) or {}).get("device_id")
+        
+        # 本地意图识别，高置信度时跳过阶段1和阶段2
+        local_intent = self.intent_classifier.classify(user_input)
+        app_info = self._resolve_app(local_intent)
+        # 规则未给出任务分类时无法跳过或推测意图理解，交给LLM
+        has_category = local_intent.category is not None
+        confident = local_intent.is_confident(self.intent_threshold) and app_info is not None and has_category
+        
+        if app_info and local_intent.confidence >= SPECULATION_THRESHOLD:
+            # 推测时只观察、不启动APP，推测落空也不会改变设备状态
+            scheduler.start_thread(
+                "device_prewarm", self._prewarm_device, app_info, device_id, confident,
+                speculative=not confident
+            )
+        
+        if confident:
+            self.logger.info(
+                f"本地意图识别: {local_intent.intent}（置信度 {local_intent.confidence:.2f}），"
+                f"跳过意图理解和APP选择"
+            )
+            intent_result = {"success": True, "intent": self._local_intent(user_input, local_intent)}
+            app_result = {"success": True, "app_info": app_info}
+            intent_stages = []
+        else:
+            speculative_intent = self._local_intent(user_input, local_intent) if has_category else None
+            
+            # 阶段1: 意图理解（同时推测性地执行阶段2）
+            intent_task = scheduler.start("intent_analysis", self._analyze_user_intent(user_input, task_context))
+            if speculative_intent:
+                scheduler.start(
+                    "app_selection_speculative",
+                    self._select_target_app(speculative_intent, task_context),
+                    speculative=True
+                )
+            intent_result = await intent_task
+            if not intent_result["success"]:
+                return intent_result
+            
+            # 阶段2: APP选择
+            if speculative_intent and intent_result["intent"].get("category") == speculative_intent["category"]:
+                self.logger.info("意图理解与本地推测一致，采用推测的APP选择结果")
+                scheduler.adopt("app_selection_speculative")
+                app_result = await scheduler.tasks["app_selection_speculative"]
+                intent_stages = ["intent_analysis", "app_selection_speculative"]
+            else:
+                scheduler.cancel("app_selection_speculative")
+                scheduler.cancel("device_prewarm")
+                app_result = await scheduler.run(
+                    "app_selection",
+                    self._select_target_app(intent_result["intent"], task_context),
+                    after=["intent_analysis"]
+                )
+                intent_stages = ["app_selection"]
+            if not app_result["success"]:
+                return app_result
+        
+        # 阶段3: UI导航（使用预热得到的首个界面观察）
+        observation = await self._await_prewarm(scheduler)
+        # 已取消的预热线程仍可能在操作设备，结束后再开始导航
+        await scheduler.settle()
+        navigation_after = intent_stages + (["device_prewarm"] if observation else [])
+        navigation_result = await scheduler.run(
+            "ui_navigation",
+            self._navigate_to_target(app_result["app_info"], intent_result["intent"], task_context, observation),
+            after=navigation_after
+        )
+        if not navigation_result["success"]:
+            return navigation_result
+        
+        # 阶段4: 动作执行
+        execution_result = await scheduler.run(
+            "action_execution",
+            self._execute_actions(navigation_result["navigation_plan"], task_context),
+            after=["ui_navigation"]
+        )
+        if not execution_result["success"]:
+            return execution_result
+        
+        # 阶段5: 结果验证
+        validation_result = await scheduler.run(
+            "result_validation",
+            self._validate_results(execution_result["actions"], intent_result["intent"], task_context),
+            after=["action_execution"]
+        )
+        
+        # 阶段6: 生成用户友好的反馈
+        response = await scheduler.run(
+            "response_generation",
+            self._generate_user_response(validation_result, task_context, on_delta),
+            after=["result_validation"]
+        )
+        
+        return {
+            "success": True,
+            "session_id": self.session_id,
+            "user_input": user_input,
+            "task_category": intent_result["intent"].get("category"),
+            "intent_source": intent_result["intent"].get("source", "llm"),
+            "target_app": app_result["app_info"].get("name"),
+            "execution_steps": len(execution_result["actions"]),
+            "result": validation_result,
+            "user_response": response,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _prewarm_device(self, app_info: Dict[str, Any], device_id: str = None,
+                        launch_app: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        预热设备：启动目标APP并获取首个界面观察（在线程中执行，取消后ADB命令仍会执行完）
+        
+        launch_app 为 False（推测性预热）时只读取界面：目标APP不在前台则直接返回None
+        """
+        try:
+            manager = self.tools.get_app_manager(device_id)
+            if launch_app:
+                launch = manager.ensure_foreground(app_info["package"])
+            elif manager.is_foreground(app_info["package"]):
+                launch = {"success": True, "mode": MODE_FOREGROUND}
+            else:
+                return None
+            if not launch.get("success"):
+                return None
+            screen = self.tools.find_elements(device_id=device_id)
+            encoded = ObservationEncoder(max_elements=OBSERVATION_ELEMENTS).encode(screen.get("elements", []))
+            return {
+                "app": app_info["name"],
+                "package": app_info["package"],
+                "launch_mode": launch.get("mode"),
+                "screen": encoded.text
+            }
+        except Exception as e:
+            self.logger.warning(f"设备预热失败: {e}")
+            return None
+    
+    async def _await_prewarm(self, scheduler: StageScheduler) -> Optional[Dict[str, Any]]:
+        """等待设备预热结果，超时则放弃"""
+        task = scheduler.tasks.get("device_prewarm")
+        if task is None or scheduler.records["device_prewarm"].adopted is False:
+            return None
+        try:
+            observation = await asyncio.wait_for(asyncio.shield(task), PREWARM_TIMEOUT)
+        except asyncio.TimeoutError:
+            scheduler.cancel("device_prewarm")
+            return None
+        except Exception:
+            return None
+        if observation:
+            scheduler.adopt("device_prewarm")
+        return observation
+    
+    def _local_intent(self, user_input: str, local_intent: IntentResult) -> Dict[str, Any]:
+        """把本地意图识别结果转换为意图理解阶段的输出格式"""
+        return {
+            "original_text": user_input,
+            "analysis": local_intent.to_dict(),
+            "category": TaskCategory(local_intent.category),
+            "slots": local_intent.slots,
+            "source": "local",
+        }
+    
+    def _resolve_app(self, local_intent: IntentResult) -> Optional[Dict[str, Any]]:
+        """根据识别出的APP槽位查找APP配置，未识别出APP时返回None"""
+        app_key = local_intent.slots.get("app")
+        for group in self.supported_apps.values():
+            if app_key in group:
+                app = group[app_key]
+                return {
+                    "selected_app": app,
+                    "name": app["name"],
+                    "package": app["package"],
+                    "category": TaskCategory(local_intent.category) if local_intent.category else app["category"]
+                }
+        return None
+    
+    async def _run_agent(self, stage: str, context: Context, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        调用阶段智能体；启用模型路由时由路由器选择模型，输出无效时升级到更强的模型
+        
+        Args:
+            stage: 智能体名称（self.agents 的键）
+            context: 任务上下文
+            prompt: 输入提示
+            **kwargs: 传给 aprocess 的其他参数
+        """
+        agent = self.agents[stage]
+        if self.model_router is None:
+            return await agent.aprocess(context, prompt, **kwargs)
+        
+        # 升级到更强的模型时重新生成回复，先通知流式回调丢弃已输出的片段
+        on_delta = DeltaRelay.wrap(kwargs.pop("on_delta", None))
+        
+        async def attempt(variant: Agent) -> Dict[str, Any]:
+            if on_delta is not None:
+                await on_delta.reset()
+            return await variant.aprocess(context, prompt, on_delta=on_delta, **kwargs)
+        
+        route = await self.model_router.arun(stage, agent, attempt, prompt=prompt)
+        if len(route.attempts) > 1:
+            self.logger.info(
+                f"{stage} 模型升级: {' -> '.join(attempt.model for attempt in route.attempts)}"
+            )
+        routes = getattr(context, "model_routes", None)
+        if routes is not None:
+            routes.append(route.to_dict())
+        return route.result
+    
     async def _analyze_user_intent(self, user_input: str, context: Context) -> Dict[str, Any]:
         """分析用户意图"""
         try:
@@ -367,7 +639,7 @@ class UniversalAIAssistant:
             5. 用户期望结果
             """
             
-            result = self.agents["intent_analyzer"].process(context, prompt)
+            result = await self._run_agent("intent_analyzer", context, prompt)
             
             return {
                 "success": True,
@@ -394,7 +666,7 @@ class UniversalAIAssistant:
             请选择最适合完成用户任务的APP，并制定启动计划。
             """
             
-            result = self.agents["app_selector"].process(context, prompt)
+            result = await self._run_agent("app_selector", context, prompt)
             
             return {
                 "success": True,
@@ -407,17 +679,19 @@ class UniversalAIAssistant:
         except Exception as e:
             return {"success": False, "error": f"APP选择失败: {str(e)}"}
     
-    async def _navigate_to_target(self, app_info: Dict, intent: Dict, context: Context) -> Dict[str, Any]:
+    async def _navigate_to_target(self, app_info: Dict, intent: Dict, context: Context,
+                                  observation: Optional[Dict] = None) -> Dict[str, Any]:
         """导航到目标功能"""
         try:
             prompt = f"""
             目标APP: {app_info}
             用户意图: {intent}
+            当前界面: {observation if observation else "未知"}
             
             请分析当前APP界面，规划导航路径，到达用户目标功能页面。
             """
             
-            result = self.agents["ui_navigator"].process(context, prompt)
+            result = await self._run_agent("ui_navigator", context, prompt)
             
             return {
                 "success": True,
@@ -436,7 +710,7 @@ class UniversalAIAssistant:
             请按照计划执行具体的操作动作，完成用户任务。
             """
             
-            result = self.agents["action_executor"].process(context, prompt)
+            result = await self._run_agent("action_executor", context, prompt)
             
             return {
                 "success": True,
@@ -456,7 +730,7 @@ class UniversalAIAssistant:
             请验证操作结果是否达到用户预期，并提供质量评估。
             """
             
-            result = self.agents["result_validator"].process(context, prompt)
+            result = await self._run_agent("result_validator", context, prompt)
             
             return {
                 "success": True,
@@ -466,7 +740,8 @@ class UniversalAIAssistant:
         except Exception as e:
             return {"success": False, "error": f"结果验证失败: {str(e)}"}
     
-    async def _generate_user_response(self, validation_result: Dict, context: Context) -> str:
+    async def _generate_user_response(self, validation_result: Dict, context: Context,
+                                      on_delta: Optional[Callable[[str], Any]] = None) -> str:
         """生成用户友好的响应"""
         try:
             prompt = f"""
@@ -475,7 +750,7 @@ class UniversalAIAssistant:
             请生成友好的用户反馈，告知用户操作结果和状态。
             """
             
-            result = self.agents["conversation_manager"].process(context, prompt)
+            result = await self._run_agent("conversation_manager", context, prompt, on_delta=on_delta)
             return str(result.get("output", "操作已完成"))
             
         except Exception as e:
@@ -500,56 +775,250 @@ class UniversalAIAssistant:
             return TaskCategory.LIFE_SERVICES
 
 
+class AssistantPool:
+    """
+    通用AI助手池
+    
+    助手的创建（解析配置、创建智能体、初始化工具）只在启动预热或池中助手不够用时
+    进行。每个请求独占一个助手，智能体的记忆和轮次等状态不会在并发请求间共享；
+    请求自身的状态保存在 process_user_request 创建的任务上下文中。
+    池中助手共用一个 AppAutomationTools 实例。
+    """
+    
+    def __init__(self, config_path: str = "config_unicom_android.yaml",
+                 size: int = None, max_size: int = None):
+        """
+        初始化助手池
+        
+        Args:
+            config_path: 配置文件路径
+            size: 预热时创建的助手数量（默认 AM_ASSISTANT_POOL_SIZE 或 1）
+            max_size: 助手数量上限，达到上限后请求等待空闲助手（默认 AM_ASSISTANT_POOL_MAX 或 4）
+        """
+        self.config_path = config_path
+        self.size = size if size is not None else int(os.getenv("AM_ASSISTANT_POOL_SIZE", 1))
+        self.max_size = max(1, max_size if max_size is not None else int(os.getenv("AM_ASSISTANT_POOL_MAX", 4)))
+        self.tools: Optional[AppAutomationTools] = None
+        self._idle: List[UniversalAIAssistant] = []
+        self._created = 0
+        self._lock = threading.Lock()
+        # 等待空闲助手的 acquire（事件循环，唤醒用的future）
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.served = 0
+        self.waits = 0
+        self.setup_seconds = 0.0
+    
+    def _create(self) -> UniversalAIAssistant:
+        started = datetime.now()
+        if self.tools is None:
+            self.tools = AppAutomationTools()
+        assistant = UniversalAIAssistant(self.config_path, tools=self.tools)
+        self.setup_seconds += (datetime.now() - started).total_seconds()
+        return assistant
+    
+    def warm(self, count: int = None) -> int:
+        """
+        预热：创建助手直到池中有 count 个（默认 size 个）
+        
+        Returns:
+            int: 新创建的助手数量
+        """
+        target = min(self.max_size, self.size if count is None else count)
+        created = 0
+        while True:
+            with self._lock:
+                if self._created >= target:
+                    return created
+                self._created += 1
+            try:
+                assistant = self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._release(assistant)
+            created += 1
+    
+    async def awarm(self, count: int = None) -> int:
+        """异步预热，不阻塞事件循环"""
+        return await asyncio.to_thread(self.warm, count)
+    
+    def _release(self, assistant: UniversalAIAssistant) -> None:
+        with self._lock:
+            self._idle.append(assistant)
+            waiters = self._take_waiters()
+        self._wake(waiters)
+    
+    def _take_waiters(self) -> List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        """取出全部等待者（持有锁时调用），唤醒后各自重新检查空闲助手"""
+        waiters, self._waiters = self._waiters, []
+        return waiters
+    
+    @staticmethod
+    def _wake(waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+            except RuntimeError:
+                # 等待者的事件循环已关闭
+                pass
+    
+    def _forget(self, future: asyncio.Future) -> None:
+        with self._lock:
+            self._waiters = [waiter for waiter in self._waiters if waiter[1] is not future]
+    
+    def _abandon_slot(self) -> None:
+        """创建失败时释放名额，让等待者改为自己创建"""
+        with self._lock:
+            self._created -= 1
+            waiters = self._take_waiters()
+        self._wake(waiters)
+    
+    def _settle_created(self, task: "asyncio.Future") -> None:
+        """acquire 在创建过程中被取消时，把创建好的助手放回池中"""
+        if task.cancelled() or task.exception() is not None:
+            self._abandon_slot()
+        else:
+            self._release(task.result())
+    
+    async def acquire(self, timeout: Optional[float] = None) -> UniversalAIAssistant:
+        """
+        取出一个助手（用完必须调用 release 归还）
+        
+        没有空闲助手且已达上限时在事件循环上等待归还，不占用线程池线程；
+        未达上限时在线程中创建新助手。等待或创建期间被取消不会丢失助手。
+        
+        Args:
+            timeout: 等待空闲助手的最长秒数（None 表示一直等待）
+            
+        Raises:
+            asyncio.TimeoutError: timeout 内没有可用助手
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        waited = False
+        while True:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.max_size:
+                    self._created += 1
+                    break
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+                await asyncio.wait_for(future, remaining)
+            finally:
+                self._forget(future)
+        
+        task = asyncio.ensure_future(asyncio.to_thread(self._create))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(self._settle_created)
+            raise
+        except Exception:
+            self._abandon_slot()
+            raise
+    
+    def release(self, assistant: UniversalAIAssistant) -> None:
+        """归还助手"""
+        self._release(assistant)
+    
+    async def process(self, user_input: str, context: Optional[Dict] = None,
+                      on_delta: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        使用池中的助手处理一个请求
+        
+        Args:
+            user_input: 用户的自然语言指令
+            context: 上下文信息（设备信息、历史对话等）
+            on_delta: 可选回调，流式接收最终回复的文本片段
+            
+        Returns:
+            处理结果字典
+        """
+        assistant = await self.acquire()
+        try:
+            return await assistant.process_user_request(user_input, context, on_delta)
+        finally:
+            with self._lock:
+                self.served += 1
+            self.release(assistant)
+    
+    def stats(self) -> Dict[str, Any]:
+        """助手池统计"""
+        with self._lock:
+            return {
+                "created": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "max_size": self.max_size,
+                "served": self.served,
+                "waits": self.waits,
+                "setup_seconds": round(self.setup_seconds, 4),
+            }
+
+
+_default_pool: Optional[AssistantPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_assistant_pool() -> AssistantPool:
+    """获取进程内共享的助手池（首次调用时创建，助手在第一个请求或 warm() 时创建）"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = AssistantPool()
+        return _default_pool
+
+
 # 主函数接口
-async def run_universal_assistant(user_input: str, device_id: str = None, **kwargs) -> Dict[str, Any]:
+async def run_universal_assistant(user_input: str, device_id: str = None,
+                                  on_delta: Optional[Callable[[str], Any]] = None, **kwargs) -> Dict[str, Any]:
     """
     通用AI助手主接口
     
     Args:
         user_input: 用户的自然语言指令
         device_id: 设备ID（可选）
-        **kwargs: 其他参数
+        on_delta: 可选回调，流式接收最终回复的文本片段；收到 DELTA_RESET 时应清空已显示的内容
+        **kwargs: 其他参数（并入上下文）
         
     Returns:
         执行结果字典
     """
-    assistant = UniversalAIAssistant()
-    
     context = {
         "device_id": device_id,
         "timestamp": datetime.now().isoformat(),
         **kwargs
     }
     
-    result = await assistant.process_user_request(user_input, context)
-    return result
+    # 复用进程内的助手，避免每个请求重新解析配置、创建智能体
+    return await get_assistant_pool().process(user_input, context, on_delta)
 
 
 # 同步版本（兼容现有调用）
-def universal_ai_assistant(user_input: str, device_id: str = None, **kwargs) -> Dict[str, Any]:
+def universal_ai_assistant(user_input: str, device_id: str = None,
+                           on_delta: Optional[Callable[[str], Any]] = None, **kwargs) -> Dict[str, Any]:
     """
     通用AI助手同步接口（兼容性）
-    现已集成真实的手机操作功能
+    现已集成真实的手机操作功能；on_delta 在调用线程中流式接收多智能体流程的最终回复片段
     """
     from datetime import datetime
     from .tool.app_automation_tools import AppAutomationTools
     
-    # 检查是否是话费查询相关请求
-    user_input_lower = user_input.lower()
-    is_balance_query = any(keyword in user_input_lower for keyword in [
-        '话费', '余额', '查询话费', '话费余额', '剩余话费', '查询余额'
-    ])
-    
-    # 检查是否是流量查询相关请求
-    is_data_usage_query = any(keyword in user_input_lower for keyword in [
-        '流量', '剩余流量', '通用流量', '剩余通用流量', '查询流量', '数据流量', '流量使用'
-    ])
-    
-    # 检查是否是电话代接相关请求
-    is_phone_request = any(keyword in user_input_lower for keyword in [
-        '电话代接', '自动接听', '场景模式', '工作模式', '休息模式', '驾驶模式', 
-        '会议模式', '学习模式', '电话设置', '来电', '代接'
-    ])
+    # 本地意图识别：话费查询、流量查询和电话代接请求直接调用集成的功能
+    intent = get_intent_classifier().classify(user_input).intent
+    is_balance_query = intent == INTENT_BALANCE_QUERY
+    is_data_usage_query = intent == INTENT_DATA_USAGE_QUERY
+    is_phone_request = intent == INTENT_PHONE_AUTO_ANSWER
     
     if is_balance_query:
         # 直接调用我们集成的话费查询功能
@@ -726,13 +1195,13 @@ def universal_ai_assistant(user_input: str, device_id: str = None, **kwargs) ->
     # 对于非话费查询的请求，使用原有的多智能体模拟系统
     import asyncio
     try:
-        return asyncio.run(run_universal_assistant(user_input, device_id, **kwargs))
+        return asyncio.run(run_universal_assistant(user_input, device_id, on_delta, **kwargs))
     except RuntimeError:
         # 如果在已有事件循环中，创建新循环
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            return loop.run_until_complete(run_universal_assistant(user_input, device_id, **kwargs))
+            return loop.run_until_complete(run_universal_assistant(user_input, device_id, on_delta, **kwargs))
         finally:
             loop.close()
 
@@ -2,7 +2,8 @@
 Utility modules for AgileMind.
 """
 
-from .retry import retry
+from .retry import retry, async_retry
+from .resilience import resilient, call_with_retry, CircuitOpenError, get_retry_metrics
 from .cost import format_cost
 from .window import LogWindow
 from .file import copy_to_directory
@@ -10,10 +11,16 @@ from .code_framework_extractor import extract_framework
 from .json_cleaner import extract_json, clean_json_string
 from .config_loader import load_config, extract_agent_llm_config
 from .model_info import calculate_cost, ModelLibrary, get_model_info
+from .token_estimator import TokenEstimator, get_token_estimator, estimate_tokens
 from .json_to_markdown import convert as convert_json_to_markdown, create_file_tree
 
 __all__ = [
     "retry",
+    "async_retry",
+    "resilient",
+    "call_with_retry",
+    "CircuitOpenError",
+    "get_retry_metrics",
     "format_cost",
     "load_config",
     "LogWindow",
@@ -27,4 +34,7 @@ __all__ = [
     "convert_json_to_markdown",
     "create_file_tree",
     "get_model_info",
+    "TokenEstimator",
+    "get_token_estimator",
+    "estimate_tokens",
 ]
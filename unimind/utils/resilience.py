@@ -0,0 +1,575 @@
+"""
+Resilient calls: retries with decorrelated jitter, server-hinted backoff,
+per-endpoint circuit breakers and a shared retry budget.
+
+`retry`/`async_retry` sleep a fixed geometric schedule, so agents that fail
+together retry together, a `Retry-After` from the server is ignored and a dead
+endpoint is hammered by every caller. The `resilient` decorator (for plain and
+coroutine functions) and `call_with_retry` fix this:
+
+- delays follow decorrelated jitter: ``min(cap, uniform(base, 3 * previous))``;
+- a ``retry-after-ms``/``retry-after`` header on the error (e.g. an
+  `openai.RateLimitError`) sets a lower bound on the delay;
+- a CircuitBreaker per endpoint opens after consecutive failures, rejects calls
+  with `CircuitOpenError` while open and lets a probe through after the
+  recovery timeout;
+- a RetryBudget shared by all callers caps retries to a share of recent
+  requests, so an outage does not multiply the load;
+- RetryMetrics counts attempts, retries, give-ups and the time spent sleeping
+  per call name (`get_retry_metrics`).
+"""
+
+import time
+import random
+import asyncio
+import inspect
+import threading
+from collections import deque
+from functools import wraps
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type, Union
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+# Server hints above this value are capped (seconds)
+MAX_RETRY_AFTER = 60.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def decorrelated_jitter(
+    previous: float,
+    base: float = DEFAULT_BASE_DELAY,
+    cap: float = DEFAULT_MAX_DELAY,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """
+    Next delay of the decorrelated jitter schedule.
+
+    Args:
+        previous: The previous delay (use `base` for the first retry)
+        base: Minimum delay
+        cap: Maximum delay
+        rng: Optional random generator (for reproducible schedules)
+
+    Returns:
+        float: Delay in seconds
+    """
+    rng = rng or random
+    return min(cap, rng.uniform(base, max(base, previous * 3)))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read the server's backoff hint from an exception carrying an HTTP response.
+
+    Supports ``retry-after-ms``, ``retry-after`` in seconds and ``retry-after``
+    as an HTTP date.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None without a hint
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one endpoint.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            endpoint: Name of the protected endpoint
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a probe is allowed
+            half_open_max_calls: Concurrent probe calls allowed while half open
+        """
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Check that a call may proceed.
+
+        Returns:
+            bool: True if the call is a half-open probe; it must end with
+            `record_success`, `record_failure` or `release_probe`
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or half open with a probe in flight
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.endpoint, remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.endpoint, 0.0)
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call; closes a half-open circuit."""
+        with self._lock:
+            self.failures = 0
+            self.state = CLOSED
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call; opens the circuit at the threshold or on a failed probe."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probes = 0
+
+    def release_probe(self) -> None:
+        """Free the slot of a probe that ended without an answer (e.g. cancelled)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state and counters of the breaker."""
+        with self._lock:
+            return {
+                "endpoint": self.endpoint,
+                "state": self.state,
+                "failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """
+    Retry budget shared by all callers.
+
+    Within a sliding window, retries are allowed up to ``min_retries`` plus
+    ``ratio`` times the number of first attempts made in the window.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 10.0):
+        """
+        Initialize the budget.
+
+        Args:
+            ratio: Retries allowed per first attempt
+            min_retries: Retries always allowed per window (for low traffic)
+            window: Length of the sliding window in seconds
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.exhausted = 0
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and events[0] <= now - self.window:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Record a first attempt."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False if it is exhausted."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self.exhausted += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the usage of the current window."""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+                "allowed": self.min_retries + self.ratio * len(self._requests),
+                "exhausted": self.exhausted,
+            }
+
+
+@dataclass
+class RetryStats:
+    """Retry counters of one call name."""
+
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    successes: int = 0
+    failures: int = 0
+    budget_exhausted: int = 0
+    circuit_rejections: int = 0
+    server_hinted: int = 0
+    sleep_seconds: float = 0.0
+
+
+class RetryMetrics:
+    """
+    Thread-safe retry counters per call name.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, RetryStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, **counts: Union[int, float]) -> None:
+        """Increment counters of a call name."""
+        with self._lock:
+            stats = self._stats.setdefault(name, RetryStats())
+            for key, value in counts.items():
+                setattr(stats, key, getattr(stats, key) + value)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the counters of every call name."""
+        with self._lock:
+            return {
+                name: dict(asdict(stats), sleep_seconds=round(stats.sleep_seconds, 3))
+                for name, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self._stats.clear()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_default_budget = RetryBudget()
+_metrics = RetryMetrics()
+
+
+def get_circuit_breaker(endpoint: str, **kwargs) -> CircuitBreaker:
+    """Get the shared circuit breaker of an endpoint (kwargs apply on creation)."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint, **kwargs)
+        return breaker
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the process-wide retry budget."""
+    return _default_budget
+
+
+def get_retry_metrics() -> Dict[str, Any]:
+    """Return retry metrics per call name, the budget and the circuit breaker states."""
+    with _breakers_lock:
+        breakers = [breaker.stats() for breaker in _breakers.values()]
+    return {
+        "calls": _metrics.to_dict(),
+        "budget": _default_budget.stats(),
+        "circuits": breakers,
+    }
+
+
+class _RetryState:
+    """Shared bookkeeping of one resilient call for the sync and async loops."""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        exceptions: Tuple[Type[BaseException], ...],
+        trip_on: Tuple[Type[BaseException], ...],
+        retry_on_result: Optional[Callable[[Any], bool]],
+        breaker: Optional[CircuitBreaker],
+        budget: Optional[RetryBudget],
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.exceptions = exceptions
+        self.trip_on = trip_on
+        self.retry_on_result = retry_on_result
+        self.breaker = breaker
+        self.budget = budget
+        self.attempt = 0
+        self.delay = base_delay
+        self.probing = False
+
+    def start(self) -> None:
+        _metrics.add(self.name, calls=1)
+        if self.budget:
+            self.budget.record_request()
+
+    def before_attempt(self) -> None:
+        self.attempt += 1
+        _metrics.add(self.name, attempts=1)
+        if self.breaker:
+            try:
+                self.probing = self.breaker.before_call()
+            except CircuitOpenError:
+                _metrics.add(self.name, circuit_rejections=1, failures=1)
+                raise
+
+    def on_result(self, result: Any) -> Optional[float]:
+        """Return the delay before the next attempt, or None to return the result."""
+        if self.retry_on_result and self.retry_on_result(result):
+            if self.breaker:
+                self.breaker.record_failure()
+            return self._next_delay(None, "unsuccessful result")
+        if self.breaker:
+            self.breaker.record_success()
+        _metrics.add(self.name, successes=1)
+        return None
+
+    def on_error(self, error: BaseException) -> Optional[float]:
+        """Return the delay before the next attempt, or None to re-raise."""
+        if self.breaker:
+            if isinstance(error, self.trip_on):
+                self.breaker.record_failure()
+            else:
+                # The endpoint answered; the failure is not its health's fault
+                self.breaker.record_success()
+        return self._next_delay(error, f"{type(error).__name__}: {error}")
+
+    def on_abort(self, error: BaseException) -> None:
+        """Settle the breaker for an error that is not retried (it is re-raised)."""
+        _metrics.add(self.name, failures=1)
+        if not self.breaker:
+            return
+        if isinstance(error, self.trip_on):
+            self.breaker.record_failure()
+        elif isinstance(error, Exception):
+            # The endpoint answered (e.g. a 400); the failure is not its health's fault
+            self.breaker.record_success()
+        elif self.probing:
+            # Cancelled or interrupted: the probe says nothing about the endpoint
+            self.breaker.release_probe()
+
+    def _next_delay(self, error: Optional[BaseException], reason: str) -> Optional[float]:
+        if self.attempt >= self.max_attempts:
+            print(
+                "Warning: "
+                f"{self.name} attempt {self.attempt}/{self.max_attempts} failed ({reason}). "
+                "Max retries exceeded."
+            )
+            _metrics.add(self.name, failures=1)
+            return None
+        if self.budget and not self.budget.try_spend():
+            print(f"Warning: {self.name} retry budget exhausted, giving up ({reason})")
+            _metrics.add(self.name, failures=1, budget_exhausted=1)
+            return None
+
+        self.delay = decorrelated_jitter(self.delay, self.base_delay, self.max_delay)
+        hint = retry_after_seconds(error) if error is not None else None
+        if hint is not None:
+            self.delay = max(self.delay, min(hint, MAX_RETRY_AFTER))
+            _metrics.add(self.name, server_hinted=1)
+        _metrics.add(self.name, retries=1, sleep_seconds=self.delay)
+        print(
+            "Warning: "
+            f"{self.name} attempt {self.attempt}/{self.max_attempts} failed ({reason}). "
+            f"Retrying in {self.delay:.2f}s"
+        )
+        return self.delay
+
+
+def _endpoint_of(endpoint: Union[None, str, Callable[..., str]], args, kwargs) -> Optional[str]:
+    if endpoint is None or isinstance(endpoint, str):
+        return endpoint
+    return endpoint(*args, **kwargs)
+
+
+def resilient(
+    name: Optional[str] = None,
+    max_attempts: int = 3,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    exceptions: Sequence[Type[BaseException]] = (Exception,),
+    endpoint: Union[None, str, Callable[..., str]] = None,
+    trip_on: Optional[Sequence[Type[BaseException]]] = None,
+    retry_on_result: Optional[Callable[[Any], bool]] = None,
+    budget: Optional[RetryBudget] = None,
+    use_budget: bool = True,
+    breaker_options: Optional[Dict[str, Any]] = None,
+):
+    """
+    Retry decorator for plain and coroutine functions.
+
+    Args:
+        name: Name used in logs and metrics, defaults to the function's qualified name
+        max_attempts: Maximum number of attempts including the first
+        base_delay: Minimum delay between attempts in seconds
+        max_delay: Maximum delay between attempts in seconds (server hints may exceed it
+            up to MAX_RETRY_AFTER)
+        exceptions: Exceptions that trigger a retry; others propagate immediately
+        endpoint: Circuit breaker key, or a function of the call's arguments returning it;
+            None disables the breaker
+        trip_on: Exceptions counted as endpoint failures by the breaker (default: `exceptions`)
+        retry_on_result: Optional predicate; a result for which it returns True is retried
+            like a failure (the last such result is returned when attempts run out)
+        budget: Retry budget, defaults to the process-wide one
+        use_budget: Set False to retry regardless of the shared budget
+        breaker_options: Keyword arguments for a newly created CircuitBreaker
+
+    Returns:
+        A decorator wrapping the function with retries.
+    """
+    exceptions = tuple(exceptions)
+    trip_on = tuple(trip_on) if trip_on is not None else exceptions
+    breaker_options = breaker_options or {}
+
+    def decorator(func):
+        call_name = name or func.__qualname__
+
+        def new_state(args, kwargs) -> _RetryState:
+            key = _endpoint_of(endpoint, args, kwargs)
+            return _RetryState(
+                call_name,
+                max_attempts,
+                base_delay,
+                max_delay,
+                exceptions,
+                trip_on,
+                retry_on_result,
+                get_circuit_breaker(key, **breaker_options) if key else None,
+                (budget or _default_budget) if use_budget else None,
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                state = new_state(args, kwargs)
+                state.start()
+                while True:
+                    state.before_attempt()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except exceptions as e:
+                        delay = state.on_error(e)
+                        if delay is None:
+                            raise
+                    except BaseException as e:
+                        state.on_abort(e)
+                        raise
+                    else:
+                        delay = state.on_result(result)
+                        if delay is None:
+                            return result
+                    await asyncio.sleep(delay)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            state = new_state(args, kwargs)
+            state.start()
+            while True:
+                state.before_attempt()
+                try:
+                    result = func(*args, **kwargs)
+                except exceptions as e:
+                    delay = state.on_error(e)
+                    if delay is None:
+                        raise
+                except BaseException as e:
+                    state.on_abort(e)
+                    raise
+                else:
+                    delay = state.on_result(result)
+                    if delay is None:
+                        return result
+                time.sleep(delay)
+
+        return wrapper
+
+    return decorator
+
+
+def call_with_retry(func: Callable[[], Any], **options) -> Any:
+    """
+    Call a function once through `resilient` with the given options.
+
+    Example:
+        ``call_with_retry(run, endpoint="adb:emulator-5554", retry_on_result=failed)``
+
+    Args:
+        func: Function to call without arguments (bind them with a lambda or functools.partial)
+        **options: Keyword arguments of `resilient`
+
+    Returns:
+        The result of the function
+    """
+    return resilient(**options)(func)()
@@ -3,6 +3,7 @@ Retry decorator utility for handling transient failures with Rich visualization.
 """
 
 import time
+import asyncio
 from functools import wraps
 from typing import Type, List
 
@@ -59,3 +60,57 @@ def retry(
         return wrapper
 
     return decorator
+
+
+def async_retry(
+    max_attempts: int = 3,
+    delay: float = 2.0,
+    backoff_factor: float = 3.0,
+    exceptions: List[Type[Exception]] = None,
+):
+    """
+    Retry decorator for coroutine functions. Same semantics as `retry`,
+    but waits with asyncio.sleep so other tasks on the loop keep running.
+
+    Args:
+        max_attempts: Maximum number of retry attempts (default: 3)
+        delay: Initial delay between retries in seconds (default: 2.0)
+        backoff_factor: Multiplier for delay between retries (default: 3.0)
+        exceptions: List of exceptions to catch (default: all exceptions)
+
+    Returns:
+        A decorator function that will retry the decorated coroutine on failure.
+    """
+    exceptions = exceptions or [Exception]
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            attempt = 1
+            current_delay = delay
+
+            while attempt <= max_attempts:
+                try:
+                    return await func(*args, **kwargs)
+
+                except tuple(exceptions) as e:
+                    if attempt < max_attempts:
+                        print(
+                            "Warning: "
+                            f"Attempt {attempt}/{max_attempts}. "
+                            f"Retrying in {current_delay:.2f}s"
+                        )
+                        await asyncio.sleep(current_delay)
+                        current_delay *= backoff_factor
+                        attempt += 1
+                    else:
+                        print(
+                            "Warning: "
+                            f"Attempt {attempt}/{max_attempts}. "
+                            "Max retries exceeded. Exiting."
+                        )
+                        raise
+
+        return wrapper
+
+    return decorator
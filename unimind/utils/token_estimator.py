@@ -0,0 +1,321 @@
+"""
+Local token estimation for pre-flight prompt sizing.
+
+Token counts are known only after the API returns `usage`, which is too late to
+avoid an oversized request. This module estimates them locally:
+
+- with `tiktoken` (optional) for OpenAI models, exactly;
+- otherwise with a per-tokenizer-family heuristic that splits the text like a
+  BPE pre-tokenizer (CJK characters, letter runs, digit runs, symbols) and
+  applies ratios measured for each family. Chinese text matters here: one
+  character costs close to a token, not a quarter of one.
+
+Counts are cached by a digest of the string (so whole tool results and UI
+dumps are not kept alive by the cache), and each estimator keeps a calibration
+factor learned from the actual `usage` of completed requests.
+"""
+
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Tokens added per message and to prime the reply (chat format framing)
+MESSAGE_OVERHEAD = 3
+REPLY_OVERHEAD = 3
+# Tokens of one image part (high detail, 512px tiles) when the size is unknown
+IMAGE_TOKENS = 765
+
+CALIBRATION_ALPHA = 0.2
+CALIBRATION_BOUNDS = (0.5, 2.0)
+
+# Entries of the token count cache
+COUNT_CACHE_SIZE = 32768
+
+PIECE_PATTERN = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+)"
+    r"|(?P<letters>[^\W\d_]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbol>.)",
+    re.DOTALL,
+)
+
+
+@dataclass(frozen=True)
+class TokenProfile:
+    """Heuristic ratios of one tokenizer family."""
+
+    # Tokens per CJK character
+    cjk: float
+    # Characters per token in letter runs (words)
+    letters: float
+    # Characters per token in digit runs
+    digits: float
+    # Tokens per punctuation or other symbol
+    symbol: float
+
+
+PROFILES: Dict[str, TokenProfile] = {
+    # o200k_base (gpt-4o family)
+    "openai": TokenProfile(cjk=0.75, letters=4.2, digits=3.0, symbol=0.8),
+    # Claude tokenizer is less efficient on Chinese
+    "claude": TokenProfile(cjk=1.2, letters=3.6, digits=3.0, symbol=1.0),
+    # DeepSeek tokenizer has a large Chinese vocabulary
+    "deepseek": TokenProfile(cjk=0.6, letters=4.0, digits=3.0, symbol=0.8),
+}
+DEFAULT_FAMILY = "openai"
+
+
+def model_family(model: Optional[str]) -> str:
+    """
+    Map a model name or ModelLibrary id to its tokenizer family.
+
+    Args:
+        model: Model name, e.g. "gpt-4o-mini", "DeepSeek V3" or "CLAUDE_3_5_HAIKU_20241022"
+
+    Returns:
+        str: One of the PROFILES keys
+    """
+    name = (model or "").lower().replace("_", "-")
+    if "claude" in name:
+        return "claude"
+    if "deepseek" in name:
+        return "deepseek"
+    return DEFAULT_FAMILY
+
+
+def _heuristic_count(text: str, family: str) -> int:
+    profile = PROFILES[family]
+    tokens = 0.0
+    for match in PIECE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        piece = match.group()
+        if kind == "cjk":
+            tokens += len(piece) * profile.cjk
+        elif kind == "letters":
+            tokens += math.ceil(len(piece) / profile.letters)
+        elif kind == "digits":
+            tokens += math.ceil(len(piece) / profile.digits)
+        elif kind == "space":
+            # A single space is merged into the next word; runs of
+            # whitespace (indentation, blank lines) cost about one token
+            tokens += 0 if piece == " " else 1
+        else:
+            tokens += profile.symbol
+    return math.ceil(tokens)
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _tiktoken_count(text: str, model: str) -> int:
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+class _CountCache:
+    """LRU of token counts keyed by a digest of the text instead of the text itself."""
+
+    def __init__(self, maxsize: int = COUNT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, tokenizer: str) -> tuple:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return digest, tokenizer
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def put(self, key: tuple, count: int) -> None:
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            if len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+
+
+_count_cache = _CountCache()
+
+
+class TokenEstimator:
+    """
+    Token estimator for one model.
+    """
+
+    def __init__(self, model: Optional[str] = None):
+        """
+        Initialize the estimator.
+
+        Args:
+            model: Model name; selects the tokenizer family
+        """
+        self.model = model or ""
+        self.family = model_family(model)
+        self.exact = HAS_TIKTOKEN and self.family == "openai"
+        self.calibration = 1.0
+        self.samples = 0
+        self.last_error: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _count_uncached(self, text: str) -> int:
+        if self.exact:
+            return _tiktoken_count(text, self.model)
+        return _heuristic_count(text, self.family)
+
+    def count(self, text: str) -> int:
+        """Count the tokens of a text (cached by digest)."""
+        if not text:
+            return 0
+        key = _count_cache.key(text, self.model if self.exact else self.family)
+        count = _count_cache.get(key)
+        if count is None:
+            count = self._count_uncached(text)
+            _count_cache.put(key, count)
+        return count
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        """Count the tokens of one chat message, including tool calls and image parts."""
+        tokens = MESSAGE_OVERHEAD
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if not isinstance(part, dict):
+                    continue
+                if part.get("type") == "image_url":
+                    tokens += IMAGE_TOKENS
+                else:
+                    tokens += self.count(part.get("text", ""))
+        else:
+            tokens += self.count(content or "")
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function", {})
+            tokens += self.count(function.get("name", "")) + self.count(
+                function.get("arguments", "")
+            )
+        if message.get("name"):
+            tokens += self.count(message["name"])
+        return tokens
+
+    def count_messages(
+        self, messages: List[Dict[str, Any]], tools: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Predict the prompt tokens of a request.
+
+        Args:
+            messages: Request messages
+            tools: Optional tool definitions sent with the request
+
+        Returns:
+            int: Predicted prompt tokens, corrected by the calibration factor
+        """
+        tokens = REPLY_OVERHEAD + sum(self.count_message(message) for message in messages)
+        if tools:
+            tokens += self.count(json.dumps(tools, ensure_ascii=False, sort_keys=True))
+        return math.ceil(tokens * self.calibration)
+
+    def record(self, predicted: int, actual: int) -> float:
+        """
+        Record the actual prompt tokens of a request to calibrate later predictions.
+
+        Args:
+            predicted: Prediction made before sending (already calibrated)
+            actual: `usage.prompt_tokens` returned by the API
+
+        Returns:
+            float: Relative error of the prediction
+        """
+        if predicted <= 0 or actual <= 0:
+            return 0.0
+        error = (predicted - actual) / actual
+        with self._lock:
+            raw = predicted / self.calibration
+            ratio = min(max(actual / raw, CALIBRATION_BOUNDS[0]), CALIBRATION_BOUNDS[1])
+            self.calibration += CALIBRATION_ALPHA * (ratio - self.calibration)
+            self.samples += 1
+            self.last_error = error
+        return error
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Shorten a text to at most `max_tokens`, keeping its head and tail.
+
+        Args:
+            text: Text to shorten
+            max_tokens: Token limit
+
+        Returns:
+            str: The text itself if it fits, otherwise head + marker + tail
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        best = ""
+        while low <= high:
+            keep = (low + high) // 2
+            half = keep // 2
+            candidate = (
+                f"{text[:half]}\n...[truncated {len(text) - keep} chars]...\n"
+                f"{text[len(text) - (keep - half):]}"
+            )
+            # Candidates are throwaway strings; keep them out of the cache
+            if self._count_uncached(candidate) <= max_tokens:
+                best = candidate
+                low = keep + 1
+            else:
+                high = keep - 1
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the calibration state."""
+        return {
+            "model": self.model,
+            "family": self.family,
+            "exact": self.exact,
+            "calibration": round(self.calibration, 4),
+            "samples": self.samples,
+            "last_error": None if self.last_error is None else round(self.last_error, 4),
+        }
+
+
+_estimators: Dict[str, TokenEstimator] = {}
+_estimators_lock = threading.Lock()
+
+
+def get_token_estimator(model: Optional[str] = None) -> TokenEstimator:
+    """Get the shared (calibrated) estimator for a model."""
+    key = model or ""
+    with _estimators_lock:
+        estimator = _estimators.get(key)
+        if estimator is None:
+            estimator = _estimators[key] = TokenEstimator(model)
+        return estimator
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Estimate the tokens of a text for a model."""
+    return get_token_estimator(model).count(text)
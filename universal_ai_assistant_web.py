@@ -18,6 +18,14 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from unimind.universal_ai_assistant import universal_ai_assistant, run_universal_assistant
+from unimind.execution import DELTA_RESET
+from unimind.intent_classifier import (
+    classify_intent,
+    INTENT_BALANCE_QUERY,
+    INTENT_DATA_USAGE_QUERY,
+    INTENT_BENEFITS_CLAIM,
+    INTENT_PHONE_AUTO_ANSWER
+)
 from unimind.tool.unicom_android_tools import UnicomAndroidTools
 from unimind.tool.real_phone_auto_answer import (
     real_phone_manager,
@@ -405,8 +413,20 @@ def render_chat_interface(api_key: str, device_id: str):
                 elif _is_phone_auto_answer_request(user_input):
                     result = handle_phone_auto_answer_request(user_input, device_id)
                 else:
-                    # 调用AI助手
-                    result = universal_ai_assistant(user_input, device_id)
+                    # 调用AI助手，最终回复边生成边显示
+                    reply_box = st.empty()
+                    streamed = []
+                    
+                    def show_delta(delta: str):
+                        # 重试或模型升级时重新生成回复，清空已显示的片段
+                        if delta == DELTA_RESET:
+                            streamed.clear()
+                        else:
+                            streamed.append(delta)
+                        reply_box.markdown("".join(streamed))
+                    
+                    result = universal_ai_assistant(user_input, device_id, on_delta=show_delta)
+                    reply_box.empty()
                 
                 progress_bar.progress(100)
                 status_text.text("✅ 执行完成!")
@@ -465,41 +485,33 @@ def render_task_results():
         else:
             render_general_task_result(result)
 
+def _result_intent(result):
+    """识别结果对应请求的意图"""
+    return classify_intent(result.get("user_input", "")).intent
+
 def _is_balance_query_result(result):
     """检查是否是话费查询结果"""
-    user_input = result.get("user_input", "").lower()
-    return any(keyword in user_input for keyword in ['话费', '余额', '查询话费', '话费余额'])
+    return _result_intent(result) == INTENT_BALANCE_QUERY
 
 def _is_data_usage_query_result(result):
     """检查是否是流量查询结果"""
-    user_input = result.get("user_input", "").lower()
-    return any(keyword in user_input for keyword in ['流量', '剩余流量', '通用流量', '剩余通用流量', '查询流量', '数据流量', '流量使用'])
+    return _result_intent(result) == INTENT_DATA_USAGE_QUERY
 
 def _is_benefits_claim_result(result):
     """检查是否是权益领取结果"""
-    user_input = result.get("user_input", "").lower()
-    return any(keyword in user_input for keyword in ['权益', '领取', '优惠券', '领券', '权益领取', '积分权益', '联通积分', '会员权益'])
+    return result.get("task_category") == "权益领取" or _result_intent(result) == INTENT_BENEFITS_CLAIM
 
 def _is_phone_auto_answer_result(result):
     """检查是否是智能代接结果"""
-    user_input = result.get("user_input", "").lower()
-    task_category = result.get("task_category", "").lower()
-    return task_category == "智能代接" or any(keyword in user_input for keyword in ['智能代接', '电话代接', '自动接听', '代接设置', '电话回复', '来电管理'])
+    return result.get("task_category") == "智能代接" or _result_intent(result) == INTENT_PHONE_AUTO_ANSWER
 
 def _is_benefits_claim_request(user_input):
     """检查是否是权益领取请求"""
-    user_input_lower = user_input.lower()
-    return any(keyword in user_input_lower for keyword in ['权益领取', '领取权益', '优惠券', '领券', '积分权益', '联通积分', '会员权益', '权益'])
+    return classify_intent(user_input).intent == INTENT_BENEFITS_CLAIM
 
 def _is_phone_auto_answer_request(user_input):
     """检查是否是智能代接请求"""
-    user_input_lower = user_input.lower()
-    keywords = [
-        '智能代接', '电话代接', '自动接听', '代接设置', '电话回复', '来电管理', '智能接听',
-        '会议模式', '外卖模式', '工作模式', '陌生电话', '忙碌模式', '场景模式', '自定义回复',
-        '开启代接', '关闭代接', '代接状态', '电话设置', '来电设置'
-    ]
-    return any(keyword in user_input_lower for keyword in keywords)
+    return classify_intent(user_input).intent == INTENT_PHONE_AUTO_ANSWER
 
 def handle_benefits_claim_request(user_input, device_id):
     """处理权益领取请求"""
@@ -549,38 +561,23 @@ def handle_phone_auto_answer_request(user_input, device_id):
         # 获取当前智能代接状态
         status = phone_get_status()
         
-        # 根据用户输入判断具体操作
-        user_input_lower = user_input.lower()
+        # 根据识别出的槽位判断具体操作
+        slots = classify_intent(user_input).slots
+        scenario_names = {
+            "work": "工作模式", "meeting": "会议模式", "delivery": "外卖模式", "driving": "驾驶模式",
+            "rest": "休息模式", "study": "学习模式", "busy": "忙碌模式", "hospital": "医院模式"
+        }
         
-        if "开启" in user_input_lower or "启用" in user_input_lower:
-            # 开启智能代接
-            from unimind.tool.phone_auto_answer import phone_toggle_auto_answer
-            result = phone_toggle_auto_answer(True)
-            action = "开启智能代接"
-            
-        elif "关闭" in user_input_lower or "停用" in user_input_lower:
-            # 关闭智能代接
-            from unimind.tool.phone_auto_answer import phone_toggle_auto_answer
-            result = phone_toggle_auto_answer(False)
-            action = "关闭智能代接"
-            
-        elif "工作模式" in user_input_lower:
-            # 切换到工作模式
-            from unimind.tool.phone_auto_answer import phone_set_scenario_mode
-            result = phone_set_scenario_mode("work")
-            action = "设置工作模式"
-            
-        elif "会议模式" in user_input_lower:
-            # 切换到会议模式
-            from unimind.tool.phone_auto_answer import phone_set_scenario_mode
-            result = phone_set_scenario_mode("meeting")
-            action = "设置会议模式"
+        if slots.get("toggle") in ("on", "off"):
+            # 开启/关闭智能代接
+            enabled = slots["toggle"] == "on"
+            result = phone_toggle_auto_answer(enabled)
+            action = "开启智能代接" if enabled else "关闭智能代接"
             
-        elif "外卖模式" in user_input_lower:
-            # 切换到外卖模式
-            from unimind.tool.phone_auto_answer import phone_set_scenario_mode
-            result = phone_set_scenario_mode("delivery")
-            action = "设置外卖模式"
+        elif slots.get("scenario_mode") in scenario_names:
+            # 切换场景模式
+            result = phone_set_scenario_mode(slots["scenario_mode"])
+            action = f"设置{scenario_names[slots['scenario_mode']]}"
             
         else:
             # 默认显示状态信息